@@ -0,0 +1,82 @@
+"""
+Cold-start import time of the losses and eval metrics.
+
+Each import runs in a fresh interpreter, as in a short-lived scoring worker, and reports the best
+time over a few runs together with the heavy dependencies it pulled in. The run fails (exit code 1)
+if an import is slower than --max-seconds or imports one of HEAVY_MODULES:
+
+```bash
+python benchmarks/import_time.py --max-seconds 0.5
+```
+"""
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+from typing import Any, Optional
+
+IMPORTS = [
+    "from bokbokbok.loss_functions.classification import WeightedFocalLoss",
+    "from bokbokbok.loss_functions.regression import LogCoshLoss",
+    "from bokbokbok.eval_metrics.classification import F1_Score_Binary, QuadraticWeightedKappaMetric",
+    "from bokbokbok.eval_metrics.regression import RMSPEMetric",
+    "from bokbokbok.utils import sklearn_api",
+]
+# Dependencies importing the package must not pull in
+HEAVY_MODULES = ["sklearn", "scipy", "numba", "lightgbm", "xgboost"]
+
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "heavy_modules": [m for m in {heavy_modules!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(statement: str, repeat: int = 5) -> dict[str, Any]:
+    """
+    Times an import statement in fresh interpreters.
+
+    Args:
+        statement (str): The import statement
+        repeat (int): Number of interpreters to time it in
+
+    Returns:
+        The statement, its best time in seconds and the heavy modules it imported
+    """
+    root = pathlib.Path(__file__).resolve().parents[1]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(root), os.environ.get("PYTHONPATH")]))}
+    script = _SCRIPT.format(statement=statement, heavy_modules=HEAVY_MODULES)
+
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+        runs.append(json.loads(output.stdout))
+    return {
+        "statement": statement,
+        "seconds": min(run["seconds"] for run in runs),
+        "heavy_modules": runs[0]["heavy_modules"],
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Interpreters to time each import in")
+    parser.add_argument("--max-seconds", type=float, help="Fail if an import takes longer")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for statement in IMPORTS:
+        result = measure_import(statement, args.repeat)
+        print(f"{result['seconds']:>8.3f}s  {statement}  {' '.join(result['heavy_modules'])}")
+        too_slow = args.max_seconds is not None and result["seconds"] > args.max_seconds
+        failed = failed or too_slow or bool(result["heavy_modules"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Benchmarks of the gradient / hessian of every loss and of every eval metric, across data sizes,
+dtypes (see bokbokbok.utils.config) and the available kernel backends.
+
+Each benchmark records the best time per call, the throughput in rows per second and the peak
+memory allocated during a call. Losses and metrics are timed in their steady state: built with
+`cache=True` and called once before timing, as from the second boosting iteration on.
+
+Save a baseline, then compare a later run against it; the comparison fails (exit code 1) if
+any benchmark got slower, or allocates more, by more than the threshold:
+
+```bash
+python benchmarks/run_benchmarks.py --sizes 1e3 1e5 1e7 --output baseline.json
+python benchmarks/run_benchmarks.py --sizes 1e3 1e5 1e7 --compare baseline.json --threshold 0.2
+```
+
+Sizes go up to 1e8 rows, which needs several GB of memory per array in float64.
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from typing import Any, Callable, Optional
+from bokbokbok.eval_metrics.classification import (
+    BestF1ScoreMetric,
+    F1_Score_Binary,
+    PrecisionAtKMetric,
+    QuadraticWeightedKappaMetric,
+    RecallAtPrecisionMetric,
+    WeightedCrossEntropyMetric,
+    WeightedFocalMetric,
+)
+from bokbokbok.eval_metrics.regression import LogCoshMetric, RMSPEMetric
+from bokbokbok.loss_functions.classification import (
+    MulticlassWeightedCrossEntropyLoss,
+    MulticlassWeightedFocalLoss,
+    WeightedCrossEntropyLoss,
+    WeightedFocalLoss,
+)
+from bokbokbok.loss_functions.regression import LogCoshLoss, SPELoss
+from bokbokbok.utils import ArrayDataset, config_context
+from bokbokbok.utils.backends import available_backends
+
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+NUM_CLASS = 5
+
+
+def _binary(n: int, dtype: Any, rng: np.random.Generator) -> tuple[np.ndarray, ArrayDataset]:
+    """Margins and 0 / 1 labels."""
+    y = rng.integers(0, 2, size=n).astype(np.float32)
+    return rng.normal(scale=3, size=n).astype(dtype), ArrayDataset(y)
+
+
+def _probabilities(n: int, dtype: Any, rng: np.random.Generator) -> tuple[np.ndarray, ArrayDataset]:
+    """Probabilities and 0 / 1 labels."""
+    y = rng.integers(0, 2, size=n).astype(np.float32)
+    return rng.uniform(size=n).astype(dtype), ArrayDataset(y)
+
+
+def _regression(n: int, dtype: Any, rng: np.random.Generator) -> tuple[np.ndarray, ArrayDataset]:
+    """Predictions and positive labels."""
+    y = rng.uniform(1, 10, size=n).astype(np.float32)
+    return (y + rng.normal(size=n)).astype(dtype), ArrayDataset(y)
+
+
+def _multiclass(n: int, dtype: Any, rng: np.random.Generator) -> tuple[np.ndarray, ArrayDataset]:
+    """Class-major margins, as LightGBM passes them, and labels 0, ..., NUM_CLASS - 1."""
+    y = rng.integers(0, NUM_CLASS, size=n).astype(np.float32)
+    return rng.normal(size=(NUM_CLASS, n)).astype(dtype).T, ArrayDataset(y)
+
+
+# name: (kind, factory of the loss / metric, data generator)
+CASES: dict[str, tuple[str, Callable[[], Callable], Callable]] = {
+    "WeightedCrossEntropyLoss": ("loss", lambda: WeightedCrossEntropyLoss(alpha=2.0, cache=True), _binary),
+    "WeightedFocalLoss": ("loss", lambda: WeightedFocalLoss(alpha=2.0, gamma=2.0, cache=True), _binary),
+    "LogCoshLoss": ("loss", lambda: LogCoshLoss(cache=True), _regression),
+    "SPELoss": ("loss", lambda: SPELoss(cache=True), _regression),
+    "MulticlassWeightedCrossEntropyLoss": ("loss", lambda: MulticlassWeightedCrossEntropyLoss(cache=True),
+                                           _multiclass),
+    "MulticlassWeightedFocalLoss": ("loss", lambda: MulticlassWeightedFocalLoss(cache=True), _multiclass),
+    "WeightedCrossEntropyMetric": ("metric", lambda: WeightedCrossEntropyMetric(alpha=2.0, cache=True), _binary),
+    "WeightedFocalMetric": ("metric", lambda: WeightedFocalMetric(alpha=2.0, gamma=2.0, cache=True), _binary),
+    "LogCoshMetric": ("metric", lambda: LogCoshMetric(cache=True), _regression),
+    "RMSPEMetric": ("metric", lambda: RMSPEMetric(cache=True), _regression),
+    "F1_Score_Binary": ("metric", lambda: F1_Score_Binary(cache=True), _probabilities),
+    "QuadraticWeightedKappaMetric": ("metric", lambda: QuadraticWeightedKappaMetric(cache=True), _multiclass),
+    "BestF1ScoreMetric": ("metric", lambda: BestF1ScoreMetric(cache=True), _binary),
+    "PrecisionAtKMetric": ("metric", lambda: PrecisionAtKMetric(k=100, cache=True), _binary),
+    "RecallAtPrecisionMetric": ("metric", lambda: RecallAtPrecisionMetric(min_precision=0.5, cache=True), _binary),
+}
+
+
+def run_benchmarks(
+    sizes: Optional[list[int]] = None,
+    dtypes: Optional[list[str]] = None,
+    backends: Optional[list[str]] = None,
+    cases: Optional[list[str]] = None,
+    min_time: float = 0.2,
+    seed: int = 41114,
+    ) -> list[dict[str, Any]]:
+    """
+    Times every combination of case, size, dtype and backend.
+
+    Args:
+        sizes (list): Numbers of rows, defaults to DEFAULT_SIZES
+        dtypes (list): "float32" and / or "float64", defaults to both
+        backends (list): Kernel backends, defaults to all available ones
+        cases (list): Names of the cases in CASES to run, defaults to all
+        min_time (float): Minimum total time in seconds to spend timing each benchmark
+        seed (int): Seed of the random data
+
+    Returns:
+        One record per benchmark, with the best time per call in seconds, the throughput
+        in rows per second and the peak memory allocated during a call in bytes
+    """
+    results = []
+    for name in cases or list(CASES):
+        kind, factory, make_data = CASES[name]
+        for n in sizes or DEFAULT_SIZES:
+            for dtype in dtypes or ["float32", "float64"]:
+                yhat, dataset = make_data(n, dtype, np.random.default_rng(seed))
+                for backend in backends or available_backends():
+                    with config_context(dtype=np.dtype(dtype).type, backend=backend):
+                        seconds, peak = _measure(factory(), yhat, dataset, min_time)
+                    results.append({
+                        "case": name,
+                        "kind": kind,
+                        "n": n,
+                        "dtype": dtype,
+                        "backend": backend,
+                        "seconds": seconds,
+                        "rows_per_second": n / seconds,
+                        "peak_bytes": peak,
+                    })
+    return results
+
+
+def compare(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    threshold: float = 0.2,
+    ) -> list[str]:
+    """
+    Finds the benchmarks that regressed against a baseline.
+
+    Args:
+        results (list): Output of run_benchmarks
+        baseline (list): Earlier output of run_benchmarks
+        threshold (float): Relative increase of time or peak memory tolerated
+
+    Returns:
+        A description of every regression, empty if there are none
+    """
+    baseline_by_key = {_key(record): record for record in baseline}
+    regressions = []
+    for record in results:
+        before = baseline_by_key.get(_key(record))
+        if before is None:
+            continue
+        label = "{case} n={n} {dtype} {backend}".format(**record)
+        if record["seconds"] > before["seconds"] * (1 + threshold):
+            regressions.append(f"{label}: {before['seconds']:.3g}s -> {record['seconds']:.3g}s")
+        # Small allocations vary a little between runs
+        if record["peak_bytes"] > before["peak_bytes"] * (1 + threshold) + 2 ** 16:
+            regressions.append(f"{label}: {before['peak_bytes']} -> {record['peak_bytes']} bytes peak memory")
+    return regressions
+
+
+def _measure(func: Callable, yhat: np.ndarray, dataset: ArrayDataset, min_time: float) -> tuple[float, int]:
+    """Best time per call, after a warm-up call, and peak memory allocated during a call."""
+    func(yhat, dataset)
+
+    tracemalloc.start()
+    try:
+        func(yhat, dataset)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    best, total, calls = float("inf"), 0., 0
+    while calls < 3 or total < min_time:
+        start = time.perf_counter()
+        func(yhat, dataset)
+        elapsed = time.perf_counter() - start
+        best, total, calls = min(best, elapsed), total + elapsed, calls + 1
+    return best, peak
+
+
+def _key(record: dict[str, Any]) -> tuple:
+    """What identifies a benchmark across runs."""
+    return record["case"], record["n"], record["dtype"], record["backend"]
+
+
+def _print_table(results: list[dict[str, Any]]) -> None:
+    """Prints the results, one benchmark per line."""
+    print(f"{'case':<36}{'n':>11} {'dtype':<8}{'backend':<8}{'time (s)':>11}{'rows/s':>11}{'peak MiB':>10}")
+    for record in results:
+        print(f"{record['case']:<36}{record['n']:>11} {record['dtype']:<8}{record['backend']:<8}"
+              f"{record['seconds']:>11.3g}{record['rows_per_second']:>11.3g}{record['peak_bytes'] / 2 ** 20:>10.1f}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=float, help="Numbers of rows, e.g. 1e3 1e6")
+    parser.add_argument("--dtypes", nargs="+", choices=["float32", "float64"])
+    parser.add_argument("--backends", nargs="+", choices=available_backends())
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), metavar="CASE")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to spend timing each benchmark")
+    parser.add_argument("--output", help="Save the results to this JSON file")
+    parser.add_argument("--compare", help="Fail if slower or larger than the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Tolerated relative regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(sizes=[int(n) for n in args.sizes] if args.sizes else None,
+                             dtypes=args.dtypes,
+                             backends=args.backends,
+                             cases=args.cases,
+                             min_time=args.min_time)
+    _print_table(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
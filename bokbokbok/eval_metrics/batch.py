@@ -0,0 +1,121 @@
+"""
+Scoring the predictions of many models against the same validation set, in a process pool.
+
+The labels (and sample weights) are written once to `.npy` files, unless they are given as such,
+and every worker memory-maps them, so they are shared through the page cache instead of being
+pickled to each worker. Predictions given as `.npy` files are memory-mapped by the worker scoring
+them as well; only their paths travel between processes.
+
+Metrics are given as their factories (or `functools.partial`s of them), since the closures they
+return cannot be pickled. Each worker builds them once with `cache=True`, so the label terms are
+cached across all the models it scores:
+
+```python
+records = score_predictions(
+    metrics=[RMSPEMetric, LogCoshMetric],
+    predictions={"model_1": "preds/model_1.npy", "model_2": "preds/model_2.npy"},
+    labels="valid/labels.npy",
+    n_jobs=8,
+)
+pandas.DataFrame(records).pivot(index="model", columns="metric", values="value")
+```
+"""
+import os
+import pathlib
+import tempfile
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Mapping, Optional, Sequence, Union
+from bokbokbok.utils.datasets import ArrayDataset
+
+PathOrArray = Union[str, os.PathLike, np.ndarray]
+
+# Dataset and metrics of the current worker, set by _init_worker
+_worker: dict[str, Any] = {}
+
+
+def score_predictions(
+    metrics: Sequence[Callable[..., Callable]],
+    predictions: Union[Mapping[str, PathOrArray], Sequence[PathOrArray]],
+    labels: PathOrArray,
+    weight: Optional[PathOrArray] = None,
+    n_jobs: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+    """
+    Computes every metric for the predictions of every model.
+
+    Args:
+        metrics: Factories of the eval metrics, e.g. RMSPEMetric or functools.partial(WeightedFocalMetric, gamma=1.0).
+                 They are called with cache=True
+        predictions: Predictions of every model, as `.npy` files or arrays, keyed by model name.
+                     If a sequence, the models are named after the files (or numbered, for arrays)
+        labels: Labels of the validation set, as a `.npy` file or an array
+        weight: Optional sample weights of the validation set, as a `.npy` file or an array
+        n_jobs (int): Number of worker processes, defaults to the number of CPUs.
+                      With n_jobs=1 everything is scored in the calling process
+
+    Returns:
+        One record per model and metric, with the model name, the metric name and its value,
+        in the order of the predictions and metrics
+    """
+    if not isinstance(predictions, Mapping):
+        predictions = {_model_name(i, prediction): prediction for i, prediction in enumerate(predictions)}
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        label_path = _npy_path(labels, directory, "labels")
+        weight_path = None if weight is None else _npy_path(weight, directory, "weight")
+
+        if n_jobs == 1:
+            _init_worker(label_path, weight_path, metrics)
+            try:
+                return [record for item in predictions.items() for record in _score(item)]
+            finally:
+                _worker.clear()
+
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(label_path, weight_path, metrics)) as executor:
+            chunksize = max(1, len(predictions) // (4 * n_jobs))
+            results = executor.map(_score, predictions.items(), chunksize=chunksize)
+            return [record for records in results for record in records]
+
+
+def _init_worker(label_path: str, weight_path: Optional[str], metrics: Sequence[Callable[..., Callable]]) -> None:
+    """Memory-maps the validation set and builds the metrics, once per worker."""
+    weight = None if weight_path is None else np.load(weight_path, mmap_mode="r")
+    _worker["dataset"] = ArrayDataset(np.load(label_path, mmap_mode="r"), weight)
+    # The labels are the same for every model, so they can safely be cached
+    _worker["metrics"] = [factory(cache=True) for factory in metrics]
+
+
+def _score(item: tuple[str, PathOrArray]) -> list[dict[str, Any]]:
+    """Records of every metric for the predictions of one model."""
+    model, prediction = item
+    yhat = np.load(prediction, mmap_mode="r") if _is_path(prediction) else prediction
+    records = []
+    for metric in _worker["metrics"]:
+        result = metric(yhat, _worker["dataset"])
+        records.append({"model": model, "metric": result[0], "value": result[1]})
+    return records
+
+
+def _npy_path(values: PathOrArray, directory: str, name: str) -> str:
+    """Path of a `.npy` file holding the values, written to directory unless they are one already."""
+    if _is_path(values):
+        return os.fspath(values)
+    path = os.path.join(directory, f"{name}.npy")
+    # Floats as the metrics use them, so that the memory map needs no conversion
+    values = np.asarray(values)
+    np.save(path, values if np.issubdtype(values.dtype, np.floating) else values.astype(np.float64))
+    return path
+
+
+def _model_name(index: int, prediction: PathOrArray) -> str:
+    """Name of an unnamed model: its file name without extension, else its index."""
+    return pathlib.Path(prediction).stem if _is_path(prediction) else str(index)
+
+
+def _is_path(values: Any) -> bool:
+    """Whether values are given as a path to a file."""
+    return isinstance(values, (str, os.PathLike))
@@ -1,19 +1,55 @@
-"""Import required metrics."""
+"""
+Import required metrics.
 
+The metrics are imported from their modules on first access, see bokbokbok.utils.lazy.
+"""
+from typing import TYPE_CHECKING
+from bokbokbok.utils.lazy import lazy_attributes
 
-from .binary_eval_metrics import (
-    WeightedCrossEntropyMetric,
-    WeightedFocalMetric,
-    F1_Score_Binary,
-)
+if TYPE_CHECKING:
+    from .binary_eval_metrics import (
+        WeightedCrossEntropyMetric,
+        WeightedFocalMetric,
+        F1_Score_Binary,
+    )
 
-from .multiclass_eval_metrics import (
-    QuadraticWeightedKappaMetric,
-)
+    from .multiclass_eval_metrics import (
+        QuadraticWeightedKappaMetric,
+    )
+
+    from .threshold_eval_metrics import (
+        BestF1ScoreMetric,
+        PrecisionAtKMetric,
+        RecallAtPrecisionMetric,
+    )
+
+    from .sweep_eval_metrics import (
+        weighted_cross_entropy_sweep,
+        weighted_focal_sweep,
+    )
+
+_modules = {
+    "WeightedCrossEntropyMetric": "binary_eval_metrics",
+    "WeightedFocalMetric": "binary_eval_metrics",
+    "F1_Score_Binary": "binary_eval_metrics",
+    "QuadraticWeightedKappaMetric": "multiclass_eval_metrics",
+    "BestF1ScoreMetric": "threshold_eval_metrics",
+    "PrecisionAtKMetric": "threshold_eval_metrics",
+    "RecallAtPrecisionMetric": "threshold_eval_metrics",
+    "weighted_cross_entropy_sweep": "sweep_eval_metrics",
+    "weighted_focal_sweep": "sweep_eval_metrics",
+}
 
 __all__ = [
     "WeightedCrossEntropyMetric",
     "WeightedFocalMetric",
     "F1_Score_Binary",
     "QuadraticWeightedKappaMetric",
-]
\ No newline at end of file
+    "BestF1ScoreMetric",
+    "PrecisionAtKMetric",
+    "RecallAtPrecisionMetric",
+    "weighted_cross_entropy_sweep",
+    "weighted_focal_sweep",
+]
+
+__getattr__, __dir__ = lazy_attributes(__name__, _modules)
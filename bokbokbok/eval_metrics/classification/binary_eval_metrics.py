@@ -1,13 +1,24 @@
 import numpy as np
-from sklearn.metrics import f1_score
-from bokbokbok.utils import clip_sigmoid
+from bokbokbok.utils.cache import DatasetCache, dataset_entry
+from bokbokbok.utils.datasets import eval_result
+from bokbokbok.utils.engine import compute_mean
+from bokbokbok.utils.kernels import (
+    binary_confusion_counts,
+    binary_labels,
+    f1_from_counts,
+    focal_elements,
+    weighted_cross_entropy_elements,
+)
+from bokbokbok.utils.profiling import profiled
 from typing import Any, Callable, TYPE_CHECKING, Union
 
 if TYPE_CHECKING:
     import xgboost as xgb
+@profiled
 def WeightedCrossEntropyMetric(
     alpha: float = 0.5, 
-    XGBoost: bool = False
+    XGBoost: bool = False,
+    cache: bool = False,
     ) -> Callable:
     """
     Calculates the Weighted Cross Entropy Metric by applying a weighting factor alpha, allowing one to
@@ -21,9 +32,11 @@ def WeightedCrossEntropyMetric(
         alpha (float): The scale to be applied.
         XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
                         Note that you should also set `maximize=False` in the XGBoost train function
+        cache (Bool): Set to True to keep the labels, weights and label terms of each dataset
+                      between evaluations. Labels changed in between (e.g. with `set_label`) are then not seen.
 
     """
-
+    dataset_cache = DatasetCache() if cache else None
 
     def weighted_cross_entropy_metric(
         yhat: np.ndarray, 
@@ -44,21 +57,18 @@ def WeightedCrossEntropyMetric(
             Name of the eval metric, Eval score, Bool to minimise function
 
         """
-        y = dtrain.get_label()
-        yhat = clip_sigmoid(yhat)
-        elements = - alpha * y * np.log(yhat) - (1 - y) * np.log(1 - yhat)
-        if XGBoost:
-            return f"WCE_alpha{alpha}", (np.sum(elements) / len(y))
-        else:
-            return f"WCE_alpha{alpha}", (np.sum(elements) / len(y)), False
+        score = compute_mean(weighted_cross_entropy_elements, yhat, dtrain, dataset_cache, alpha=alpha)
+        return eval_result(f"WCE_alpha{alpha}", score, False, XGBoost)
 
     return weighted_cross_entropy_metric
 
 
+@profiled
 def WeightedFocalMetric(
     alpha: float = 1.0, 
     gamma: float = 2.0, 
-    XGBoost: bool = False
+    XGBoost: bool = False,
+    cache: bool = False,
     ) -> Callable:
     """
     Implements [alpha-weighted Focal Loss](https://arxiv.org/pdf/1708.02002.pdf)
@@ -73,7 +83,10 @@ def WeightedFocalMetric(
         gamma (float): The focusing parameter to be applied
         XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
                         Note that you should also set `maximize=False` in the XGBoost train function
+        cache (Bool): Set to True to keep the labels, weights and label terms of each dataset
+                      between evaluations. Labels changed in between (e.g. with `set_label`) are then not seen.
     """
+    dataset_cache = DatasetCache() if cache else None
 
     def focal_metric(
         yhat: np.ndarray, 
@@ -95,35 +108,42 @@ def WeightedFocalMetric(
             Name of the eval metric, Eval score, Bool to minimise function
 
         """
-        y = dtrain.get_label()
-        yhat = clip_sigmoid(yhat)
+        score = compute_mean(focal_elements, yhat, dtrain, dataset_cache, alpha=alpha, gamma=gamma)
 
-        elements = (- alpha * y * np.log(yhat) * np.power(1 - yhat, gamma) -
-                    (1 - y) * np.log(1 - yhat) * np.power(yhat, gamma))
-
-        if XGBoost:
-            return f'Focal_alpha{alpha}_gamma{gamma}', (np.sum(elements) / len(y))
-        else:
-            return f'Focal_alpha{alpha}_gamma{gamma}', (np.sum(elements) / len(y)), False
+        return eval_result(f'Focal_alpha{alpha}_gamma{gamma}', score, False, XGBoost)
 
     return focal_metric
 
 
+@profiled
 def F1_Score_Binary(
     XGBoost: bool = False,
     *args: Any, 
+    cache: bool = False,
     **kwargs: Any,
     ) -> Callable:
     """
     Implements the f1_score metric
     [from scikit learn](https://scikit-learn.org/stable/modules/generated/sklearn.metrics.f1_score.html#sklearn-metrics-f1-score)
 
+    Predictions are rounded to 0 / 1. If the labels are 0 / 1 and only the `average`, `pos_label`
+    and `zero_division` keyword arguments are used, the score is computed natively from a single
+    bincount, validating the labels of each dataset only once with cache=True. Otherwise the call
+    is handed over to scikit learn.
+
     Args:
         *args: The arguments to be fed into the scikit learn metric.
         XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
                         Note that you should also set `maximize=True` in the XGBoost train function
+        cache (Bool): Set to True to keep the labels, weights and label terms of each dataset
+                      between evaluations. Labels changed in between (e.g. with `set_label`) are then not seen.
 
     """
+    native = not args and set(kwargs) <= {"average", "pos_label", "zero_division"}
+    if native and kwargs.get("pos_label", 1) not in (0, 1):
+        native = False
+    dataset_cache = DatasetCache() if cache else None
+
     def binary_f1_score(
         yhat: np.ndarray, 
         data: "xgb.DMatrix", 
@@ -140,11 +160,17 @@ def F1_Score_Binary(
         Returns:
             Name of the eval metric, Eval score, Bool to maximise function
         """
-        y_true = data.get_label()
-        yhat = np.round(yhat)
-        if XGBoost:
-            return "F1", f1_score(y_true, yhat, *args, **kwargs)
+        entry = dataset_entry(data, dataset_cache)
+        y = entry.terms(binary_labels, np.float64) if native else None
+        if y is not None:
+            # np.round rounds 0.5 down, like this comparison
+            counts = binary_confusion_counts(np.asarray(yhat) > 0.5, y, entry.weight)
+            score = f1_from_counts(counts, **kwargs)
         else:
-            return "F1", f1_score(y_true, yhat, *args, **kwargs), True
+            # Imported here, scikit-learn takes longer to import than the rest of the package
+            from sklearn.metrics import f1_score
+            score = f1_score(entry.label, np.round(yhat), *args, **{"sample_weight": entry.weight, **kwargs})
+
+        return eval_result("F1", score, True, XGBoost)
 
     return binary_f1_score
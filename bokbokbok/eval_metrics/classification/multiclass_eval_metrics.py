@@ -1,33 +1,43 @@
-from sklearn.metrics import cohen_kappa_score
 import numpy as np
+from bokbokbok.utils.cache import DatasetCache, dataset_entry
+from bokbokbok.utils.datasets import eval_result
+from bokbokbok.utils.layout import argmax_classes, as_matrix
+from bokbokbok.utils.kernels import (
+    confusion_matrix_counts,
+    multiclass_labels,
+    quadratic_weighted_kappa_from_confusion,
+)
+from bokbokbok.utils.profiling import profiled
 from typing import Callable, TYPE_CHECKING, Union
 
 if TYPE_CHECKING:
     import xgboost as xgb
 
-def QuadraticWeightedKappaMetric(XGBoost: bool = False) -> Callable:
+@profiled
+def QuadraticWeightedKappaMetric(XGBoost: bool = False, cache: bool = False) -> Callable:
     """
-    Calculates the Weighted Cross Entropy Metric by applying a weighting factor alpha, allowing one to
-    trade off recall and precision by up- or down-weighting the cost of a positive error relative to a
-    negative error.
+    Calculates the [Quadratic Weighted Kappa](https://www.kaggle.com/c/prudential-life-insurance-assessment/overview/evaluation)
+    between the labels and the most likely class of the predictions.
 
-    A value alpha > 1 decreases the false negative count, hence increasing the recall.
-    Conversely, setting alpha < 1 decreases the false positive count and increases the precision. 
+    If the labels are the integers 0, ..., num_class - 1, the number of classes and the label histogram
+    of each dataset are computed (only once with cache=True), and the score is computed natively from
+    a confusion matrix built with a single bincount. Otherwise the call is handed over to scikit learn's cohen_kappa_score.
 
     Args:
-        alpha (float): The scale to be applied.
         XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
-                        Note that you should also set `maximize=False` in the XGBoost train function
+                        Note that you should also set `maximize=True` in the XGBoost train function
+        cache (Bool): Set to True to keep the labels, weights and label terms of each dataset
+                      between evaluations. Labels changed in between (e.g. with `set_label`) are then not seen.
 
     """
-
+    dataset_cache = DatasetCache() if cache else None
 
     def quadratic_weighted_kappa_metric(
         yhat: np.ndarray,
         dtrain: "xgb.DMatrix", 
         XGBoost: bool = XGBoost) -> Union[tuple[str, float], tuple[str, float, bool]]:
         """
-        Weighted Cross Entropy Metric.
+        Quadratic Weighted Kappa Metric.
 
         Args:
             yhat: Predictions
@@ -38,19 +48,26 @@ def QuadraticWeightedKappaMetric(XGBoost: bool = False) -> Callable:
             Name of the eval metric, Eval score, Bool to maximise function
 
         """
-        y = dtrain.get_label()
-        num_class = len(np.unique(dtrain.get_label()))
-
-        if not XGBoost:
-            # LightGBM needs extra reshaping
-            yhat = yhat.reshape(num_class, len(y)).T
-        yhat = yhat.argmax(axis=1)
+        entry = dataset_entry(dtrain, dataset_cache)
+        labels = entry.terms(multiclass_labels, np.float64)
+        if labels is None:
+            y = entry.label
+            num_class = len(np.unique(y))
+        else:
+            y, num_class, histogram = labels
 
-        qwk = cohen_kappa_score(y, yhat, weights="quadratic")
+        # LightGBM passes the classes one after the other, XGBoost the samples
+        yhat = argmax_classes(as_matrix(yhat, len(y), class_major=not XGBoost))
 
-        if XGBoost:
-            return "QWK", qwk
+        if labels is None or yhat.max() >= num_class:
+            # Imported here, scikit-learn takes longer to import than the rest of the package
+            from sklearn.metrics import cohen_kappa_score
+            qwk = cohen_kappa_score(y, yhat, weights="quadratic", sample_weight=entry.weight)
         else:
-            return "QWK", qwk, True
+            confusion = confusion_matrix_counts(yhat, y, num_class, entry.weight)
+            # The cached label histogram counts rows, not weights
+            qwk = quadratic_weighted_kappa_from_confusion(confusion, histogram if entry.weight is None else None)
+
+        return eval_result("QWK", qwk, True, XGBoost)
 
     return quadratic_weighted_kappa_metric
@@ -0,0 +1,60 @@
+"""
+Weighted Cross Entropy and Weighted Focal Metric for a whole grid of alpha / gamma values at once,
+for hyperparameter sweeps over the same predictions.
+
+Both metrics are linear in alpha, so the predictions only need to be processed once per gamma
+(and once in total for the Weighted Cross Entropy Metric), whatever the number of alphas.
+"""
+import numpy as np
+from bokbokbok.utils.engine import compute_sum
+from bokbokbok.utils.kernels import focal_sweep_elements
+from typing import Optional, Sequence, Union
+
+
+def weighted_cross_entropy_sweep(
+    yhat: np.ndarray,
+    y: np.ndarray,
+    alphas: Union[Sequence[float], np.ndarray],
+    weight: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+    """
+    WeightedCrossEntropyMetric for every alpha.
+
+    Args:
+        yhat (np.array): Margin predictions
+        y (np.array): Labels
+        alphas: The scales to be applied
+        weight (np.array): Optional sample weights
+
+    Returns:
+        Array of shape (len(alphas),) with the eval score of every alpha
+    """
+    return weighted_focal_sweep(yhat, y, alphas, [0.], weight)[:, 0]
+
+
+def weighted_focal_sweep(
+    yhat: np.ndarray,
+    y: np.ndarray,
+    alphas: Union[Sequence[float], np.ndarray],
+    gammas: Union[Sequence[float], np.ndarray],
+    weight: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+    """
+    WeightedFocalMetric for every combination of alpha and gamma.
+
+    Args:
+        yhat (np.array): Margin predictions
+        y (np.array): Labels
+        alphas: The scales to be applied
+        gammas: The focusing parameters to be applied
+        weight (np.array): Optional sample weights
+
+    Returns:
+        Array of shape (len(alphas), len(gammas)) with the eval score of every combination
+    """
+    alphas = np.asarray(alphas, dtype=np.float64)
+    gammas = np.asarray(gammas, dtype=np.float64)
+    sums = compute_sum(focal_sweep_elements, yhat, y, weight, gammas=gammas)
+    pos, neg = sums[:len(gammas)], sums[len(gammas):]
+    total_weight = len(y) if weight is None else np.sum(weight, dtype=np.float64)
+    return (- np.outer(alphas, pos) - neg) / total_weight
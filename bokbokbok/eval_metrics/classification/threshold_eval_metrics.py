@@ -0,0 +1,138 @@
+import numpy as np
+from bokbokbok.utils.cache import DatasetCache, dataset_entry
+from bokbokbok.utils.datasets import eval_result
+from bokbokbok.utils.kernels import (
+    best_f1_from_counts,
+    binary_labels,
+    binary_threshold_counts,
+    precision_at_k_from_counts,
+    recall_at_precision_from_counts,
+)
+from bokbokbok.utils.profiling import profiled
+from typing import Callable, Optional, TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    import xgboost as xgb
+
+
+def _threshold_metric(
+    name: str,
+    from_counts: Callable,
+    bins: Optional[int],
+    XGBoost: bool,
+    cache: bool,
+    **params: float,
+    ) -> Callable:
+    """
+    Builds an eval metric computed from the true / false positive counts at every threshold.
+
+    Args:
+        name (str): Name of the eval metric
+        from_counts: Function of the counts returning the score
+        bins (int): Optional number of bins to bucket the scores into instead of sorting them
+        XGBoost (Bool): If XGBoost is to be implemented
+        cache (Bool): Keep the labels of each dataset between evaluations
+        **params: Parameters passed to from_counts
+
+    Returns:
+        The eval metric
+    """
+    dataset_cache = DatasetCache() if cache else None
+
+    def threshold_metric(
+        yhat: np.ndarray,
+        dtrain: "xgb.DMatrix",
+        XGBoost: bool = XGBoost
+        ) -> Union[tuple[str, float], tuple[str, float, bool]]:
+        """
+        Threshold-based metric.
+
+        Args:
+            yhat: Predictions
+            dtrain: The XGBoost / LightGBM dataset
+            XGBoost (Bool): If XGBoost is to be implemented
+
+        Returns:
+            Name of the eval metric, Eval score, Bool to maximise function
+        """
+        entry = dataset_entry(dtrain, dataset_cache)
+        y = entry.terms(binary_labels, np.float64)
+        if y is None:
+            raise ValueError(f"{name} requires labels that are all 0 or 1")
+        tps, fps = binary_threshold_counts(np.asarray(yhat), y, bins=bins, weight=entry.weight)
+        score = from_counts(tps, fps, **params)
+
+        return eval_result(name, score, True, XGBoost)
+
+    return threshold_metric
+
+
+@profiled
+def BestF1ScoreMetric(bins: Optional[int] = None, XGBoost: bool = False, cache: bool = False) -> Callable:
+    """
+    Calculates the F1 score at the best decision threshold, instead of at a fixed threshold of 0.5.
+
+    The scores are sorted once and the true / false positives at every threshold are obtained
+    from cumulative sums, so all thresholds are evaluated in a single pass. As only the ranking
+    matters, both margins and probabilities can be used.
+
+    Args:
+        bins (int): Bucket the scores into this many equal-width bins instead of sorting them.
+                    Faster on large datasets, but only the bin edges are tried as thresholds.
+        XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
+                        Note that you should also set `maximize=True` in the XGBoost train function
+        cache (Bool): Set to True to keep the labels, weights and label terms of each dataset
+                      between evaluations. Labels changed in between (e.g. with `set_label`) are then not seen.
+
+    """
+    return _threshold_metric("BestF1", best_f1_from_counts, bins, XGBoost, cache)
+
+
+@profiled
+def PrecisionAtKMetric(k: int, bins: Optional[int] = None, XGBoost: bool = False, cache: bool = False) -> Callable:
+    """
+    Calculates the precision among the k highest scored rows, at the highest threshold
+    selecting at least k rows.
+
+    Args:
+        k (int): Number of rows, or total sample weight if the dataset is weighted
+        bins (int): Bucket the scores into this many equal-width bins instead of sorting them.
+                    Faster on large datasets, but only the bin edges are tried as thresholds.
+        XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
+                        Note that you should also set `maximize=True` in the XGBoost train function
+        cache (Bool): Set to True to keep the labels, weights and label terms of each dataset
+                      between evaluations. Labels changed in between (e.g. with `set_label`) are then not seen.
+
+    """
+    if k < 1:
+        raise ValueError(f"k must be at least 1, got {k}")
+    return _threshold_metric(f"Precision@{k}", precision_at_k_from_counts, bins, XGBoost, cache, k=k)
+
+
+@profiled
+def RecallAtPrecisionMetric(
+    min_precision: float,
+    bins: Optional[int] = None,
+    XGBoost: bool = False,
+    cache: bool = False,
+    ) -> Callable:
+    """
+    Calculates the highest recall over the thresholds whose precision is at least min_precision,
+    0 if none reaches it.
+
+    Args:
+        min_precision (float): Required precision
+        bins (int): Bucket the scores into this many equal-width bins instead of sorting them.
+                    Faster on large datasets, but only the bin edges are tried as thresholds.
+        XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
+                        Note that you should also set `maximize=True` in the XGBoost train function
+        cache (Bool): Set to True to keep the labels, weights and label terms of each dataset
+                      between evaluations. Labels changed in between (e.g. with `set_label`) are then not seen.
+
+    """
+    return _threshold_metric(f"Recall@Precision{min_precision}",
+                             recall_at_precision_from_counts,
+                             bins,
+                             XGBoost,
+                             cache,
+                             min_precision=min_precision)
@@ -0,0 +1,94 @@
+"""
+Eval metrics over data split into partitions held by different workers, as with LightGBM's Dask
+interface or Ray.
+
+Metrics cannot be averaged across partitions: the partitions differ in size, and F1 or Quadratic
+Weighted Kappa are not means at all. Instead every worker reduces its partition to the sufficient
+statistics of the metric, i.e. an accumulator from bokbokbok.eval_metrics.streaming holding a few
+sums and counts or a confusion matrix, and the reduce step merges those into the exact global
+value. Only the statistics travel between processes, never the data.
+
+The losses need nothing of the sort: gradients and hessians are computed row by row, so each
+worker computes those of its own partition.
+
+Any map function can run the partitions, e.g. a multiprocessing pool, or a Dask client with
+`lambda func, partitions: client.gather(client.map(func, partitions))`:
+
+```python
+with multiprocessing.Pool() as pool:
+    score = evaluate_partitions(F1Accumulator(), [(y_1, yhat_1), (y_2, yhat_2)], map_func=pool.map)
+```
+"""
+import copy
+import functools
+import numpy as np
+from bokbokbok.eval_metrics.streaming import MetricAccumulator
+from typing import Any, Callable, Iterable, Optional
+
+
+def partition_statistics(
+    accumulator: MetricAccumulator,
+    y: np.ndarray,
+    yhat: np.ndarray,
+    weight: Optional[np.ndarray] = None,
+    ) -> MetricAccumulator:
+    """
+    The partition-level step: sufficient statistics of a metric over one partition.
+
+    Args:
+        accumulator: Empty accumulator of the metric, left untouched
+        y (np.array): Labels of the partition
+        yhat (np.array): Predictions of the partition
+        weight (np.array): Optional sample weights of the partition
+
+    Returns:
+        A new accumulator holding the statistics of the partition
+    """
+    return copy.deepcopy(accumulator).update(y, yhat, weight)
+
+
+def reduce_statistics(statistics: Iterable[MetricAccumulator]) -> MetricAccumulator:
+    """
+    The reduce step: combines the statistics of all partitions.
+
+    Args:
+        statistics: Outputs of partition_statistics, one per partition
+
+    Returns:
+        A new accumulator holding the statistics of all partitions, whose result() is the global metric
+    """
+    statistics = iter(statistics)
+    try:
+        total = copy.deepcopy(next(statistics))
+    except StopIteration:
+        raise ValueError("Got no partitions to reduce") from None
+    for other in statistics:
+        total.merge(other)
+    return total
+
+
+def evaluate_partitions(
+    accumulator: MetricAccumulator,
+    partitions: Iterable[tuple[np.ndarray, ...]],
+    map_func: Callable = map,
+    ) -> Any:
+    """
+    Computes a metric over partitioned data: partition_statistics on every partition through
+    map_func, then reduce_statistics.
+
+    Args:
+        accumulator: Empty accumulator of the metric
+        partitions: (y, yhat) or (y, yhat, weight) of every partition
+        map_func: Function applying a function to every partition, like the builtin map (default),
+                  multiprocessing.Pool.map or concurrent.futures.Executor.map
+
+    Returns:
+        Eval score over all partitions
+    """
+    statistics = map_func(functools.partial(_partition_statistics, accumulator), partitions)
+    return reduce_statistics(statistics).result()
+
+
+def _partition_statistics(accumulator: MetricAccumulator, partition: tuple[np.ndarray, ...]) -> MetricAccumulator:
+    """partition_statistics taking the partition as a single tuple, for map functions."""
+    return partition_statistics(accumulator, *partition)
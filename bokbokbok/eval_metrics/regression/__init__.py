@@ -1,12 +1,25 @@
-"""Import required metrics."""
+"""
+Import required metrics.
 
+The metrics are imported from their modules on first access, see bokbokbok.utils.lazy.
+"""
+from typing import TYPE_CHECKING
+from bokbokbok.utils.lazy import lazy_attributes
 
-from .regression_eval_metrics import (
-    LogCoshMetric,
-    RMSPEMetric,
-)
+if TYPE_CHECKING:
+    from .regression_eval_metrics import (
+        LogCoshMetric,
+        RMSPEMetric,
+    )
+
+_modules = {
+    "LogCoshMetric": "regression_eval_metrics",
+    "RMSPEMetric": "regression_eval_metrics",
+}
 
 __all__ = [
     "LogCoshMetric",
     "RMSPEMetric",
 ]
+
+__getattr__, __dir__ = lazy_attributes(__name__, _modules)
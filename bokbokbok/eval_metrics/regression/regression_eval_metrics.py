@@ -1,19 +1,29 @@
 import numpy as np
+from bokbokbok.utils.cache import DatasetCache
+from bokbokbok.utils.datasets import eval_result
+from bokbokbok.utils.engine import compute_mean
+from bokbokbok.utils.kernels import log_cosh_elements, percentage_terms, squared_percentage_elements
+from bokbokbok.utils.profiling import profiled
 
-from typing import Callable, TYPE_CHECKING, Union
+from typing import Callable, Optional, TYPE_CHECKING, Union
 
 if TYPE_CHECKING:
     import xgboost as xgb
 
-def LogCoshMetric(XGBoost: bool = False) -> Callable:
+@profiled
+def LogCoshMetric(XGBoost: bool = False, cache: bool = False) -> Callable:
     """
     Calculates the [Log Cosh Error](https://openreview.net/pdf?id=rkglvsC9Ym) as an alternative to
     Mean Absolute Error.
     Args:
         XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
                         Note that you should also set `maximize=False` in the XGBoost train function
+        cache (Bool): Set to True to keep the labels, weights and label terms of each dataset
+                      between evaluations. Labels changed in between (e.g. with `set_label`) are then not seen.
 
     """
+    dataset_cache = DatasetCache() if cache else None
+
     def log_cosh_error(
         yhat: np.ndarray, 
         dtrain: "xgb.DMatrix", 
@@ -28,17 +38,14 @@ def LogCoshMetric(XGBoost: bool = False) -> Callable:
         XGBoost (Bool): If XGBoost is to be implemented
         """
 
-        y = dtrain.get_label()
-        elements = np.log(np.cosh(yhat - y))
-        if XGBoost:
-            return "LogCosh", float(np.sum(elements) / len(y))
-        else:
-            return "LogCosh", float(np.sum(elements) / len(y)), False
+        score = compute_mean(log_cosh_elements, yhat, dtrain, dataset_cache)
+        return eval_result("LogCosh", score, False, XGBoost)
 
     return log_cosh_error
 
 
-def RMSPEMetric(XGBoost: bool = False) -> Callable:
+@profiled
+def RMSPEMetric(XGBoost: bool = False, epsilon: Optional[float] = None, cache: bool = False) -> Callable:
     """
     Calculates the Root Mean Squared Percentage Error:
     https://www.kaggle.com/c/optiver-realized-volatility-prediction/overview/evaluation
@@ -47,8 +54,15 @@ def RMSPEMetric(XGBoost: bool = False) -> Callable:
     Args:
         XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
                         Note that you should also set `maximize=False` in the XGBoost train function
+        epsilon (float): Lower bound of |y| in the denominators. By default labels that are zero
+                         or too close to zero to divide by raise a ValueError
+        cache (Bool): Set to True to keep the labels, weights and label terms of each dataset
+                      between evaluations. Labels changed in between (e.g. with `set_label`) are then not seen.
 
     """
+    # With cache=True, keeps 1 / y of each dataset, so that the labels are only divided by once
+    dataset_cache = DatasetCache() if cache else None
+
     def RMSPE(
         yhat: np.ndarray, 
         dtrain: "xgb.DMatrix", 
@@ -62,11 +76,9 @@ def RMSPEMetric(XGBoost: bool = False) -> Callable:
         XGBoost (Bool): If XGBoost is to be implemented
         """
 
-        y = dtrain.get_label()
-        elements = ((y - yhat) / y) ** 2
-        if XGBoost:
-            return "RMSPE", float(np.sqrt(np.sum(elements) / len(y)))
-        else:
-            return "RMSPE", float(np.sqrt(np.sum(elements) / len(y))), False
+        mean = compute_mean(squared_percentage_elements, yhat, dtrain, dataset_cache,
+                            terms_func=percentage_terms, terms_params={"epsilon": epsilon})
+        score = float(np.sqrt(mean))
+        return eval_result("RMSPE", score, False, XGBoost)
 
     return RMSPE
\ No newline at end of file
@@ -0,0 +1,257 @@
+"""
+Streaming versions of the eval metrics, for validation sets that do not fit in memory.
+
+Each accumulator is fed the validation set chunk by chunk with `update(y, yhat[, weight])`, and `result()`
+gives the same value as the corresponding eval metric on the full arrays. The state of an
+accumulator is a handful of sums or counts, so accumulators filled in different processes
+can be combined with `merge(other)`:
+
+```python
+acc = RMSPEAccumulator()
+for start in range(0, len(y), chunk_size):
+    acc.update(y[start:start + chunk_size], yhat[start:start + chunk_size])
+acc.result()
+```
+"""
+import abc
+import numpy as np
+from bokbokbok.utils.config import get_config
+from bokbokbok.utils.engine import compute_sum
+from bokbokbok.utils.layout import argmax_classes
+from bokbokbok.utils.kernels import (
+    binary_confusion_counts,
+    binary_labels,
+    confusion_matrix_counts,
+    f1_from_counts,
+    focal_elements,
+    log_cosh_elements,
+    percentage_terms,
+    quadratic_weighted_kappa_from_confusion,
+    squared_percentage_elements,
+    weighted_cross_entropy_elements,
+)
+from typing import Any, Callable, Optional
+
+
+class MetricAccumulator(abc.ABC):
+    """Base class of the accumulators."""
+
+    name: str
+
+    @abc.abstractmethod
+    def update(self, y: np.ndarray, yhat: np.ndarray, weight: Optional[np.ndarray] = None) -> "MetricAccumulator":
+        """
+        Adds a chunk of the validation set.
+
+        Args:
+            y (np.array): Labels of the chunk
+            yhat (np.array): Predictions of the chunk
+            weight (np.array): Optional sample weights of the chunk
+
+        Returns:
+            The accumulator itself
+        """
+
+    @abc.abstractmethod
+    def merge(self, other: "MetricAccumulator") -> "MetricAccumulator":
+        """
+        Adds the state of an accumulator filled with other chunks of the same validation set.
+
+        Args:
+            other: Accumulator of the same metric, with the same parameters
+
+        Returns:
+            The accumulator itself
+        """
+
+    @abc.abstractmethod
+    def result(self) -> Any:
+        """
+        The metric over all chunks seen so far.
+
+        Returns:
+            Eval score
+        """
+
+    def _check_compatible(self, other: "MetricAccumulator") -> None:
+        """Raises if other accumulates a different metric."""
+        if type(other) is not type(self) or other.name != self.name:
+            raise ValueError(f"Cannot merge {other.name} into {self.name}")
+
+
+class _MeanAccumulator(MetricAccumulator):
+    """Accumulates the sum and count of an elementwise metric."""
+
+    elements: Callable
+
+    def __init__(self, **params: float) -> None:
+        self.params = params
+        self.total = 0.
+        self.count = 0
+
+    def update(self, y: np.ndarray, yhat: np.ndarray, weight: Optional[np.ndarray] = None) -> "_MeanAccumulator":
+        self.total += compute_sum(type(self).elements, yhat, self._labels(y), weight, **self.params)
+        self.count += len(y) if weight is None else float(np.sum(weight, dtype=np.float64))
+        return self
+
+    def merge(self, other: "MetricAccumulator") -> "_MeanAccumulator":
+        self._check_compatible(other)
+        self.total += other.total
+        self.count += other.count
+        return self
+
+    def result(self) -> float:
+        return self.total / self.count
+
+    def _labels(self, y: np.ndarray) -> Any:
+        """What elements gets in place of the labels."""
+        return y
+
+
+class WeightedCrossEntropyAccumulator(_MeanAccumulator):
+    """
+    Streaming WeightedCrossEntropyMetric.
+
+    Args:
+        alpha (float): The scale to be applied.
+    """
+
+    elements = staticmethod(weighted_cross_entropy_elements)
+
+    def __init__(self, alpha: float = 0.5) -> None:
+        super().__init__(alpha=alpha)
+        self.name = f"WCE_alpha{alpha}"
+
+
+class WeightedFocalAccumulator(_MeanAccumulator):
+    """
+    Streaming WeightedFocalMetric.
+
+    Args:
+        alpha (float): The scale to be applied.
+        gamma (float): The focusing parameter to be applied
+    """
+
+    elements = staticmethod(focal_elements)
+
+    def __init__(self, alpha: float = 1.0, gamma: float = 2.0) -> None:
+        super().__init__(alpha=alpha, gamma=gamma)
+        self.name = f"Focal_alpha{alpha}_gamma{gamma}"
+
+
+class LogCoshAccumulator(_MeanAccumulator):
+    """Streaming LogCoshMetric."""
+
+    elements = staticmethod(log_cosh_elements)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.name = "LogCosh"
+
+
+class RMSPEAccumulator(_MeanAccumulator):
+    """
+    Streaming RMSPEMetric.
+
+    Args:
+        epsilon (float): Lower bound of |y| in the denominators, see RMSPEMetric
+    """
+
+    elements = staticmethod(squared_percentage_elements)
+
+    def __init__(self, epsilon: Optional[float] = None) -> None:
+        super().__init__()
+        self.name = "RMSPE"
+        self.epsilon = epsilon
+
+    def _labels(self, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return percentage_terms(np.asarray(y, dtype=get_config()["dtype"]), self.epsilon)
+
+    def _check_compatible(self, other: "MetricAccumulator") -> None:
+        super()._check_compatible(other)
+        if other.epsilon != self.epsilon:
+            raise ValueError(f"Cannot merge {self.name} with epsilon={other.epsilon} into epsilon={self.epsilon}")
+
+    def result(self) -> float:
+        return float(np.sqrt(super().result()))
+
+
+class F1Accumulator(MetricAccumulator):
+    """
+    Streaming F1_Score_Binary, for labels that are 0 / 1. Predictions are rounded to 0 / 1.
+
+    Args:
+        average (str): "binary", "micro", "macro", "weighted" or None, as in scikit learn
+        pos_label (int): The class to report if average is "binary"
+        zero_division: Value returned for classes without true or predicted samples
+    """
+
+    def __init__(self, average: Optional[str] = "binary", pos_label: int = 1, zero_division: Any = "warn") -> None:
+        self.name = "F1"
+        self.params = {"average": average, "pos_label": pos_label, "zero_division": zero_division}
+        self.counts = np.zeros(4)
+
+    def update(self, y: np.ndarray, yhat: np.ndarray, weight: Optional[np.ndarray] = None) -> "F1Accumulator":
+        y = binary_labels(np.asarray(y))
+        if y is None:
+            raise ValueError("F1Accumulator requires labels that are all 0 or 1")
+        self.counts += binary_confusion_counts(np.asarray(yhat) > 0.5, y, weight)
+        return self
+
+    def merge(self, other: "MetricAccumulator") -> "F1Accumulator":
+        self._check_compatible(other)
+        self.counts += other.counts
+        return self
+
+    def result(self) -> Any:
+        return f1_from_counts(self.counts, **self.params)
+
+
+class QuadraticWeightedKappaAccumulator(MetricAccumulator):
+    """
+    Streaming QuadraticWeightedKappaMetric, for labels that are the integers 0, ..., num_class - 1.
+
+    Predictions are either class scores of shape (n, num_class), or predicted classes.
+    The confusion matrix grows as new classes are seen. The result matches the eval metric
+    as long as every class appears in the labels.
+    """
+
+    def __init__(self) -> None:
+        self.name = "QWK"
+        self.confusion = np.zeros((0, 0))
+
+    def update(
+        self,
+        y: np.ndarray,
+        yhat: np.ndarray,
+        weight: Optional[np.ndarray] = None,
+        ) -> "QuadraticWeightedKappaAccumulator":
+        y = np.asarray(y)
+        if len(y) == 0:
+            return self
+        yhat = np.asarray(yhat)
+        pred = argmax_classes(yhat) if yhat.ndim == 2 else yhat.astype(np.intp)
+        y_int = y.astype(np.intp)
+        if not np.array_equal(y_int, y) or np.any(y_int < 0):
+            raise ValueError("QuadraticWeightedKappaAccumulator requires non-negative integer labels")
+
+        num_class = max(len(self.confusion), y_int.max() + 1, pred.max() + 1,
+                        yhat.shape[1] if yhat.ndim == 2 else 0)
+        self._grow(num_class)
+        self.confusion += confusion_matrix_counts(pred, y_int, num_class, weight)
+        return self
+
+    def merge(self, other: "MetricAccumulator") -> "QuadraticWeightedKappaAccumulator":
+        self._check_compatible(other)
+        self._grow(len(other.confusion))
+        self.confusion[:len(other.confusion), :len(other.confusion)] += other.confusion
+        return self
+
+    def result(self) -> float:
+        return quadratic_weighted_kappa_from_confusion(self.confusion)
+
+    def _grow(self, num_class: int) -> None:
+        """Pads the confusion matrix with zeros up to num_class classes."""
+        extra = num_class - len(self.confusion)
+        if extra > 0:
+            self.confusion = np.pad(self.confusion, ((0, extra), (0, extra)))
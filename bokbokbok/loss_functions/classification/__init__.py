@@ -1,12 +1,31 @@
-"""Import required losses."""
+"""
+Import required losses.
 
+The losses are imported from their modules on first access, see bokbokbok.utils.lazy.
+"""
+from typing import TYPE_CHECKING
+from bokbokbok.utils.lazy import lazy_attributes
 
-from .classification_loss_functions import (
-    WeightedCrossEntropyLoss,
-    WeightedFocalLoss,
-)
+if TYPE_CHECKING:
+    from .classification_loss_functions import (
+        WeightedCrossEntropyLoss,
+        WeightedFocalLoss,
+        MulticlassWeightedCrossEntropyLoss,
+        MulticlassWeightedFocalLoss,
+    )
+
+_modules = {
+    "WeightedCrossEntropyLoss": "classification_loss_functions",
+    "WeightedFocalLoss": "classification_loss_functions",
+    "MulticlassWeightedCrossEntropyLoss": "classification_loss_functions",
+    "MulticlassWeightedFocalLoss": "classification_loss_functions",
+}
 
 __all__ = [
     "WeightedCrossEntropyLoss",
-    "WeightedFocalLoss"
-]
\ No newline at end of file
+    "WeightedFocalLoss",
+    "MulticlassWeightedCrossEntropyLoss",
+    "MulticlassWeightedFocalLoss",
+]
+
+__getattr__, __dir__ = lazy_attributes(__name__, _modules)
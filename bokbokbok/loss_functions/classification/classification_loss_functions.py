@@ -1,12 +1,26 @@
 import numpy as np
-from bokbokbok.utils import clip_sigmoid
-
-from typing import Callable, TYPE_CHECKING
+from bokbokbok.utils.cache import DatasetCache
+from bokbokbok.utils.datasets import num_rows
+from bokbokbok.utils.engine import compute_grad_hess
+from bokbokbok.utils.layout import as_matrix, restore_layout
+from bokbokbok.utils.kernels import (
+    focal_grad_hess,
+    focal_terms,
+    softmax_cross_entropy_grad_hess,
+    softmax_focal_grad_hess,
+    softmax_terms,
+    weighted_cross_entropy_grad_hess,
+    weighted_cross_entropy_terms,
+)
+from bokbokbok.utils.profiling import profiled
+
+from typing import Callable, Sequence, TYPE_CHECKING, Union
 
 if TYPE_CHECKING:
     import xgboost as xgb
 
-def WeightedCrossEntropyLoss(alpha: float = 0.5) -> Callable:
+@profiled
+def WeightedCrossEntropyLoss(alpha: float = 0.5, cache: bool = False) -> Callable:
     """
     Calculates the Weighted Cross-Entropy Loss, which applies a factor alpha, allowing one to
     trade off recall and precision by up- or down-weighting the cost of a positive error relative
@@ -14,47 +28,14 @@ def WeightedCrossEntropyLoss(alpha: float = 0.5) -> Callable:
 
     A value alpha > 1 decreases the false negative count, hence increasing the recall.
     Conversely, setting alpha < 1 decreases the false positive count and increases the precision. 
-    """
-
-    def _gradient(
-        yhat: np.ndarray, 
-        dtrain: "xgb.DMatrix", 
-        alpha: float) -> np.ndarray:
-        """Compute the weighted cross-entropy gradient.
-
-        Args:
-            yhat (np.array): Margin predictions
-            dtrain: The XGBoost / LightGBM dataset
-            alpha (float): Scale applied
-
-        Returns:
-            grad: Weighted cross-entropy gradient
-        """
-        y = dtrain.get_label()
-
-        yhat = clip_sigmoid(yhat)
-
-        grad = (y * yhat * (alpha - 1)) + yhat - (alpha * y)
-
-        return grad
-
-    def _hessian(yhat: np.ndarray, dtrain: "xgb.DMatrix", alpha: float) -> np.ndarray:
-        """Compute the weighted cross-entropy hessian.
 
-        Args:
-            yhat (np.array): Margin predictions
-            dtrain: The XGBoost / LightGBM dataset
-            alpha (float): Scale applied
-
-        Returns:
-            hess: Weighted cross-entropy Hessian
-        """
-        y = dtrain.get_label()
-        yhat = clip_sigmoid(yhat)
-
-        hess = (y * (alpha - 1) + 1) * yhat * (1 - yhat)
-
-        return hess
+    Args:
+        alpha (float): The scale to be applied.
+        cache (Bool): Set to True to keep the labels, weights, label terms and gradient / hessian
+                      buffers of each dataset between boosting iterations. The returned arrays
+                      are then overwritten by the next call.
+    """
+    dataset_cache = DatasetCache() if cache else None
 
     def weighted_cross_entropy(
             yhat: np.ndarray,
@@ -73,16 +54,18 @@ def WeightedCrossEntropyLoss(alpha: float = 0.5) -> Callable:
             grad: Weighted cross-entropy gradient
             hess: Weighted cross-entropy Hessian
         """
-        grad = _gradient(yhat, dtrain, alpha=alpha)
-
-        hess = _hessian(yhat, dtrain, alpha=alpha)
-
-        return grad, hess
+        return compute_grad_hess(weighted_cross_entropy_grad_hess,
+                                 weighted_cross_entropy_terms,
+                                 yhat,
+                                 dtrain,
+                                 dataset_cache,
+                                 terms_params={"alpha": alpha})
 
     return weighted_cross_entropy
 
 
-def WeightedFocalLoss(alpha: float = 1.0, gamma: float = 2.0) -> Callable:
+@profiled
+def WeightedFocalLoss(alpha: float = 1.0, gamma: float = 2.0, cache: bool = False) -> Callable:
     """
     Calculates the [Weighted Focal Loss.](https://arxiv.org/pdf/1708.02002.pdf)
 
@@ -94,10 +77,22 @@ def WeightedFocalLoss(alpha: float = 1.0, gamma: float = 2.0) -> Callable:
     A value alpha > 1 decreases the false negative count, hence increasing the recall.
     Conversely, setting alpha < 1 decreases the false positive count and increases the precision. 
 
+    Args:
+        alpha (float): The scale to be applied.
+        gamma (float): The focusing parameter to be applied
+        cache (Bool): Set to True to keep the labels, weights, label terms and gradient / hessian
+                      buffers of each dataset between boosting iterations. The returned arrays
+                      are then overwritten by the next call.
     """
+    dataset_cache = DatasetCache() if cache else None
 
-    def _gradient(yhat: np.ndarray, dtrain: "xgb.DMatrix", alpha: float, gamma: float) -> np.ndarray:
-        """Compute the weighted focal gradient.
+    def focal_loss(
+            yhat: np.ndarray,
+            dtrain: "xgb.DMatrix",
+            alpha: float = alpha,
+            gamma: float = gamma) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate gradient and hessian for Focal Loss,
 
         Args:
             yhat (np.array): Margin predictions
@@ -106,67 +101,138 @@ def WeightedFocalLoss(alpha: float = 1.0, gamma: float = 2.0) -> Callable:
             gamma (float): Focusing parameter
 
         Returns:
-            grad: Weighted Focal Loss gradient
+            grad: Focal Loss gradient
+            hess: Focal Loss Hessian
         """
-        y = dtrain.get_label()
+        return compute_grad_hess(focal_grad_hess,
+                                 focal_terms,
+                                 yhat,
+                                 dtrain,
+                                 dataset_cache,
+                                 terms_params={"alpha": alpha, "gamma": gamma},
+                                 kernel_params={"gamma": gamma})
 
-        yhat = clip_sigmoid(yhat)
+    return focal_loss
 
-        grad = (
-                alpha * y * np.power(1 - yhat, gamma) * (gamma * yhat * np.log(yhat) + yhat - 1) +
-                (1 - y) * np.power(yhat, gamma) * (yhat - gamma * np.log(1 - yhat) * (1 - yhat))
-                )
 
-        return grad
+@profiled
+def MulticlassWeightedCrossEntropyLoss(
+        alpha: Union[float, Sequence[float]] = 1.0,
+        XGBoost: bool = False,
+        cache: bool = False,
+) -> Callable:
+    """
+    Calculates the Weighted Softmax Cross-Entropy Loss for multiclass problems, which scales
+    the loss of each sample by a factor alpha of its true class.
+
+    Use it with `num_class` set and, for XGBoost, `disable_default_eval_metric`; the raw margins
+    are passed in, so apply a softmax to the predictions of the trained model.
+
+    Args:
+        alpha: The scale to be applied, a single float or one float per class.
+        XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
+                        Only used to tell the layout of flat predictions of older versions.
+        cache (Bool): Set to True to keep the labels, weights, label terms and gradient / hessian
+                      buffers of each dataset between boosting iterations. The returned arrays
+                      are then overwritten by the next call.
+    """
+    dataset_cache = DatasetCache() if cache else None
+    alpha = _hashable(alpha)
 
-    def _hessian(yhat: np.ndarray, dtrain: "xgb.DMatrix", alpha: float, gamma: float) -> np.ndarray:
-        """Compute the weighted focal hessian.
+    def multiclass_weighted_cross_entropy(
+            yhat: np.ndarray,
+            dtrain: "xgb.DMatrix",
+            XGBoost: bool = XGBoost,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate gradient and hessian for the Weighted Softmax Cross-Entropy,
 
         Args:
-            yhat (np.array): Margin predictions
+            yhat (np.array): Margin predictions, of shape (n, num_class) or flattened
             dtrain: The XGBoost / LightGBM dataset
-            alpha (float): Scale applied
-            gamma (float): Focusing parameter
+            XGBoost (Bool): If XGBoost is to be implemented
 
         Returns:
-            hess: Weighted Focal Loss Hessian
+            grad: Weighted Softmax Cross-Entropy gradient, in the shape and layout of yhat
+            hess: Weighted Softmax Cross-Entropy Hessian, in the shape and layout of yhat
         """
-        y = dtrain.get_label()
-
-        yhat = clip_sigmoid(yhat)
-
-        hess = (
-                alpha * y * yhat * np.power(1 - y,
-                                            gamma) * (gamma * (1 - yhat) * np.log(yhat) + 2 * gamma * (1 - yhat) -
-                                                      np.power(gamma, 2) * yhat * np.log(yhat) + 1 - yhat) +
-                (1 - y) * np.power(yhat, gamma + 1) * (1 - yhat) * (2 * gamma + gamma * (np.log(1 - yhat)) + 1)
-                )
-
-        return hess
+        n = num_rows(dtrain) if np.ndim(yhat) == 1 else len(yhat)
+        matrix = as_matrix(yhat, n, class_major=not XGBoost)
+        grad, hess = compute_grad_hess(softmax_cross_entropy_grad_hess,
+                                       softmax_terms,
+                                       matrix,
+                                       dtrain,
+                                       dataset_cache,
+                                       terms_params={"alpha": alpha})
+        return (restore_layout(grad, yhat, class_major=not XGBoost),
+                restore_layout(hess, yhat, class_major=not XGBoost))
+
+    return multiclass_weighted_cross_entropy
+
+
+@profiled
+def MulticlassWeightedFocalLoss(
+        alpha: Union[float, Sequence[float]] = 1.0,
+        gamma: float = 2.0,
+        XGBoost: bool = False,
+        cache: bool = False,
+) -> Callable:
+    """
+    Calculates the [Weighted Focal Loss](https://arxiv.org/pdf/1708.02002.pdf) for multiclass
+    problems, on the softmax of the margins: - alpha_y * (1 - p_y)^gamma * log(p_y).
+
+    Note that if using alpha = 1 and gamma = 0, this is the same as using regular Softmax Cross Entropy.
+
+    Use it with `num_class` set and, for XGBoost, `disable_default_eval_metric`; the raw margins
+    are passed in, so apply a softmax to the predictions of the trained model.
+
+    Args:
+        alpha: The scale to be applied, a single float or one float per class.
+        gamma (float): The focusing parameter to be applied
+        XGBoost (Bool): Set to True if using XGBoost. We assume LightGBM as default use.
+                        Only used to tell the layout of flat predictions of older versions.
+        cache (Bool): Set to True to keep the labels, weights, label terms and gradient / hessian
+                      buffers of each dataset between boosting iterations. The returned arrays
+                      are then overwritten by the next call.
+    """
+    dataset_cache = DatasetCache() if cache else None
+    alpha = _hashable(alpha)
 
-    def focal_loss(
+    def multiclass_focal_loss(
             yhat: np.ndarray,
             dtrain: "xgb.DMatrix",
-            alpha: float = alpha,
-            gamma: float = gamma) -> tuple[np.ndarray, np.ndarray]:
+            XGBoost: bool = XGBoost,
+            gamma: float = gamma,
+    ) -> tuple[np.ndarray, np.ndarray]:
         """
-        Calculate gradient and hessian for Focal Loss,
+        Calculate gradient and hessian for the multiclass Focal Loss,
 
         Args:
-            yhat (np.array): Margin predictions
+            yhat (np.array): Margin predictions, of shape (n, num_class) or flattened
             dtrain: The XGBoost / LightGBM dataset
-            alpha (float): Scale applied
+            XGBoost (Bool): If XGBoost is to be implemented
             gamma (float): Focusing parameter
 
         Returns:
-            grad: Focal Loss gradient
-            hess: Focal Loss Hessian
+            grad: Focal Loss gradient, in the shape and layout of yhat
+            hess: Focal Loss Hessian, in the shape and layout of yhat
         """
+        n = num_rows(dtrain) if np.ndim(yhat) == 1 else len(yhat)
+        matrix = as_matrix(yhat, n, class_major=not XGBoost)
+        grad, hess = compute_grad_hess(softmax_focal_grad_hess,
+                                       softmax_terms,
+                                       matrix,
+                                       dtrain,
+                                       dataset_cache,
+                                       terms_params={"alpha": alpha},
+                                       kernel_params={"gamma": gamma})
+        return (restore_layout(grad, yhat, class_major=not XGBoost),
+                restore_layout(hess, yhat, class_major=not XGBoost))
 
-        grad = _gradient(yhat, dtrain, alpha=alpha, gamma=gamma)
+    return multiclass_focal_loss
 
-        hess = _hessian(yhat, dtrain, alpha=alpha, gamma=gamma)
 
-        return grad, hess
+def _hashable(alpha: Union[float, Sequence[float]]) -> Union[float, tuple[float, ...]]:
+    """Per-class scales as a tuple, so that they can be part of a cache key."""
+    return float(alpha) if np.ndim(alpha) == 0 else tuple(float(a) for a in alpha)
 
-    return focal_loss
@@ -1,12 +1,25 @@
-"""Import required losses."""
+"""
+Import required losses.
 
+The losses are imported from their modules on first access, see bokbokbok.utils.lazy.
+"""
+from typing import TYPE_CHECKING
+from bokbokbok.utils.lazy import lazy_attributes
 
-from .regression_loss_functions import (
-    LogCoshLoss,
-    SPELoss,
-)
+if TYPE_CHECKING:
+    from .regression_loss_functions import (
+        LogCoshLoss,
+        SPELoss,
+    )
+
+_modules = {
+    "LogCoshLoss": "regression_loss_functions",
+    "SPELoss": "regression_loss_functions",
+}
 
 __all__ = [
     "LogCoshLoss",
     "SPELoss",
-]
\ No newline at end of file
+]
+
+__getattr__, __dir__ = lazy_attributes(__name__, _modules)
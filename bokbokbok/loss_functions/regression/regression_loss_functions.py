@@ -1,42 +1,30 @@
 import numpy as np
-
-from typing import Callable, TYPE_CHECKING
+from bokbokbok.utils.cache import DatasetCache
+from bokbokbok.utils.engine import compute_grad_hess
+from bokbokbok.utils.kernels import (
+    log_cosh_grad_hess,
+    log_cosh_terms,
+    squared_percentage_grad_hess,
+    squared_percentage_terms,
+)
+from bokbokbok.utils.profiling import profiled
+
+from typing import Callable, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     import xgboost as xgb
 
-def LogCoshLoss() -> Callable:
+@profiled
+def LogCoshLoss(cache: bool = False) -> Callable:
     """
     [Log Cosh Loss](https://openreview.net/pdf?id=rkglvsC9Ym) is an alternative to Mean Absolute Error.
-    """
-
-    def _gradient(yhat: np.ndarray, dtrain: "xgb.DMatrix") -> np.ndarray:
-        """Compute the log cosh gradient.
-
-        Args:
-            yhat (np.array): Predictions
-            dtrain: The XGBoost / LightGBM dataset
-
-        Returns:
-            log cosh gradient
-        """
-
-        y = dtrain.get_label()
-        return -np.tanh(y - yhat)
 
-    def _hessian(yhat: np.ndarray, dtrain: "xgb.DMatrix") -> np.ndarray:
-        """Compute the log cosh hessian.
-
-        Args:
-            yhat (np.array): Predictions
-            dtrain: The XGBoost / LightGBM dataset
-
-        Returns:
-            log cosh Hessian
-        """
-
-        y = dtrain.get_label()
-        return 1. / np.power(np.cosh(y - yhat), 2)
+    Args:
+        cache (Bool): Set to True to keep the labels, weights and gradient / hessian buffers of each
+                      dataset between boosting iterations. The returned arrays are then
+                      overwritten by the next call.
+    """
+    dataset_cache = DatasetCache() if cache else None
 
     def log_cosh_loss(
             yhat: np.ndarray,
@@ -53,45 +41,27 @@ def LogCoshLoss() -> Callable:
             grad: log cosh loss gradient
             hess: log cosh loss Hessian
         """
-        grad = _gradient(yhat, dtrain)
-
-        hess = _hessian(yhat, dtrain)
-
-        return grad, hess
+        return compute_grad_hess(log_cosh_grad_hess, log_cosh_terms, yhat, dtrain, dataset_cache)
 
     return log_cosh_loss
 
 
-def SPELoss() -> Callable:
+@profiled
+def SPELoss(cache: bool = False, epsilon: Optional[float] = None) -> Callable:
     """
     Squared Percentage Error loss
-    """
-
-    def _gradient(yhat: np.ndarray, dtrain: "xgb.DMatrix") -> np.ndarray:
-        """
-        Compute the gradient squared percentage error.
-        Args:
-            yhat (np.array): Predictions
-            dtrain: The XGBoost / LightGBM dataset
-
-        Returns:
-            SPE Gradient
-        """
-        y = dtrain.get_label()
-        return -2*(y-yhat)/(y**2)
 
-    def _hessian(dtrain: "xgb.DMatrix") -> np.ndarray:
-        """
-        Compute the hessian for squared percentage error.
-        Args:
-            yhat (np.array): Predictions
-            dtrain: The XGBoost / LightGBM dataset
+    Its hessian, 2 / y^2, only depends on the labels: it is computed along with the other label
+    terms and returned as a read-only array. With cache=True that happens once per dataset.
 
-        Returns:
-            SPE Hessian
-        """
-        y = dtrain.get_label()
-        return 2/(y**2)
+    Args:
+        cache (Bool): Set to True to keep the labels, weights, hessian and gradient buffer
+                      of each dataset between boosting iterations. The returned gradient is then
+                      overwritten by the next call.
+        epsilon (float): Lower bound of |y| in the denominators. By default labels that are zero
+                         or too close to zero to divide by raise a ValueError
+    """
+    dataset_cache = DatasetCache() if cache else None
 
     def squared_percentage(
         yhat: np.ndarray, 
@@ -108,10 +78,12 @@ def SPELoss() -> Callable:
             grad: SPE loss gradient
             hess: SPE loss Hessian
         """
-        grad = _gradient(yhat, dtrain)
-
-        hess = _hessian(dtrain)
-
-        return grad, hess
-
-    return squared_percentage
\ No newline at end of file
+        return compute_grad_hess(squared_percentage_grad_hess,
+                                 squared_percentage_terms,
+                                 yhat,
+                                 dtrain,
+                                 dataset_cache,
+                                 terms_params={"epsilon": epsilon},
+                                 constant_hess=True)
+
+    return squared_percentage
@@ -2,9 +2,38 @@
 
 
 from .functions import (
-    clip_sigmoid
+    clip_sigmoid,
+    clip_softmax,
+)
+
+from .datasets import (
+    ArrayDataset,
+    sklearn_api,
+)
+
+from .config import (
+    config_context,
+    get_config,
+    set_config,
+)
+
+from .profiling import (
+    disable_profiling,
+    enable_profiling,
+    get_profile,
+    profile,
 )
 
 __all__ = [
+    "ArrayDataset",
+    "sklearn_api",
     "clip_sigmoid",
+    "clip_softmax",
+    "config_context",
+    "get_config",
+    "set_config",
+    "disable_profiling",
+    "enable_profiling",
+    "get_profile",
+    "profile",
 ]
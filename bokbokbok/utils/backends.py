@@ -0,0 +1,84 @@
+"""
+Registry of alternative implementations of the kernels in bokbokbok.utils.kernels.
+
+The NumPy kernels are the reference implementation and always available. Other backends
+(currently numba) register compiled versions of the same kernels, with the same signature,
+under the reference function. Backends are only imported the first time they are used.
+
+"auto" resolves to NumPy: its vectorised transcendental functions beat numba's scalar loops
+on most kernels (see benchmarks/run_benchmarks.py), so numba has to be asked for explicitly.
+Its fused loops allocate no temporaries though, which matters for the focal losses.
+"""
+import importlib
+import importlib.util
+
+from typing import Callable
+
+# Known backends, the first being the one "auto" resolves to
+BACKENDS = ("numpy", "numba")
+
+_LOADERS = {
+    "numba": ".numba_kernels",
+}
+
+_kernels: dict[str, dict[str, Callable]] = {}
+_loaded = {"numpy"}
+
+
+def register_kernel(reference: Callable, backend: str, func: Callable) -> None:
+    """
+    Registers func as the implementation of a reference NumPy kernel for a backend.
+
+    Args:
+        reference: The NumPy kernel func replaces
+        backend (str): Name of the backend
+        func: The alternative kernel, with the same signature as reference
+    """
+    _kernels.setdefault(reference.__name__, {})[backend] = func
+
+
+def available_backends() -> list[str]:
+    """
+    Returns the backends that can be used in this environment, starting with the default one.
+
+    Returns:
+        The names of the usable backends
+    """
+    return [
+        backend for backend in BACKENDS
+        if backend == "numpy" or importlib.util.find_spec(backend) is not None
+    ]
+
+
+def get_kernel(reference: Callable, backend: str = "auto") -> Callable:
+    """
+    Returns the implementation of a kernel for a backend.
+
+    Kernels a backend does not provide fall back to the NumPy reference.
+
+    Args:
+        reference: The NumPy kernel
+        backend (str): Name of the backend, or "auto" for the default one
+
+    Returns:
+        The kernel to call
+    """
+    if backend == "auto":
+        backend = DEFAULT_BACKEND
+    if backend == "numpy":
+        return reference
+    _load(backend)
+    return _kernels.get(reference.__name__, {}).get(backend, reference)
+
+
+def _load(backend: str) -> None:
+    """Imports the module registering the kernels of a backend, once."""
+    if backend in _loaded:
+        return
+    if backend not in _LOADERS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    importlib.import_module(_LOADERS[backend], __package__)
+    _loaded.add(backend)
+
+
+DEFAULT_BACKEND = BACKENDS[0]
@@ -0,0 +1,178 @@
+import weakref
+import numpy as np
+
+from typing import Any, Callable, Optional
+from .datasets import dataset_arrays
+
+
+class DatasetEntry:
+    """
+    Everything kept between boosting iterations for a single dataset: the label and
+    sample weight arrays, terms derived from them and reusable output buffers.
+    """
+
+    def __init__(self, label: np.ndarray, weight: Optional[np.ndarray] = None) -> None:
+        self.label = np.asarray(label)
+        self.weight = None if weight is None else np.asarray(weight)
+        self._terms: dict = {}
+        self._buffers: dict = {}
+
+    def terms(self, func: Callable, dtype: Any, weighted: bool = False, **params: Any) -> Any:
+        """
+        Return func(label, **params) with the labels cast to dtype, computing it on first use only.
+
+        Args:
+            func: Function of the labels (and params) returning the derived terms
+            dtype: Floating point type to compute the terms in
+            weighted (Bool): Also pass the sample weights, cast to dtype, as `weight`
+            **params: Parameters of the loss the terms depend on
+
+        Returns:
+            The (cached) derived label terms
+        """
+        key = (func, np.dtype(dtype), weighted, tuple(sorted(params.items())))
+        if weighted:
+            params["weight"] = self.weights(dtype)
+        return self._cached(key, lambda: func(self.labels(dtype), **params))
+
+    def labels(self, dtype: Any) -> np.ndarray:
+        """
+        Return the labels cast to dtype, casting them on first use only.
+
+        Args:
+            dtype: Floating point type of the labels
+
+        Returns:
+            The labels
+        """
+        return self._cached(("label", np.dtype(dtype)), lambda: self.label.astype(dtype, copy=False))
+
+    def weights(self, dtype: Any) -> Optional[np.ndarray]:
+        """
+        Return the sample weights cast to dtype, casting them on first use only.
+
+        Args:
+            dtype: Floating point type of the weights
+
+        Returns:
+            The weights, None if the dataset has none
+        """
+        if self.weight is None:
+            return None
+        return self._cached(("weight", np.dtype(dtype)), lambda: self.weight.astype(dtype, copy=False))
+
+    def total_weight(self) -> float:
+        """
+        Return the sum of the sample weights, or the number of rows if the dataset has none.
+
+        Returns:
+            The total weight
+        """
+        if self.weight is None:
+            return float(len(self.label))
+        return self._cached("total_weight", lambda: float(np.sum(self.weight, dtype=np.float64)))
+
+    def _cached(self, key: Any, compute: Callable) -> Any:
+        """Returns the value stored under key, computing it on first use only."""
+        try:
+            return self._terms[key]
+        except KeyError:
+            value = self._terms[key] = compute()
+            return value
+
+    def buffers(self, yhat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return a gradient and a hessian buffer matching the predictions, in their memory layout.
+
+        The same arrays are handed out on every call, so their contents are
+        overwritten by the next boosting iteration.
+
+        Args:
+            yhat (np.array): Predictions
+
+        Returns:
+            grad: Buffer for the gradient
+            hess: Buffer for the hessian
+        """
+        key = (yhat.shape, yhat.dtype, np.isfortran(yhat))
+        try:
+            return self._buffers[key]
+        except KeyError:
+            value = self._buffers[key] = (np.empty_like(yhat), np.empty_like(yhat))
+            return value
+
+
+class DatasetCache:
+    """
+    Cache of DatasetEntry objects keyed on the identity of the XGBoost / LightGBM dataset.
+
+    Entries are evicted as soon as their dataset is garbage-collected, and the cache itself is only
+    weakly referenced by the datasets it has seen, so a dropped loss or metric frees its entries.
+    Datasets that cannot be weakly referenced are never stored, their labels are simply fetched on
+    every call. Neither are label arrays passed as the dataset itself, which the entry holding them
+    would keep alive forever.
+    Labels and weights are assumed not to change once a dataset has been seen, call `clear` otherwise.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[int, DatasetEntry] = {}
+
+    def get(self, dataset: Any) -> DatasetEntry:
+        """
+        Return the entry of a dataset, creating it on first use.
+
+        Args:
+            dataset: The XGBoost / LightGBM dataset
+
+        Returns:
+            The DatasetEntry of the dataset
+        """
+        key = id(dataset)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = DatasetEntry(*dataset_arrays(dataset))
+            if _holds_dataset(entry, dataset):
+                return entry
+            try:
+                weakref.finalize(dataset, _evict, weakref.ref(self), key)
+            except TypeError:
+                return entry
+            self._entries[key] = entry
+        return entry
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+
+def dataset_entry(dataset: Any, dataset_cache: Optional[DatasetCache]) -> DatasetEntry:
+    """
+    Return the cached entry of a dataset, or a fresh one holding its labels and weights if there is no cache.
+
+    Args:
+        dataset: The XGBoost / LightGBM dataset
+        dataset_cache: Optional cache of the loss or metric
+
+    Returns:
+        The DatasetEntry of the dataset
+    """
+    if dataset_cache is None:
+        return DatasetEntry(*dataset_arrays(dataset))
+    return dataset_cache.get(dataset)
+
+def _evict(cache_ref: "weakref.ref[DatasetCache]", key: int) -> None:
+    """Drops the entry stored under key, if the cache still exists."""
+    cache = cache_ref()
+    if cache is not None:
+        cache._entries.pop(key, None)
+
+
+def _holds_dataset(entry: DatasetEntry, dataset: Any) -> bool:
+    """Whether the entry references the dataset itself, as with plain label arrays."""
+    return isinstance(dataset, np.ndarray) and any(
+        array is not None and np.may_share_memory(array, dataset) for array in (entry.label, entry.weight)
+    )
@@ -0,0 +1,106 @@
+import os
+import numpy as np
+
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+_config: dict[str, Any] = {
+    "dtype": np.float64,
+    "chunk_size": None,
+    "n_jobs": 1,
+    "backend": "auto",
+}
+
+
+def get_config() -> dict[str, Any]:
+    """
+    Returns the current package-wide settings.
+
+    Returns:
+        dict with keys:
+            dtype: Floating point type the losses and metrics compute in
+            chunk_size: Number of rows processed at a time, None for all at once
+            n_jobs: Number of threads the losses and metrics run on
+            backend: Implementation of the kernels, see bokbokbok.utils.backends
+    """
+    return _config.copy()
+
+
+def set_config(
+    dtype: Any = None,
+    chunk_size: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    backend: Optional[str] = None,
+    ) -> None:
+    """
+    Changes the package-wide settings. Arguments left to None are not changed.
+
+    Args:
+        dtype: Floating point type the losses and metrics compute in, np.float64 or np.float32.
+               LightGBM and XGBoost store gradients as float32, so float32 halves the memory
+               traffic of the objective at the cost of precision. Metrics are always
+               accumulated in float64.
+        chunk_size (int): Number of rows the losses and metrics process at a time. Each chunk is
+                          written straight into the output gradient / hessian, so the temporaries
+                          of the formulas are bounded by the chunk size instead of the dataset size.
+                          Something in the order of 2**14 - 2**16 rows keeps them in cache.
+                          Set to 0 to go back to processing all rows at once.
+        n_jobs (int): Number of threads the rows are split over. NumPy releases the GIL, so the
+                      shards are computed in parallel and give exactly the same gradient and
+                      hessian as a single thread. Negative values count back from the number
+                      of CPUs, -1 using all of them.
+        backend (str): Implementation of the kernels: "numpy" for the reference implementation,
+                       "numba" for compiled fused loops (requires numba), or "auto" for numpy,
+                       the faster of the two on most kernels.
+    """
+    if dtype is not None:
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float64):
+            raise ValueError(f"dtype must be float32 or float64, got {dtype}")
+        _config["dtype"] = dtype.type
+    if chunk_size is not None:
+        if chunk_size < 0:
+            raise ValueError(f"chunk_size must be non-negative, got {chunk_size}")
+        _config["chunk_size"] = int(chunk_size) or None
+    if n_jobs is not None:
+        if n_jobs == 0:
+            raise ValueError("n_jobs must not be 0")
+        _config["n_jobs"] = int(n_jobs)
+    if backend is not None:
+        from .backends import available_backends
+
+        if backend != "auto" and backend not in available_backends():
+            raise ValueError(f"backend must be 'auto' or one of {available_backends()}, got {backend!r}")
+        _config["backend"] = backend
+
+
+@contextmanager
+def config_context(**new_config: Any) -> Iterator[None]:
+    """
+    Temporarily changes the package-wide settings, see set_config.
+
+    Args:
+        **new_config: Settings to change within the context
+    """
+    old_config = get_config()
+    set_config(**new_config)
+    try:
+        yield
+    finally:
+        _config.clear()
+        _config.update(old_config)
+
+
+def effective_n_jobs(n_jobs: int) -> int:
+    """
+    Resolves negative n_jobs against the number of CPUs.
+
+    Args:
+        n_jobs (int): Number of threads as given to set_config
+
+    Returns:
+        The actual number of threads, at least 1
+    """
+    if n_jobs < 0:
+        n_jobs = (os.cpu_count() or 1) + 1 + n_jobs
+    return max(n_jobs, 1)
@@ -0,0 +1,187 @@
+"""
+The one place that talks to LightGBM / XGBoost datasets.
+
+The closures never call the dataset methods themselves: the labels and sample weights are pulled
+out once with `dataset_arrays` (and kept by bokbokbok.utils.cache), as contiguous float arrays the
+kernels can work on directly. Besides LightGBM `Dataset`s and XGBoost `DMatrix`es, any object with
+a `get_label` method, `ArrayDataset`s and plain label arrays (including memmaps) are accepted, so the
+losses and metrics can be run and benchmarked without a booster:
+
+```python
+loss = WeightedFocalLoss(alpha=2.0)
+grad, hess = loss(yhat, ArrayDataset(y, weight=w))
+```
+"""
+import collections
+import numpy as np
+
+from typing import Any, Callable, Optional, Union
+
+# Number of datasets sklearn_api keeps: the training set and a few eval sets
+_RECENT_DATASETS = 4
+
+
+class ArrayDataset:
+    """
+    Labels and optional sample weights held in arrays, standing in for a LightGBM / XGBoost dataset.
+
+    Args:
+        label (np.array): Labels, any array-like including memmaps
+        weight (np.array): Optional sample weights
+    """
+
+    def __init__(self, label: Any, weight: Optional[Any] = None) -> None:
+        self.label = _float_array(label)
+        self.weight = None if weight is None else _float_array(weight)
+        if self.weight is not None and len(self.weight) != len(self.label):
+            raise ValueError(f"Got {len(self.weight)} weights for {len(self.label)} labels")
+
+    def get_label(self) -> np.ndarray:
+        """The labels."""
+        return self.label
+
+    def get_weight(self) -> Optional[np.ndarray]:
+        """The sample weights, None if there are none."""
+        return self.weight
+
+    def num_data(self) -> int:
+        """The number of rows."""
+        return len(self.label)
+
+
+def dataset_arrays(dataset: Any) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Pulls the labels and sample weights out of a dataset.
+
+    Args:
+        dataset: LightGBM Dataset, XGBoost DMatrix, ArrayDataset, or the labels themselves
+
+    Returns:
+        label: The labels, as a contiguous float array
+        weight: The sample weights as a contiguous float array, None if the dataset has none
+    """
+    if not hasattr(dataset, "get_label"):
+        return _float_array(dataset), None
+    return _float_array(dataset.get_label()), sample_weight(dataset)
+
+
+def num_rows(dataset: Any) -> int:
+    """
+    The number of rows of a dataset.
+
+    Args:
+        dataset: LightGBM Dataset, XGBoost DMatrix, ArrayDataset, or the labels themselves
+
+    Returns:
+        The number of rows
+    """
+    for method in ("num_data", "num_row"):
+        if hasattr(dataset, method):
+            return getattr(dataset, method)()
+    return len(dataset_arrays(dataset)[0])
+
+
+def sample_weight(dataset: Any) -> Optional[np.ndarray]:
+    """
+    The sample weights of a dataset.
+
+    Args:
+        dataset: The XGBoost / LightGBM dataset
+
+    Returns:
+        The weights as a contiguous float array, None if the dataset has none
+        (LightGBM returns None, XGBoost an empty array)
+    """
+    get_weight = getattr(dataset, "get_weight", None)
+    weight = None if get_weight is None else get_weight()
+    if weight is None or len(weight) == 0:
+        return None
+    return _float_array(weight)
+
+
+def eval_result(
+    name: str,
+    score: Any,
+    higher_is_better: bool,
+    XGBoost: bool,
+    ) -> Union[tuple[str, Any], tuple[str, Any, bool]]:
+    """
+    Packs an eval score the way the framework expects it.
+
+    Args:
+        name (str): Name of the eval metric
+        score: Eval score
+        higher_is_better (Bool): Whether the score is to be maximised (LightGBM only, XGBoost
+                                 is told through the `maximize` argument of its train function)
+        XGBoost (Bool): If XGBoost is to be implemented
+
+    Returns:
+        Name of the eval metric, Eval score, and for LightGBM Bool to maximise function
+    """
+    if XGBoost:
+        return name, score
+    return name, score, higher_is_better
+
+
+def sklearn_api(func: Callable, XGBoost: bool = False) -> Callable:
+    """
+    Wraps a loss or eval metric for the scikit-learn interfaces (LGBMClassifier, XGBClassifier, ...),
+    which call `func(y_true, y_pred[, sample_weight])` instead of `func(y_pred, dataset)`.
+
+    The last few label (and weight) arrays are wrapped in an ArrayDataset only once. LightGBM hands
+    over the same arrays at every iteration, which are matched by identity. XGBoost hands over
+    fresh copies read from the DMatrix instead, so with XGBoost=True they are also matched by value,
+    which costs a comparison of the labels per call. Older arrays are dropped, so no more than
+    a few label arrays are kept alive. Build losses and metrics with `cache=True` for their label
+    terms and buffers to be reused as well.
+
+    ```python
+    clf = lgb.LGBMClassifier(objective=sklearn_api(WeightedFocalLoss(cache=True)))
+    clf.fit(X, y, eval_set=[(X, y)], eval_metric=sklearn_api(WeightedFocalMetric()))
+    ```
+
+    Args:
+        func: A bokbokbok loss or eval metric, built with the same XGBoost flag
+        XGBoost (Bool): Set to True if using XGBoost, for losses as well as eval metrics. Its
+                        scikit-learn interface expects eval metrics to return the score only, and
+                        hands over new label arrays at every iteration
+
+    Returns:
+        The wrapped loss or eval metric
+    """
+    # The arrays most recently wrapped, with their datasets
+    recent: collections.deque = collections.deque(maxlen=_RECENT_DATASETS)
+
+    def sklearn_func(y_true: Any, y_pred: np.ndarray, sample_weight: Optional[Any] = None) -> Any:
+        dataset = next((dataset for label, weight, dataset in recent
+                        if label is y_true and weight is sample_weight), None)
+        if dataset is None and XGBoost:
+            dataset = next((dataset for _, _, dataset in recent if _holds(dataset, y_true, sample_weight)), None)
+        if dataset is None:
+            dataset = ArrayDataset(y_true, sample_weight)
+            recent.append((y_true, sample_weight, dataset))
+
+        result = func(y_pred, dataset)
+        if XGBoost and isinstance(result[0], str):
+            return result[1]
+        return result
+
+    # XGBoost names custom eval metrics after the function
+    sklearn_func.__name__ = getattr(func, "__name__", "sklearn_func")
+    return sklearn_func
+
+
+def _holds(dataset: ArrayDataset, label: Any, weight: Optional[Any]) -> bool:
+    """Whether dataset holds the given labels and sample weights, compared by value."""
+    label = np.asarray(label)
+    if len(label) != len(dataset.label) or (weight is None) != (dataset.weight is None):
+        return False
+    return np.array_equal(dataset.label, label) and (weight is None or np.array_equal(dataset.weight, weight))
+
+
+def _float_array(values: Any) -> np.ndarray:
+    """Values as a contiguous array, of float64 unless they are floats already."""
+    values = np.asarray(values)
+    if not np.issubdtype(values.dtype, np.floating):
+        values = values.astype(np.float64)
+    return np.ascontiguousarray(values)
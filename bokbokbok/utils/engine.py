@@ -0,0 +1,230 @@
+"""
+Glue between the loss / metric closures and the kernels in bokbokbok.utils.kernels
+(or their counterparts in another backend, see bokbokbok.utils.backends).
+
+This is where the package-wide settings (see bokbokbok.utils.config) are applied,
+so that every closure behaves the same way. The sample weights of the datasets are applied
+here too: they are folded into the label terms of the losses, so the gradient and hessian come
+out weighted at no extra cost, and the metrics are weighted means.
+"""
+import threading
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TYPE_CHECKING, Union
+from .backends import get_kernel
+from .cache import DatasetCache, dataset_entry
+from .config import effective_n_jobs, get_config
+
+if TYPE_CHECKING:
+    import xgboost as xgb
+
+
+def compute_grad_hess(
+    kernel: Callable,
+    terms_func: Callable,
+    yhat: np.ndarray,
+    dtrain: "xgb.DMatrix",
+    dataset_cache: Optional[DatasetCache] = None,
+    terms_params: Optional[dict[str, Any]] = None,
+    kernel_params: Optional[dict[str, Any]] = None,
+    constant_hess: bool = False,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the gradient and hessian of a loss.
+
+    Args:
+        kernel: Gradient / hessian kernel of the loss
+        terms_func: Function computing the label terms the kernel needs
+        yhat (np.array): Predictions
+        dtrain: The XGBoost / LightGBM dataset
+        dataset_cache: Optional cache of labels, label terms and output buffers
+        terms_params (dict): Parameters passed to terms_func
+        kernel_params (dict): Parameters passed to kernel
+        constant_hess (Bool): Whether the hessian only depends on the labels, and is the last of the
+                              label terms. It is then returned as is, without being computed or copied
+
+    Returns:
+        grad: Gradient of the loss
+        hess: Hessian of the loss
+    """
+    terms_params = terms_params or {}
+    kernel_params = kernel_params or {}
+    config = get_config()
+    dtype = config["dtype"]
+    kernel = get_kernel(kernel, config["backend"])
+    yhat = np.asarray(yhat, dtype=dtype)
+
+    entry = dataset_entry(dtrain, dataset_cache)
+    terms = entry.terms(terms_func, dtype, weighted=True, **terms_params)
+    grad, hess = (None, None) if dataset_cache is None else entry.buffers(yhat)
+    if constant_hess:
+        hess = None
+
+    chunks, n_jobs = _plan(len(yhat), config)
+    if len(chunks) == 1:
+        return kernel(yhat, terms, grad=grad, hess=hess, **kernel_params)
+
+    if grad is None:
+        grad = np.empty_like(yhat)
+    if hess is None:
+        hess = terms[-1] if constant_hess else np.empty_like(yhat)
+
+    def run_chunk(chunk: slice) -> None:
+        kernel(yhat[chunk],
+               tuple(term[chunk] for term in terms),
+               grad=grad[chunk],
+               hess=None if constant_hess else hess[chunk],
+               **kernel_params)
+
+    _map(run_chunk, chunks, n_jobs)
+    return grad, hess
+
+
+def compute_mean(
+    elements: Callable,
+    yhat: np.ndarray,
+    dtrain: "xgb.DMatrix",
+    dataset_cache: Optional[DatasetCache] = None,
+    terms_func: Optional[Callable] = None,
+    terms_params: Optional[dict[str, Any]] = None,
+    **params: Any,
+    ) -> float:
+    """
+    Computes the mean of an elementwise metric, weighted by the sample weights of the dataset
+    if it has any. The sum is accumulated in float64.
+
+    Args:
+        elements: Function returning the per-row values of the metric
+        yhat (np.array): Predictions
+        dtrain: The XGBoost / LightGBM dataset
+        dataset_cache: Optional cache of labels, label terms and weights
+        terms_func: Optional function computing label terms, passed to elements instead of the labels
+        terms_params (dict): Parameters passed to terms_func
+        **params: Parameters passed to elements
+
+    Returns:
+        The (weighted) mean of the per-row values
+    """
+    entry = dataset_entry(dtrain, dataset_cache)
+    dtype = get_config()["dtype"]
+    if terms_func is None:
+        y = entry.labels(dtype)
+    else:
+        y = entry.terms(terms_func, dtype, **(terms_params or {}))
+    total = compute_sum(elements, yhat, y, entry.weights(dtype), **params)
+    return total / entry.total_weight()
+
+
+def compute_sum(
+    elements: Callable,
+    yhat: np.ndarray,
+    y: np.ndarray,
+    weight: Optional[np.ndarray] = None,
+    **params: Any,
+    ) -> Union[float, np.ndarray]:
+    """
+    Computes the (weighted) sum of an elementwise metric, accumulated in float64.
+
+    Args:
+        elements: Function returning the per-row values of the metric, either of shape (n,)
+                  or of shape (n, k) for k metrics at once
+        yhat (np.array): Predictions
+        y (np.array): Labels, or a tuple of label terms
+        weight (np.array): Optional sample weights, multiplied into the per-row values in place
+        **params: Parameters passed to elements
+
+    Returns:
+        The sum of the per-row values, an array of k sums if elements returns k columns
+    """
+    config = get_config()
+    dtype = config["dtype"]
+    elements = get_kernel(elements, config["backend"])
+    yhat = np.asarray(yhat, dtype=dtype)
+    terms = tuple(np.asarray(term, dtype=dtype) for term in y) if isinstance(y, tuple) else None
+    y = terms[0] if terms is not None else np.asarray(y, dtype=dtype)
+    if weight is not None:
+        weight = np.asarray(weight, dtype=dtype)
+
+    def sum_chunk(chunk: slice) -> float:
+        labels = y[chunk] if terms is None else tuple(term[chunk] for term in terms)
+        values = elements(yhat[chunk], labels, **params)
+        if weight is not None:
+            values *= weight[chunk] if values.ndim == 1 else weight[chunk, None]
+        return np.sum(values, axis=0, dtype=np.float64)
+
+    chunks, n_jobs = _plan(len(y), config)
+    total = sum(_map(sum_chunk, chunks, n_jobs))
+    return float(total) if np.ndim(total) == 0 else total
+
+
+def blocks(n: int, chunk_size: Optional[int]) -> list[slice]:
+    """
+    Splits n rows into consecutive chunks.
+
+    Args:
+        n (int): Number of rows
+        chunk_size (int): Maximum number of rows per chunk, None for a single chunk
+
+    Returns:
+        The slices selecting each chunk
+    """
+    if not chunk_size or n <= chunk_size:
+        return [slice(None)]
+    return [slice(start, start + chunk_size) for start in range(0, n, chunk_size)]
+
+
+# Rows below which splitting the work over threads costs more than it saves
+MIN_ROWS_PER_JOB = 2 ** 14
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _plan(n: int, config: dict[str, Any]) -> tuple[list[slice], int]:
+    """
+    Decides how n rows are split, given the chunk_size and n_jobs settings.
+
+    Args:
+        n (int): Number of rows
+        config (dict): The package-wide settings
+
+    Returns:
+        The chunks and the number of threads to process them on
+    """
+    chunk_size = config["chunk_size"]
+    n_jobs = min(effective_n_jobs(config["n_jobs"]), max(n // MIN_ROWS_PER_JOB, 1))
+    if n_jobs > 1:
+        shard_size = -(-n // n_jobs)
+        chunk_size = min(chunk_size, shard_size) if chunk_size else shard_size
+    return blocks(n, chunk_size), n_jobs
+
+
+def _map(func: Callable, chunks: list[slice], n_jobs: int) -> list:
+    """
+    Applies func to every chunk, on a shared thread pool if n_jobs > 1.
+
+    Args:
+        func: Function of a chunk
+        chunks (list): The chunks
+        n_jobs (int): Number of threads
+
+    Returns:
+        The results of func, in the order of the chunks
+    """
+    if n_jobs == 1 or len(chunks) == 1:
+        return [func(chunk) for chunk in chunks]
+    return list(_get_executor(n_jobs).map(func, chunks))
+
+
+def _get_executor(n_jobs: int) -> ThreadPoolExecutor:
+    """Returns the shared thread pool, (re)creating it with n_jobs workers if needed."""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != n_jobs:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=n_jobs, thread_name_prefix="bokbokbok")
+            _executor_workers = n_jobs
+        return _executor
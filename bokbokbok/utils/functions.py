@@ -1,21 +1,130 @@
 import numpy as np
 
-from typing import Any
+from typing import Any, Optional
 
 # Typing needs to be made more specific for different matrices, but w/e
-def clip_sigmoid(yhat: Any) -> np.ndarray:
+def clip_sigmoid(
+    yhat: Any,
+    out: Optional[np.ndarray] = None,
+    dtype: Optional[np.dtype] = None,
+    ) -> np.ndarray:
     """
     Applies the sigmoid function and ensures that the values lie in the range
-    1e-15 < yhat < 1 - 1e-15.
+    eps <= yhat <= 1 - eps, with eps = 1e-15 for float64.
     We clip to avoid dividing by zero in the loss functions.
 
+    The sigmoid is computed in place in `out` (which may be `yhat` itself), so no temporaries
+    or masks are allocated. Margins whose exponential overflows simply end up at the lower bound.
+    For dtypes in which 1 - 1e-15 rounds to 1 (e.g. float32), eps is the smallest value
+    that keeps 1 - eps below 1.
+
     Args:
         yhat: The margin probabilities yet to be put into a sigmoid function
+        out (np.array): Optional output buffer
+        dtype: Optional dtype of the result. Defaults to the dtype of `out`,
+               else to the dtype of `yhat` if it is floating point, else to float64
 
     Returns:
         yhat: The clipped probabilities
     """
-    yhat = 1. / (1. + np.exp(-yhat))
-    yhat[yhat >= 1] = 1 - 1e-15
-    yhat[yhat <= 0] = 1e-15
+    yhat = np.asarray(yhat)
+    if dtype is None:
+        if out is not None:
+            dtype = out.dtype
+        elif np.issubdtype(yhat.dtype, np.floating):
+            dtype = yhat.dtype
+        else:
+            dtype = np.float64
+    eps = clip_epsilon(dtype)
+
+    out = np.negative(yhat, out=out, dtype=dtype)
+    with np.errstate(over="ignore"):
+        np.exp(out, out=out)
+    out += 1.
+    np.reciprocal(out, out=out)
+    np.clip(out, eps, 1. - eps, out=out)
+    return out
+
+
+def log_sigmoid_pair(yhat: Any) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Takes the logarithms of the sigmoid of the margins and of their negatives straight from the
+    margins (log-sigmoid / softplus), without clipping, along with the probabilities themselves.
+
+    log(p) = min(yhat, 0) - log1p(exp(-|yhat|)) and log(1 - p) = - max(yhat, 0) - log1p(exp(-|yhat|))
+    are finite and accurate for any margin, and the probabilities follow as their exponentials.
+    No masks or branches are involved.
+
+    Args:
+        yhat: The margin probabilities yet to be put into a sigmoid function
+
+    Returns:
+        p: sigmoid(yhat)
+        q: 1 - p = sigmoid(-yhat)
+        log_p: log(p)
+        log_q: log(1 - p)
+    """
+    yhat = _float_margins(yhat)
+    # log1p(exp(-|yhat|)), the softplus of - |yhat|
+    softplus = np.abs(yhat)
+    np.negative(softplus, out=softplus)
+    np.exp(softplus, out=softplus)
+    np.log1p(softplus, out=softplus)
+
+    log_p = np.minimum(yhat, 0.)
+    log_p -= softplus
+    log_q = np.maximum(yhat, 0.)
+    np.negative(log_q, out=log_q)
+    log_q -= softplus
+
+    p = np.exp(log_p)
+    q = np.exp(log_q, out=softplus)
+    return p, q, log_p, log_q
+
+
+def _float_margins(yhat: Any) -> np.ndarray:
+    """The margins as a floating point array."""
+    yhat = np.asarray(yhat)
+    if not np.issubdtype(yhat.dtype, np.floating):
+        yhat = yhat.astype(np.float64)
     return yhat
+
+
+def clip_epsilon(dtype: Any) -> float:
+    """
+    The distance from 0 and 1 that clip_sigmoid keeps probabilities at.
+
+    Args:
+        dtype: The floating point dtype of the probabilities
+
+    Returns:
+        eps: 1e-15, or the gap between 1 and the next smaller number if that is larger
+    """
+    return max(1e-15, float(np.finfo(dtype).epsneg))
+
+
+def clip_softmax(
+    yhat: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+    """
+    Applies the softmax function over the classes of a (n, num_class) matrix of margins and ensures
+    that the probabilities lie in the range eps <= p <= 1 - eps, as in clip_sigmoid.
+
+    The row maximum is subtracted before exponentiating so that large margins do not overflow.
+    The softmax is computed in place in `out` (which may be `yhat` itself) and keeps the memory
+    layout of `yhat`, so class-major and row-major matrices are both handled without copies.
+
+    Args:
+        yhat (np.array): Margins, of shape (n, num_class)
+        out (np.array): Optional output buffer
+
+    Returns:
+        p: The clipped probabilities
+    """
+    eps = clip_epsilon(out.dtype if out is not None else yhat.dtype)
+    out = np.subtract(yhat, yhat.max(axis=1, keepdims=True), out=out)
+    np.exp(out, out=out)
+    out /= out.sum(axis=1, keepdims=True)
+    np.clip(out, eps, 1. - eps, out=out)
+    return out
@@ -0,0 +1,822 @@
+"""
+Kernels shared by the loss functions and eval metrics.
+
+Each loss is split into a function of the labels only (`*_terms`), whose result can be kept
+between boosting iterations, and a kernel computing the gradient and hessian from the
+predictions and those terms. Kernels write into `grad` and `hess` if given.
+
+Each elementwise metric has a function returning its per-row values (`*_elements`).
+
+Kernels compute in the dtype of their inputs.
+"""
+import warnings
+import numpy as np
+
+from typing import Any, Optional
+from .functions import clip_softmax, log_sigmoid_pair
+
+
+def weighted_cross_entropy_terms(
+    y: np.ndarray,
+    alpha: float,
+    weight: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Label terms of the Weighted Cross Entropy Loss.
+
+    Args:
+        y (np.array): Labels
+        alpha (float): Scale applied
+        weight (np.array): Optional sample weights, folded into the terms
+
+    Returns:
+        alpha * y, y * (alpha - 1) + 1, both times the weights
+    """
+    pos, scale = alpha * y, y * (alpha - 1) + 1
+    if weight is not None:
+        pos *= weight
+        scale *= weight
+    return pos, scale
+
+
+def weighted_cross_entropy_grad_hess(
+    yhat: np.ndarray,
+    terms: tuple[np.ndarray, np.ndarray],
+    grad: Optional[np.ndarray] = None,
+    hess: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the gradient and hessian of the Weighted Cross Entropy Loss.
+
+    Args:
+        yhat (np.array): Margin predictions
+        terms: Output of weighted_cross_entropy_terms
+        grad (np.array): Optional output buffer for the gradient
+        hess (np.array): Optional output buffer for the hessian
+
+    Returns:
+        grad: Weighted cross-entropy gradient
+        hess: Weighted cross-entropy Hessian
+    """
+    pos, scale = terms
+    # p = sigmoid(yhat) in the gradient buffer and 1 - p = sigmoid(-yhat) in the hessian buffer,
+    # without clipping; the latter keeps its precision for large margins
+    with np.errstate(over="ignore"):
+        p = grad = np.exp(np.negative(yhat, out=grad), out=grad)
+        q = hess = np.exp(yhat, out=hess)
+    for out in (p, q):
+        out += 1.
+        np.reciprocal(out, out=out)
+
+    # (y * (alpha - 1) + 1) * p * (1 - p)
+    hess *= p
+    hess *= scale
+
+    # p * (y * (alpha - 1) + 1) - alpha * y
+    grad *= scale
+    grad -= pos
+
+    return grad, hess
+
+
+def focal_terms(
+    y: np.ndarray,
+    alpha: float,
+    gamma: float,
+    weight: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Label terms of the Weighted Focal Loss.
+
+    Args:
+        y (np.array): Labels
+        alpha (float): Scale applied
+        gamma (float): Focusing parameter
+        weight (np.array): Optional sample weights, folded into the terms
+
+    Returns:
+        alpha * y, 1 - y, alpha * y * (1 - y)^gamma, all times the weights
+    """
+    pos = alpha * y
+    neg = 1. - y
+    pos_hess = pos * np.power(neg, gamma)
+    if weight is not None:
+        pos *= weight
+        neg *= weight
+        pos_hess *= weight
+    return pos, neg, pos_hess
+
+
+def focal_grad_hess(
+    yhat: np.ndarray,
+    terms: tuple[np.ndarray, np.ndarray, np.ndarray],
+    gamma: float,
+    grad: Optional[np.ndarray] = None,
+    hess: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the gradient and hessian of the Weighted Focal Loss in a single pass.
+
+    The sigmoid, both logarithms and both powers are evaluated once and shared between
+    the gradient and the hessian. The logarithms are taken straight from the margins
+    (see log_sigmoid_pair), so nothing is clipped.
+
+    Args:
+        yhat (np.array): Margin predictions
+        terms: Output of focal_terms
+        gamma (float): Focusing parameter
+        grad (np.array): Optional output buffer for the gradient
+        hess (np.array): Optional output buffer for the hessian
+
+    Returns:
+        grad: Weighted Focal Loss gradient
+        hess: Weighted Focal Loss Hessian
+    """
+    pos, neg, pos_hess = terms
+    p, q, log_p, log_q = log_sigmoid_pair(yhat)
+    p_gamma = np.power(p, gamma)
+    q_gamma = np.power(q, gamma)
+
+    # alpha * y * (1 - p)^gamma * (gamma * p * log(p) + p - 1)
+    grad = np.multiply(p, log_p, out=grad)
+    grad *= gamma
+    grad -= q
+    grad *= q_gamma
+    grad *= pos
+    # + (1 - y) * p^gamma * (p - gamma * log(1 - p) * (1 - p))
+    tmp = q * log_q
+    tmp *= -gamma
+    tmp += p
+    tmp *= p_gamma
+    tmp *= neg
+    grad += tmp
+
+    # alpha * y * p * (1 - y)^gamma * (gamma * (1 - p) * log(p) + 2 * gamma * (1 - p)
+    #                                  - gamma^2 * p * log(p) + 1 - p)
+    hess = np.multiply(q, log_p, out=hess)
+    hess *= gamma
+    hess += 2 * gamma * q
+    hess -= gamma ** 2 * p * log_p
+    hess += q
+    hess *= p
+    hess *= pos_hess
+    # + (1 - y) * p^(gamma + 1) * (1 - p) * (2 * gamma + gamma * log(1 - p) + 1)
+    np.multiply(log_q, gamma, out=tmp)
+    tmp += 2 * gamma + 1
+    tmp *= q
+    tmp *= p_gamma
+    tmp *= p
+    tmp *= neg
+    hess += tmp
+
+    return grad, hess
+
+
+def softmax_terms(
+    y: np.ndarray,
+    alpha: Any,
+    weight: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Label terms of the multiclass (softmax) losses.
+
+    Args:
+        y (np.array): Labels, the integers 0, ..., num_class - 1
+        alpha: Scale applied, a single float or one float per class
+        weight (np.array): Optional sample weights, folded into the scales
+
+    Returns:
+        The labels as integers, the scale of every row
+    """
+    labels = y.astype(np.intp)
+    alpha = np.asarray(alpha, dtype=y.dtype)
+    scale = np.full_like(y, alpha) if alpha.ndim == 0 else alpha[labels]
+    if weight is not None:
+        scale *= weight
+    return labels, scale
+
+
+def softmax_cross_entropy_grad_hess(
+    yhat: np.ndarray,
+    terms: tuple[np.ndarray, np.ndarray],
+    grad: Optional[np.ndarray] = None,
+    hess: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the gradient and diagonal hessian of the Weighted Softmax Cross Entropy Loss.
+
+    Works on the whole (n, num_class) matrix at once and in its memory layout,
+    so that `grad` and `hess` come out in the layout of `yhat`.
+
+    Args:
+        yhat (np.array): Margin predictions, of shape (n, num_class)
+        terms: Output of softmax_terms
+        grad (np.array): Optional output buffer for the gradient
+        hess (np.array): Optional output buffer for the hessian
+
+    Returns:
+        grad: Weighted Softmax Cross Entropy gradient
+        hess: Weighted Softmax Cross Entropy Hessian
+    """
+    labels, scale = terms
+    index = labels[:, None]
+    scale = scale[:, None]
+    p = hess = clip_softmax(yhat, out=hess)
+
+    # alpha_y * (p_j - [j == y])
+    grad = np.multiply(p, scale, out=grad)
+    # alpha_y * p_j * (1 - p_j)
+    np.multiply(hess, grad, out=hess)
+    np.subtract(grad, hess, out=hess)
+    np.put_along_axis(grad, index, np.take_along_axis(grad, index, axis=1) - scale, axis=1)
+
+    return grad, hess
+
+
+def softmax_focal_grad_hess(
+    yhat: np.ndarray,
+    terms: tuple[np.ndarray, np.ndarray],
+    gamma: float,
+    grad: Optional[np.ndarray] = None,
+    hess: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the gradient and diagonal hessian of the Weighted Softmax Focal Loss
+    - alpha_y * (1 - p_y)^gamma * log(p_y).
+
+    The loss only depends on the probability of the true class p_y, so everything except
+    the softmax itself is computed on a single column and broadcast over the classes.
+    Works on the whole (n, num_class) matrix at once and in its memory layout,
+    so that `grad` and `hess` come out in the layout of `yhat`.
+
+    Args:
+        yhat (np.array): Margin predictions, of shape (n, num_class)
+        terms: Output of softmax_terms
+        gamma (float): Focusing parameter
+        grad (np.array): Optional output buffer for the gradient
+        hess (np.array): Optional output buffer for the hessian
+
+    Returns:
+        grad: Weighted Softmax Focal Loss gradient
+        hess: Weighted Softmax Focal Loss Hessian
+    """
+    labels, scale = terms
+    index = labels[:, None]
+    scale = scale[:, None]
+    p = hess = clip_softmax(yhat, out=hess)
+    p_y = np.take_along_axis(p, index, axis=1)
+    q_y = 1. - p_y
+    log_p_y = np.log(p_y)
+    q_gamma = np.power(q_y, gamma - 1)
+
+    # f = d loss / d log(p_y) / alpha_y = gamma * p_y * (1 - p_y)^(gamma - 1) * log(p_y) - (1 - p_y)^gamma
+    f = gamma * p_y * q_gamma * log_p_y - q_gamma * q_y
+    # g = p_y * d f / d p_y
+    g = (gamma * q_gamma * p_y * (log_p_y + 2.) -
+         gamma * (gamma - 1) * p_y ** 2 * q_gamma / q_y * log_p_y)
+    f *= scale
+    g *= scale
+
+    # alpha_y * f * ([j == y] - p_j)
+    grad = np.multiply(p, -f, out=grad)
+    # alpha_y * (g * ([j == y] - p_j)^2 - f * p_j * (1 - p_j))
+    label_hess = g * q_y ** 2 - f * p_y * q_y
+    np.square(hess, out=hess)
+    hess *= g + f
+    hess += grad
+    np.put_along_axis(grad, index, f * q_y, axis=1)
+    np.put_along_axis(hess, index, label_hess, axis=1)
+
+    return grad, hess
+
+
+def log_cosh_terms(y: np.ndarray, weight: Optional[np.ndarray] = None) -> tuple[np.ndarray, ...]:
+    """
+    Label terms of the Log Cosh Loss.
+
+    Args:
+        y (np.array): Labels
+        weight (np.array): Optional sample weights
+
+    Returns:
+        y, followed by the weights if given
+    """
+    return (y,) if weight is None else (y, weight)
+
+
+def log_cosh_grad_hess(
+    yhat: np.ndarray,
+    terms: tuple[np.ndarray],
+    grad: Optional[np.ndarray] = None,
+    hess: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the gradient and hessian of the Log Cosh Loss.
+
+    The residual is computed once, straight into the gradient buffer, and the hessian follows
+    from the gradient as 1 - tanh^2, so tanh is the only transcendental function evaluated.
+    Unlike cosh, it does not overflow for large residuals.
+
+    Args:
+        yhat (np.array): Predictions
+        terms: Output of log_cosh_terms
+        grad (np.array): Optional output buffer for the gradient
+        hess (np.array): Optional output buffer for the hessian
+
+    Returns:
+        grad: log cosh gradient
+        hess: log cosh Hessian
+    """
+    y = terms[0]
+
+    # -tanh(y - yhat) = tanh(yhat - y)
+    grad = np.subtract(yhat, y, out=grad)
+    np.tanh(grad, out=grad)
+
+    # 1 / cosh(y - yhat)^2 = 1 - tanh(y - yhat)^2
+    hess = np.multiply(grad, grad, out=hess)
+    np.subtract(1., hess, out=hess)
+
+    if len(terms) > 1:
+        grad *= terms[1]
+        hess *= terms[1]
+
+    return grad, hess
+
+
+def percentage_denominators(y: np.ndarray, epsilon: Optional[float] = None) -> np.ndarray:
+    """
+    The inverse of the denominators of percentage errors, max(|y|, epsilon).
+
+    Without epsilon, labels that are zero, or so close to zero that the squared percentage error
+    overflows, raise instead of silently turning the loss or metric into inf / NaN.
+
+    Args:
+        y (np.array): Labels
+        epsilon (float): Optional lower bound of the denominators, as in scikit-learn's
+                         mean_absolute_percentage_error
+
+    Returns:
+        1 / max(|y|, epsilon)
+    """
+    denominators = np.abs(y)
+    if epsilon is not None:
+        np.maximum(denominators, epsilon, out=denominators)
+    else:
+        # Below this, 1 / y^2 is not finite
+        near_zero = np.count_nonzero(denominators < 1 / np.sqrt(np.finfo(denominators.dtype).max))
+        if near_zero:
+            raise ValueError(f"{near_zero} labels are zero or too close to zero for a percentage error, "
+                             f"set epsilon to bound the denominators")
+    return np.reciprocal(denominators, out=denominators)
+
+
+def squared_percentage_terms(
+    y: np.ndarray,
+    epsilon: Optional[float] = None,
+    weight: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Label terms of the Squared Percentage Error Loss.
+
+    The hessian only depends on the labels, so it is computed here, once per dataset
+    when the terms are cached, and made read-only as it is handed out as is.
+
+    Args:
+        y (np.array): Labels
+        epsilon (float): Optional lower bound of the denominators, see percentage_denominators
+        weight (np.array): Optional sample weights, folded into the terms
+
+    Returns:
+        y, and the hessian 2 / max(|y|, epsilon)^2 times the weights
+    """
+    hess = percentage_denominators(y, epsilon)
+    np.square(hess, out=hess)
+    hess *= 2
+    if weight is not None:
+        hess *= weight
+    hess.flags.writeable = False
+    return y, hess
+
+
+def squared_percentage_grad_hess(
+    yhat: np.ndarray,
+    terms: tuple[np.ndarray, np.ndarray],
+    grad: Optional[np.ndarray] = None,
+    hess: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the gradient and hessian of the Squared Percentage Error Loss.
+
+    Args:
+        yhat (np.array): Predictions
+        terms: Output of squared_percentage_terms
+        grad (np.array): Optional output buffer for the gradient
+        hess (np.array): Optional output buffer for the hessian. If not given, the
+                         (read-only) hessian in the terms is returned
+
+    Returns:
+        grad: SPE loss gradient
+        hess: SPE loss Hessian
+    """
+    y, constant_hess = terms
+
+    # -2 * (y - yhat) / y^2
+    grad = np.subtract(yhat, y, out=grad)
+    grad *= constant_hess
+
+    # 2 / y^2
+    if hess is None:
+        return grad, constant_hess
+    np.copyto(hess, constant_hess)
+
+    return grad, hess
+
+
+def weighted_cross_entropy_elements(yhat: np.ndarray, y: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Per-row values of the Weighted Cross Entropy Metric.
+
+    Args:
+        yhat (np.array): Margin predictions
+        y (np.array): Labels
+        alpha (float): Scale applied
+
+    Returns:
+        - alpha * y * log(p) - (1 - y) * log(1 - p)
+    """
+    _, _, log_p, log_q = log_sigmoid_pair(yhat)
+    return - alpha * y * log_p - (1 - y) * log_q
+
+
+def focal_elements(yhat: np.ndarray, y: np.ndarray, alpha: float, gamma: float) -> np.ndarray:
+    """
+    Per-row values of the Weighted Focal Metric.
+
+    Args:
+        yhat (np.array): Margin predictions
+        y (np.array): Labels
+        alpha (float): Scale applied
+        gamma (float): Focusing parameter
+
+    Returns:
+        - alpha * y * log(p) * (1 - p)^gamma - (1 - y) * log(1 - p) * p^gamma
+    """
+    p, q, log_p, log_q = log_sigmoid_pair(yhat)
+    return (- alpha * y * log_p * np.power(q, gamma) -
+            (1 - y) * log_q * np.power(p, gamma))
+
+
+def focal_sweep_elements(yhat: np.ndarray, y: np.ndarray, gammas: np.ndarray) -> np.ndarray:
+    """
+    Per-row terms of the Weighted Focal Metric for several values of gamma at once.
+
+    The metric is linear in alpha, so for every gamma the two columns returned are all that is
+    needed to get the metric for any alpha: - alpha * mean(first) - mean(second).
+    The sigmoid and logs are computed once for all values of gamma.
+
+    Args:
+        yhat (np.array): Margin predictions
+        y (np.array): Labels
+        gammas (np.array): Focusing parameters
+
+    Returns:
+        Array of shape (n, 2 * len(gammas)) holding y * log(p) * (1 - p)^gamma for every gamma,
+        followed by (1 - y) * log(1 - p) * p^gamma for every gamma
+    """
+    gammas = np.asarray(gammas, dtype=yhat.dtype)
+    p, q, log_p, log_q = log_sigmoid_pair(yhat)
+    pos = (y * log_p)[:, None] * np.power(q[:, None], gammas)
+    neg = ((1 - y) * log_q)[:, None] * np.power(p[:, None], gammas)
+    return np.concatenate([pos, neg], axis=1)
+
+
+def log_cosh_elements(yhat: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Per-row values of the Log Cosh Metric.
+
+    Args:
+        yhat (np.array): Predictions
+        y (np.array): Labels
+
+    Returns:
+        log(cosh(yhat - y)), computed as |x| + log1p(exp(-2|x|)) - log(2), which
+        unlike cosh does not overflow for large residuals x
+    """
+    values = np.subtract(yhat, y)
+    np.abs(values, out=values)
+    softplus = np.multiply(values, -2.)
+    np.exp(softplus, out=softplus)
+    np.log1p(softplus, out=softplus)
+    values += softplus
+    values -= np.log(2.)
+    return values
+
+
+def percentage_terms(y: np.ndarray, epsilon: Optional[float] = None) -> tuple[np.ndarray, ...]:
+    """
+    Label terms of the Squared Percentage Error, averaged by RMSPEMetric.
+
+    Args:
+        y (np.array): Labels
+        epsilon (float): Optional lower bound of the denominators, see percentage_denominators
+
+    Returns:
+        1 / y if no denominator was bounded by epsilon,
+        else 1 / max(|y|, epsilon) and y / max(|y|, epsilon)
+    """
+    inv_denominators = percentage_denominators(y, epsilon)
+    if epsilon is None or not np.any(np.abs(y) < epsilon):
+        return (np.copysign(inv_denominators, y, out=inv_denominators),)
+    return inv_denominators, y * inv_denominators
+
+
+def squared_percentage_elements(yhat: np.ndarray, terms: tuple[np.ndarray, ...]) -> np.ndarray:
+    """
+    Per-row values of the Squared Percentage Error, averaged by RMSPEMetric.
+
+    Multiplying by the cached inverse labels reads one label array, where dividing
+    by bounded denominators needs two.
+
+    Args:
+        yhat (np.array): Predictions
+        terms: Output of percentage_terms
+
+    Returns:
+        ((y - yhat) / max(|y|, epsilon))^2
+    """
+    # (1 - yhat / y)^2, or (y / d - yhat / d)^2
+    values = np.multiply(yhat, terms[0])
+    if len(terms) > 1:
+        values -= terms[1]
+    else:
+        values -= 1
+    return np.square(values, out=values)
+
+
+def binary_labels(y: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Validates binary labels once, so that later calls can skip the checks.
+
+    Args:
+        y (np.array): Labels
+
+    Returns:
+        The labels as integers if they are all 0 or 1, None otherwise
+    """
+    y_int = y.astype(np.intp)
+    if not np.array_equal(y_int, y) or np.any((y_int != 0) & (y_int != 1)):
+        return None
+    return y_int
+
+
+def binary_confusion_counts(
+    pred: np.ndarray,
+    y: np.ndarray,
+    weight: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+    """
+    Counts the true negatives, false positives, false negatives and true positives
+    with a single bincount over 2 * y + pred.
+
+    Args:
+        pred (np.array): Predicted labels, 0 / 1 or bool
+        y (np.array): Labels validated by binary_labels
+        weight (np.array): Optional sample weights, summed instead of counting rows
+
+    Returns:
+        counts: [tn, fp, fn, tp]
+    """
+    index = 2 * y
+    index += pred
+    return np.bincount(index, weights=weight, minlength=4)
+
+
+def f1_from_counts(
+    counts: np.ndarray,
+    average: Optional[str] = "binary",
+    pos_label: int = 1,
+    zero_division: Any = "warn",
+    ) -> Any:
+    """
+    Computes the F1 score from binary confusion counts, following scikit-learn's f1_score.
+
+    Args:
+        counts (np.array): [tn, fp, fn, tp] as returned by binary_confusion_counts
+        average (str): "binary", "micro", "macro", "weighted" or None
+        pos_label (int): The class to report if average is "binary"
+        zero_division: Value returned for classes without true or predicted samples,
+                       "warn" returns 0 and warns
+
+    Returns:
+        The F1 score, or an array with the score of each class present if average is None
+    """
+    tn, fp, fn, tp = (float(c) for c in counts)
+    # Per class (0, 1): true positives, false positives, false negatives
+    class_tp = np.array([tn, tp])
+    class_fp = np.array([fn, fp])
+    class_fn = np.array([fp, fn])
+    support = class_tp + class_fn
+    denominator = 2 * class_tp + class_fp + class_fn
+
+    if average == "micro":
+        tp_sum, fp_sum, fn_sum = class_tp.sum(), class_fp.sum(), class_fn.sum()
+        return _safe_f1(np.array([2 * tp_sum]), np.array([2 * tp_sum + fp_sum + fn_sum]), zero_division)[0]
+
+    f1 = _safe_f1(2 * class_tp, denominator, zero_division)
+    if average == "binary":
+        return f1[pos_label]
+
+    # Classes that appear in neither the labels nor the predictions are left out, like scikit-learn
+    present = (support + class_tp + class_fp) > 0
+    if average is None:
+        return f1[present]
+    if average == "macro":
+        return float(np.mean(f1[present]))
+    if average == "weighted":
+        return float(np.average(f1, weights=support)) if support.sum() > 0 else 0.
+    raise ValueError(f"Unsupported average {average!r}")
+
+
+def _safe_f1(numerator: np.ndarray, denominator: np.ndarray, zero_division: Any) -> np.ndarray:
+    """Divides, replacing the scores of empty classes by zero_division."""
+    empty = denominator == 0
+    if np.any(empty) and zero_division == "warn":
+        warnings.warn("F-score is ill-defined and being set to 0.0 due to no true nor predicted samples.",
+                      RuntimeWarning,
+                      stacklevel=3)
+    fill = 0. if zero_division == "warn" else float(zero_division)
+    return np.where(empty, fill, numerator / np.where(empty, 1., denominator))
+
+
+def multiclass_labels(y: np.ndarray) -> Optional[tuple[np.ndarray, int, np.ndarray]]:
+    """
+    Validates multiclass labels once and computes their class count and histogram.
+
+    Args:
+        y (np.array): Labels
+
+    Returns:
+        The labels as integers, the number of classes and the number of samples per class
+        if the labels are exactly the integers 0, ..., num_class - 1, None otherwise
+    """
+    y_int = y.astype(np.intp)
+    if len(y) == 0 or not np.array_equal(y_int, y) or y_int.min() < 0:
+        return None
+    histogram = np.bincount(y_int)
+    if np.any(histogram == 0):
+        return None
+    return y_int, len(histogram), histogram
+
+
+def confusion_matrix_counts(
+    pred: np.ndarray,
+    y: np.ndarray,
+    num_class: int,
+    weight: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+    """
+    Builds the confusion matrix with a single bincount over num_class * y + pred.
+
+    Args:
+        pred (np.array): Predicted classes in 0, ..., num_class - 1
+        y (np.array): Labels validated by multiclass_labels
+        num_class (int): Number of classes
+        weight (np.array): Optional sample weights, summed instead of counting rows
+
+    Returns:
+        confusion: num_class x num_class matrix, true classes along the rows
+    """
+    index = num_class * y
+    index += pred
+    return np.bincount(index, weights=weight, minlength=num_class ** 2).reshape(num_class, num_class)
+
+
+def quadratic_weighted_kappa_from_confusion(
+    confusion: np.ndarray,
+    true_histogram: Optional[np.ndarray] = None,
+    ) -> float:
+    """
+    Computes Cohen's kappa with quadratic weights (i - j)^2 from a confusion matrix.
+
+    The expected disagreement only depends on the marginals a (true) and b (predicted):
+    sum_ij (i - j)^2 a_i b_j / n = sum_i i^2 a_i + sum_j j^2 b_j - 2 (sum_i i a_i)(sum_j j b_j) / n,
+    so only the observed disagreement needs the full k x k matrix.
+
+    Args:
+        confusion (np.array): Confusion matrix, true classes along the rows
+        true_histogram (np.array): Row sums of the confusion matrix, if already known
+
+    Returns:
+        The quadratic weighted kappa, nan if the expected disagreement is 0
+    """
+    num_class = confusion.shape[0]
+    classes = np.arange(num_class, dtype=np.float64)
+    a = confusion.sum(axis=1) if true_histogram is None else true_histogram
+    b = confusion.sum(axis=0)
+    n = a.sum()
+
+    weights = np.subtract.outer(classes, classes) ** 2
+    observed = np.sum(weights * confusion)
+    expected = (np.dot(classes ** 2, a) + np.dot(classes ** 2, b) -
+                2 * np.dot(classes, a) * np.dot(classes, b) / n)
+    if expected == 0:
+        return np.nan
+    return float(1 - observed / expected)
+
+
+def binary_threshold_counts(
+    yhat: np.ndarray,
+    y: np.ndarray,
+    bins: Optional[int] = None,
+    weight: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Counts the true and false positives at every decision threshold in a single pass,
+    from the highest threshold to the lowest.
+
+    Without bins the scores are sorted once and every distinct score is a threshold.
+    With bins the scores are bucketed into equal-width bins between their minimum and maximum,
+    which avoids the sort, and the bin edges are the thresholds.
+
+    Args:
+        yhat (np.array): Scores, margins or probabilities
+        y (np.array): Labels validated by binary_labels
+        bins (int): Optional number of bins
+        weight (np.array): Optional sample weights, summed instead of counting rows
+
+    Returns:
+        tps: Number of positives scored at or above each threshold
+        fps: Number of negatives scored at or above each threshold
+    """
+    positives = y if weight is None else y * weight
+    if bins is None:
+        order = np.argsort(yhat, kind="stable")[::-1]
+        scores = yhat[order]
+        # Rows are only cut after the last of a group of equal scores
+        ends = np.append(np.flatnonzero(np.diff(scores)), len(scores) - 1)
+        tps = np.cumsum(positives[order])[ends]
+        selected = ends + 1 if weight is None else np.cumsum(weight[order])[ends]
+        return tps, selected - tps
+
+    low, high = np.min(yhat), np.max(yhat)
+    scale = bins / (high - low) if high > low else 0.
+    # Bin 0 holds the highest scores
+    index = np.subtract(high, yhat, dtype=np.float64)
+    index *= scale
+    index = np.minimum(index.astype(np.intp), bins - 1)
+    tps = np.cumsum(np.bincount(index, weights=positives, minlength=bins))
+    return tps, np.cumsum(np.bincount(index, weights=weight, minlength=bins)) - tps
+
+
+def best_f1_from_counts(tps: np.ndarray, fps: np.ndarray) -> float:
+    """
+    The highest F1 score over all thresholds.
+
+    Args:
+        tps (np.array): True positives per threshold, see binary_threshold_counts
+        fps (np.array): False positives per threshold
+
+    Returns:
+        max over thresholds of 2 tp / (tp + fp + number of positives)
+    """
+    denominator = tps + fps + tps[-1]
+    f1 = 2 * tps / np.where(denominator > 0, denominator, 1)
+    return float(np.max(f1))
+
+
+def precision_at_k_from_counts(tps: np.ndarray, fps: np.ndarray, k: int) -> float:
+    """
+    The precision at the highest threshold selecting at least k rows.
+
+    Args:
+        tps (np.array): True positives per threshold, see binary_threshold_counts
+        fps (np.array): False positives per threshold
+        k (int): Number of rows, or total weight if the counts are weighted
+
+    Returns:
+        tp / (tp + fp) at that threshold
+    """
+    selected = tps + fps
+    threshold = min(np.searchsorted(selected, k), len(selected) - 1)
+    return float(tps[threshold] / selected[threshold])
+
+
+def recall_at_precision_from_counts(tps: np.ndarray, fps: np.ndarray, min_precision: float) -> float:
+    """
+    The highest recall over the thresholds whose precision is at least min_precision.
+
+    Args:
+        tps (np.array): True positives per threshold, see binary_threshold_counts
+        fps (np.array): False positives per threshold
+        min_precision (float): Required precision
+
+    Returns:
+        tp / number of positives, 0 if no threshold reaches min_precision
+    """
+    selected = tps + fps
+    precision = tps / np.where(selected > 0, selected, 1)
+    reached = (precision >= min_precision) & (selected > 0)
+    if tps[-1] == 0 or not np.any(reached):
+        return 0.
+    return float(np.max(tps[reached]) / tps[-1])
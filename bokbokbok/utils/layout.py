@@ -0,0 +1,85 @@
+"""
+Memory layouts of multiclass predictions.
+
+LightGBM stores the margins class by class (class-major), XGBoost sample by sample (row-major).
+Recent versions of both hand them to custom objectives and metrics as a (n, num_class) matrix
+laid out that way, older ones as a flat array. Everything here works on (n, num_class) views of
+the predictions, so nothing is ever transposed in memory, and reduces along the contiguous axis.
+"""
+import numpy as np
+
+
+def is_class_major(matrix: np.ndarray) -> bool:
+    """
+    Whether the classes of a (n, num_class) matrix are stored one after the other, as in LightGBM.
+
+    Args:
+        matrix (np.array): Predictions, of shape (n, num_class)
+
+    Returns:
+        True if the values of each class are contiguous
+    """
+    return matrix.shape[0] > 1 and matrix.strides[0] < matrix.strides[1]
+
+
+def as_matrix(yhat: np.ndarray, n: int, class_major: bool) -> np.ndarray:
+    """
+    View of multiclass predictions as a (n, num_class) matrix.
+
+    Args:
+        yhat (np.array): Predictions, of shape (n, num_class) or flattened
+        n (int): Number of samples
+        class_major (Bool): Whether flattened predictions are stored class by class (LightGBM)
+                            rather than sample by sample (XGBoost)
+
+    Returns:
+        The predictions as a (n, num_class) matrix, sharing memory with yhat
+    """
+    yhat = np.asarray(yhat)
+    if yhat.ndim == 2:
+        return yhat
+    return yhat.reshape(-1, n).T if class_major else yhat.reshape(n, -1)
+
+
+def restore_layout(values: np.ndarray, yhat: np.ndarray, class_major: bool) -> np.ndarray:
+    """
+    Undoes as_matrix, to hand values computed on the matrix back in the shape of the predictions.
+
+    Args:
+        values (np.array): Values of shape (n, num_class), in the layout of the matrix
+        yhat (np.array): The predictions passed to as_matrix
+        class_major (Bool): As passed to as_matrix
+
+    Returns:
+        The values in the shape of yhat, without copying
+    """
+    if np.ndim(yhat) == 2:
+        return values
+    return values.T.reshape(-1) if class_major else values.reshape(-1)
+
+
+def argmax_classes(matrix: np.ndarray) -> np.ndarray:
+    """
+    The most likely class of every sample.
+
+    For class-major matrices a running maximum is kept over the classes, which reads every class
+    contiguously instead of striding across them. Ties go to the first class, as in np.argmax.
+
+    Args:
+        matrix (np.array): Predictions, of shape (n, num_class)
+
+    Returns:
+        The index of the largest value of every row
+    """
+    if not is_class_major(matrix):
+        return matrix.argmax(axis=1)
+
+    best = matrix[:, 0].copy()
+    classes = np.zeros(len(matrix), dtype=np.intp)
+    larger = np.empty(len(matrix), dtype=bool)
+    for c in range(1, matrix.shape[1]):
+        column = matrix[:, c]
+        np.greater(column, best, out=larger)
+        np.maximum(best, column, out=best)
+        np.copyto(classes, c, where=larger)
+    return classes
@@ -0,0 +1,41 @@
+"""
+Lazy attributes for the package `__init__` files.
+
+The losses and metrics are imported from their modules on first access (PEP 562), so importing one
+of them does not import the modules of all the others, nor their dependencies. scikit-learn, which
+takes longer to import than everything else, is only imported when a metric falls back to it.
+"""
+import importlib
+
+from typing import Any, Callable
+
+
+def lazy_attributes(package: str, modules: dict[str, str]) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    Module-level `__getattr__` and `__dir__` importing attributes on first access.
+
+    ```python
+    __getattr__, __dir__ = lazy_attributes(__name__, {"LogCoshLoss": "regression_loss_functions"})
+    ```
+
+    Args:
+        package (str): Name of the package, i.e. its `__name__`
+        modules (dict): The module of the package defining each attribute
+
+    Returns:
+        The package's `__getattr__` and `__dir__`
+    """
+    namespace = importlib.import_module(package).__dict__
+
+    def __getattr__(name: str) -> Any:
+        if name not in modules:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(f".{modules[name]}", package), name)
+        # Later accesses no longer go through __getattr__
+        namespace[name] = value
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(namespace) | set(modules))
+
+    return __getattr__, __dir__
@@ -0,0 +1,145 @@
+"""
+numba-compiled versions of the kernels in bokbokbok.utils.kernels.
+
+Each kernel is a single fused loop over the rows, so no temporaries are allocated. The loops
+release the GIL, so the shards of a multi-threaded loss run in parallel, and are cached on disk,
+so they are compiled once per machine rather than once per process.
+Importing this module registers them with bokbokbok.utils.backends under the "numba" backend.
+
+There are no LogCosh kernels: the NumPy one evaluates a single vectorised tanh and is several
+times faster than a loop calling the scalar one, so the numba backend falls back to it.
+"""
+import math
+import numba
+import numpy as np
+
+from typing import Optional
+from . import kernels
+from .backends import register_kernel
+
+
+@numba.njit(inline="always", cache=True)
+def _log_sigmoid_pair(x: float) -> tuple[float, float, float, float]:
+    # See bokbokbok.utils.functions.log_sigmoid_pair
+    e = math.exp(-abs(x))
+    softplus = math.log1p(e)
+    large = 1. / (1. + e)
+    small = e * large
+    if x < 0:
+        return small, large, x - softplus, - softplus
+    return large, small, - softplus, - x - softplus
+
+
+@numba.njit(error_model="numpy", nogil=True, cache=True)
+def _weighted_cross_entropy_loop(yhat, pos, scale, grad, hess):
+    for i in range(yhat.shape[0]):
+        p, q, _, _ = _log_sigmoid_pair(yhat[i])
+        grad[i] = p * scale[i] - pos[i]
+        hess[i] = scale[i] * p * q
+
+
+@numba.njit(error_model="numpy", nogil=True, cache=True)
+def _focal_loop(yhat, pos, neg, pos_hess, gamma, grad, hess):
+    for i in range(yhat.shape[0]):
+        p, q, log_p, log_q = _log_sigmoid_pair(yhat[i])
+        p_gamma = p ** gamma
+        q_gamma = q ** gamma
+        grad[i] = (pos[i] * q_gamma * (gamma * p * log_p - q) +
+                   neg[i] * p_gamma * (p - gamma * q * log_q))
+        hess[i] = (pos_hess[i] * p * (gamma * q * log_p + 2 * gamma * q - gamma ** 2 * p * log_p + q) +
+                   neg[i] * p_gamma * p * q * (2 * gamma + gamma * log_q + 1))
+
+
+@numba.njit(error_model="numpy", nogil=True, cache=True)
+def _squared_percentage_loop(yhat, y, constant_hess, grad):
+    for i in range(yhat.shape[0]):
+        grad[i] = (yhat[i] - y[i]) * constant_hess[i]
+
+
+@numba.vectorize(cache=True)
+def _weighted_cross_entropy_elements(yhat, y, alpha):
+    _, _, log_p, log_q = _log_sigmoid_pair(yhat)
+    return - alpha * y * log_p - (1 - y) * log_q
+
+
+@numba.vectorize(cache=True)
+def _focal_elements(yhat, y, alpha, gamma):
+    p, q, log_p, log_q = _log_sigmoid_pair(yhat)
+    return (- alpha * y * log_p * q ** gamma -
+            (1 - y) * log_q * p ** gamma)
+
+
+@numba.vectorize(cache=True)
+def _squared_percentage_elements(yhat, inv_y):
+    return (1 - yhat * inv_y) ** 2
+
+
+@numba.vectorize(cache=True)
+def _bounded_squared_percentage_elements(yhat, inv_denominators, scaled_y):
+    return (scaled_y - yhat * inv_denominators) ** 2
+
+
+def _outputs(
+    yhat: np.ndarray,
+    grad: Optional[np.ndarray],
+    hess: Optional[np.ndarray],
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """Allocates the output buffers that were not given."""
+    if grad is None:
+        grad = np.empty_like(yhat)
+    if hess is None:
+        hess = np.empty_like(yhat)
+    return grad, hess
+
+
+def weighted_cross_entropy_grad_hess(yhat, terms, grad=None, hess=None):
+    """See bokbokbok.utils.kernels.weighted_cross_entropy_grad_hess."""
+    grad, hess = _outputs(yhat, grad, hess)
+    _weighted_cross_entropy_loop(yhat, *terms, grad, hess)
+    return grad, hess
+
+
+def focal_grad_hess(yhat, terms, gamma, grad=None, hess=None):
+    """See bokbokbok.utils.kernels.focal_grad_hess."""
+    grad, hess = _outputs(yhat, grad, hess)
+    _focal_loop(yhat, *terms, float(gamma), grad, hess)
+    return grad, hess
+
+
+def squared_percentage_grad_hess(yhat, terms, grad=None, hess=None):
+    """See bokbokbok.utils.kernels.squared_percentage_grad_hess."""
+    if grad is None:
+        grad = np.empty_like(yhat)
+    _squared_percentage_loop(yhat, *terms, grad)
+    if hess is None:
+        return grad, terms[1]
+    np.copyto(hess, terms[1])
+    return grad, hess
+
+
+def weighted_cross_entropy_elements(yhat, y, alpha):
+    """See bokbokbok.utils.kernels.weighted_cross_entropy_elements."""
+    return _weighted_cross_entropy_elements(yhat, y, float(alpha))
+
+
+def focal_elements(yhat, y, alpha, gamma):
+    """See bokbokbok.utils.kernels.focal_elements."""
+    return _focal_elements(yhat, y, float(alpha), float(gamma))
+
+
+def squared_percentage_elements(yhat, terms):
+    """See bokbokbok.utils.kernels.squared_percentage_elements."""
+    if len(terms) > 1:
+        return _bounded_squared_percentage_elements(yhat, *terms)
+    return _squared_percentage_elements(yhat, *terms)
+
+
+for _name in [
+    "weighted_cross_entropy_grad_hess",
+    "focal_grad_hess",
+    "squared_percentage_grad_hess",
+    "weighted_cross_entropy_elements",
+    "focal_elements",
+    "squared_percentage_elements",
+]:
+    register_kernel(getattr(kernels, _name), "numba", globals()[_name])
@@ -0,0 +1,162 @@
+"""
+Opt-in profiling of the losses and eval metrics.
+
+Every closure returned by a loss or metric factory goes through `profiled`. While profiling is
+off this costs one global lookup per call. While it is on, each call records its latency, the
+number of rows and, optionally, the peak memory allocated, aggregated per factory and / or handed to
+a callback, e.g. to export them to a monitoring system:
+
+```python
+with profile() as stats:
+    lgb.train(params={"objective": WeightedFocalLoss()}, train_set=train, feval=F1_Score_Binary())
+stats["WeightedFocalLoss"]["mean_seconds"]
+```
+"""
+import functools
+import threading
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+from .datasets import num_rows
+
+
+class _Profiler:
+    """The statistics being collected and how."""
+
+    def __init__(self, callback: Optional[Callable], trace_memory: bool) -> None:
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self.stats: dict[str, dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, rows: int, peak_bytes: int) -> None:
+        """Adds a call to the statistics of name and hands it to the callback."""
+        with self.lock:
+            stats = self.stats.setdefault(name, {
+                "calls": 0,
+                "total_seconds": 0.,
+                "mean_seconds": 0.,
+                "max_seconds": 0.,
+                "rows": 0,
+                "peak_bytes": 0,
+            })
+            stats["calls"] += 1
+            stats["total_seconds"] += seconds
+            stats["mean_seconds"] = stats["total_seconds"] / stats["calls"]
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["rows"] += rows
+            stats["peak_bytes"] = max(stats["peak_bytes"], peak_bytes)
+        if self.callback is not None:
+            self.callback(name, {"seconds": seconds, "rows": rows, "peak_bytes": peak_bytes})
+
+
+# The profiler calls are recorded with, None while profiling is off
+_profiler: Optional[_Profiler] = None
+# The profiler last enabled, whose statistics get_profile returns
+_last_profiler: Optional[_Profiler] = None
+
+
+def enable_profiling(callback: Optional[Callable] = None, trace_memory: bool = False) -> None:
+    """
+    Starts recording the calls of all losses and eval metrics, dropping earlier statistics.
+
+    Args:
+        callback: Optional function called after every call as callback(name, record), with name the
+                  loss / metric factory and record a dict of the seconds, rows and peak_bytes of the call
+        trace_memory (Bool): Measure the peak memory allocated during each call with tracemalloc, i.e.
+                             the most held at once on top of what was in use before the call.
+                             This slows down all allocations while profiling is on.
+    """
+    _activate(_Profiler(callback, trace_memory))
+
+
+def disable_profiling() -> None:
+    """Stops recording calls. The statistics collected so far remain available."""
+    global _profiler
+    if _profiler is not None and _profiler.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _profiler = None
+
+
+def get_profile() -> dict[str, dict[str, Any]]:
+    """
+    The statistics of every loss and metric called since profiling was enabled.
+
+    Returns:
+        Per factory name: the number of calls, total, mean and max seconds per call,
+        rows processed and the largest peak memory allocated by a call in bytes (0 unless memory is traced)
+    """
+    if _last_profiler is None:
+        return {}
+    with _last_profiler.lock:
+        return {name: dict(stats) for name, stats in _last_profiler.stats.items()}
+
+
+@contextmanager
+def profile(callback: Optional[Callable] = None, trace_memory: bool = False) -> Iterator[dict[str, dict[str, Any]]]:
+    """
+    Context manager profiling the losses and metrics called within it.
+
+    Args:
+        callback: See enable_profiling
+        trace_memory (Bool): See enable_profiling
+
+    Yields:
+        The statistics, see get_profile, filled in as calls are made
+    """
+    previous = _profiler
+    profiler = _Profiler(callback, trace_memory)
+    _activate(profiler)
+    try:
+        yield profiler.stats
+    finally:
+        disable_profiling()
+        if previous is not None:
+            _activate(previous)
+
+
+def profiled(factory: Callable) -> Callable:
+    """
+    Decorator for the loss and metric factories, making the closures they return report to the profiler.
+
+    Args:
+        factory: Function returning a loss or eval metric closure
+
+    Returns:
+        The factory, with its closures profiled under its name
+    """
+    name = factory.__name__
+
+    @functools.wraps(factory)
+    def profiled_factory(*args: Any, **kwargs: Any) -> Callable:
+        func = factory(*args, **kwargs)
+
+        @functools.wraps(func)
+        def profiled_func(yhat: Any, dtrain: Any, *func_args: Any, **func_kwargs: Any) -> Any:
+            profiler = _profiler
+            if profiler is None:
+                return func(yhat, dtrain, *func_args, **func_kwargs)
+
+            if profiler.trace_memory:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            result = func(yhat, dtrain, *func_args, **func_kwargs)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - before if profiler.trace_memory else 0
+            profiler.record(name, seconds, num_rows(dtrain), peak)
+            return result
+
+        return profiled_func
+
+    return profiled_factory
+
+
+def _activate(profiler: _Profiler) -> None:
+    """Makes profiler the one calls are recorded with."""
+    global _profiler, _last_profiler
+    if profiler.trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _profiler = _last_profiler = profiler
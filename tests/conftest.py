@@ -0,0 +1,87 @@
+"""
+Data and test cases shared by the test modules.
+
+The problems are (labels, predictions) pairs drawn once per session from the same seed; test cases
+refer to them by name, e.g. "binary", and the tests look them up with `getattr(problems, name)`.
+"""
+import numpy as np
+import pytest
+from collections import namedtuple
+from bokbokbok.utils import ArrayDataset
+from bokbokbok.eval_metrics.classification import (
+    F1_Score_Binary,
+    QuadraticWeightedKappaMetric,
+    WeightedCrossEntropyMetric,
+    WeightedFocalMetric,
+)
+from bokbokbok.eval_metrics.regression import LogCoshMetric, RMSPEMetric
+from bokbokbok.eval_metrics.streaming import (
+    F1Accumulator,
+    LogCoshAccumulator,
+    QuadraticWeightedKappaAccumulator,
+    RMSPEAccumulator,
+    WeightedCrossEntropyAccumulator,
+    WeightedFocalAccumulator,
+)
+
+
+class Problems:
+    """
+    Labels and predictions of a binary, a regression and a multiclass problem, with sample weights.
+
+    Args:
+        n (int): Number of rows
+    """
+
+    def __init__(self, n: int) -> None:
+        rng = np.random.default_rng(41114)
+        self.n = n
+        binary_y = rng.integers(0, 2, size=n).astype(float)
+        # Binary labels with margins, and with probabilities
+        self.binary = (binary_y, rng.normal(scale=3, size=n))
+        self.probabilities = (binary_y, rng.uniform(size=n))
+        regression_y = rng.uniform(1, 10, size=n)
+        self.regression = (regression_y, regression_y + rng.normal(size=n))
+        self.multiclass = (rng.integers(0, 4, size=n).astype(float), rng.normal(size=(n, 4)))
+        # Integers, so that weighting a row is the same as repeating it
+        self.weight = rng.integers(1, 4, size=n).astype(float)
+
+
+@pytest.fixture(scope="session")
+def problems() -> Problems:
+    """The shared problems, with 1000 rows."""
+    return Problems(1000)
+
+
+@pytest.fixture(scope="session")
+def large_problems() -> Problems:
+    """The shared problems, with an odd number of rows that is split into several chunks."""
+    return Problems(10_001)
+
+
+@pytest.fixture
+def data(request: pytest.FixtureRequest, large_problems: Problems) -> tuple:
+    """The predictions and a dataset of the large problem named by the indirect test parameter."""
+    y, yhat = getattr(large_problems, request.param)
+    return yhat, ArrayDataset(y)
+
+
+MetricCase = namedtuple("MetricCase", ["accumulator", "params", "metric", "y", "yhat"])
+
+# Streaming accumulators, their parameters, the eval metrics they match and the problems they are evaluated on
+METRIC_CASES = {
+    "WCE": (WeightedCrossEntropyAccumulator, {"alpha": 3.0}, WeightedCrossEntropyMetric(alpha=3.0), "binary"),
+    "Focal": (WeightedFocalAccumulator, {"alpha": 0.5, "gamma": 2.0}, WeightedFocalMetric(alpha=0.5, gamma=2.0),
+              "binary"),
+    "LogCosh": (LogCoshAccumulator, {}, LogCoshMetric(), "regression"),
+    "RMSPE": (RMSPEAccumulator, {}, RMSPEMetric(), "regression"),
+    "F1": (F1Accumulator, {"average": "macro"}, F1_Score_Binary(average="macro"), "probabilities"),
+    "QWK": (QuadraticWeightedKappaAccumulator, {}, QuadraticWeightedKappaMetric(XGBoost=True), "multiclass"),
+}
+
+
+@pytest.fixture(params=list(METRIC_CASES))
+def metric_case(request: pytest.FixtureRequest, problems: Problems) -> MetricCase:
+    """Every streaming accumulator, with the eval metric it matches and the data to evaluate it on."""
+    accumulator, params, metric, problem = METRIC_CASES[request.param]
+    return MetricCase(accumulator, params, metric, *getattr(problems, problem))
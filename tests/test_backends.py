@@ -0,0 +1,115 @@
+from functools import partial
+import numpy as np
+import pytest
+from bokbokbok.utils import config_context, kernels
+from bokbokbok.utils.backends import available_backends, get_kernel
+
+# Tolerances of the comparison with the NumPy reference per dtype
+tolerances = {
+    np.float64: {"rtol": 1e-10, "atol": 1e-12},
+    np.float32: {"rtol": 1e-4, "atol": 1e-5},
+}
+
+# Kernels, the problems they run on, the label terms of the labels and weights, and the kernel parameters
+loss_cases = [
+    (kernels.weighted_cross_entropy_grad_hess, "binary",
+     lambda y, w: kernels.weighted_cross_entropy_terms(y, alpha=3.0), {}),
+    (kernels.focal_grad_hess, "binary",
+     lambda y, w: kernels.focal_terms(y, alpha=0.5, gamma=2.0), {"gamma": 2.0}),
+    (kernels.focal_grad_hess, "binary",
+     lambda y, w: kernels.focal_terms(y, alpha=2.0, gamma=0.0), {"gamma": 0.0}),
+    (kernels.log_cosh_grad_hess, "regression",
+     lambda y, w: kernels.log_cosh_terms(y), {}),
+    (kernels.log_cosh_grad_hess, "regression",
+     lambda y, w: kernels.log_cosh_terms(y, weight=w), {}),
+    (kernels.squared_percentage_grad_hess, "regression",
+     lambda y, w: kernels.squared_percentage_terms(y), {}),
+]
+
+metric_cases = [
+    (kernels.weighted_cross_entropy_elements, "binary", np.asarray, {"alpha": 3.0}),
+    (kernels.focal_elements, "binary", np.asarray, {"alpha": 0.5, "gamma": 2.0}),
+    (kernels.log_cosh_elements, "regression", np.asarray, {}),
+    (kernels.squared_percentage_elements, "regression", kernels.percentage_terms, {}),
+    (kernels.squared_percentage_elements, "regression", partial(kernels.percentage_terms, epsilon=2.0), {}),
+]
+
+
+def cast(values, dtype):
+    """The arrays in values, or in a tuple of label terms, cast to dtype."""
+    if isinstance(values, tuple):
+        return tuple(cast(value, dtype) for value in values)
+    return values.astype(dtype)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("reference, problem, label_terms, params", loss_cases)
+def test_loss_kernel_parity(problems, backend, dtype, reference, problem, label_terms, params):
+    """
+    Assert that every backend matches the NumPy reference gradient and hessian.
+    """
+    y, yhat = getattr(problems, problem)
+    yhat, terms = cast(yhat, dtype), cast(label_terms(y, problems.weight), dtype)
+    expected_grad, expected_hess = reference(yhat, terms, **params)
+
+    grad = np.empty_like(yhat)
+    hess = np.empty_like(yhat)
+    kernel = get_kernel(reference, backend)
+    out_grad, out_hess = kernel(yhat, terms, grad=grad, hess=hess, **params)
+
+    assert out_grad is grad and out_hess is hess
+    assert grad.dtype == hess.dtype == dtype
+    assert np.allclose(grad, expected_grad, **tolerances[dtype])
+    assert np.allclose(hess, expected_hess, **tolerances[dtype])
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("reference, problem, labels, params", metric_cases)
+def test_metric_kernel_parity(problems, backend, dtype, reference, problem, labels, params):
+    """
+    Assert that every backend matches the NumPy reference metric values.
+    """
+    y, yhat = getattr(problems, problem)
+    yhat, y = cast(yhat, dtype), cast(labels(y), dtype)
+    expected = reference(yhat, y, **params)
+    elements = get_kernel(reference, backend)(yhat, y, **params)
+
+    assert np.allclose(elements, expected, **tolerances[dtype])
+
+
+def test_auto_backend():
+    """
+    Assert that "auto" runs the NumPy reference kernels.
+    """
+    assert get_kernel(kernels.focal_grad_hess) is kernels.focal_grad_hess
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_log_cosh_numpy_kernels(backend):
+    """
+    Assert that every backend runs the NumPy LogCosh kernels, which no compiled loop beats.
+    """
+    assert get_kernel(kernels.log_cosh_grad_hess, backend) is kernels.log_cosh_grad_hess
+    assert get_kernel(kernels.log_cosh_elements, backend) is kernels.log_cosh_elements
+
+
+@pytest.mark.skipif("numba" not in available_backends(), reason="numba is not installed")
+def test_numba_kernels_release_gil():
+    """
+    Assert that the compiled loops release the GIL and are cached, so threads run them in parallel
+    and processes do not recompile them.
+    """
+    from bokbokbok.utils import numba_kernels
+
+    for name in ["_weighted_cross_entropy_loop", "_focal_loop", "_squared_percentage_loop"]:
+        loop = getattr(numba_kernels, name)
+        assert loop.targetoptions["nogil"]
+        assert loop._cache.__class__.__name__ == "FunctionCache"
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        with config_context(backend="fortran"):
+            pass
@@ -0,0 +1,57 @@
+import functools
+import numpy as np
+import pytest
+from bokbokbok.eval_metrics.batch import score_predictions
+from bokbokbok.eval_metrics.classification import QuadraticWeightedKappaMetric, WeightedFocalMetric
+from bokbokbok.eval_metrics.regression import LogCoshMetric, RMSPEMetric
+from bokbokbok.utils import ArrayDataset
+
+
+rng = np.random.default_rng(41114)
+y = rng.uniform(1, 10, size=1000)
+weight = rng.uniform(size=1000)
+predictions = [y + rng.normal(scale=scale, size=1000) for scale in (0.5, 1.0, 2.0)]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_score_predictions_files(tmp_path, n_jobs):
+    """
+    Assert that predictions saved as files are scored against memory-mapped labels, and that
+    every model and metric gets a record in order.
+    """
+    paths = []
+    for i, prediction in enumerate(predictions):
+        paths.append(tmp_path / f"model_{i}.npy")
+        np.save(paths[-1], prediction)
+    np.save(tmp_path / "labels.npy", y)
+
+    records = score_predictions([RMSPEMetric, LogCoshMetric], paths, tmp_path / "labels.npy",
+                                weight=weight, n_jobs=n_jobs)
+
+    assert [(r["model"], r["metric"]) for r in records] == [
+        (f"model_{i}", metric) for i in range(3) for metric in ("RMSPE", "LogCosh")
+    ]
+    for record in records:
+        prediction = predictions[int(record["model"][-1])]
+        metric = RMSPEMetric() if record["metric"] == "RMSPE" else LogCoshMetric()
+        assert np.isclose(record["value"], metric(prediction, ArrayDataset(y, weight))[1])
+
+
+def test_score_predictions_arrays():
+    """
+    Assert that in-memory arrays and parametrised metric factories are accepted as well.
+    """
+    labels = rng.integers(0, 3, size=1000)
+    scores = {"first": rng.normal(size=(1000, 3)), "second": rng.normal(size=(1000, 3))}
+    focal = functools.partial(WeightedFocalMetric, alpha=2.0, gamma=1.0)
+
+    records = score_predictions([QuadraticWeightedKappaMetric], scores, labels, n_jobs=2)
+    assert [r["model"] for r in records] == ["first", "second"]
+    for record in records:
+        expected = QuadraticWeightedKappaMetric()(scores[record["model"]], ArrayDataset(labels))[1]
+        assert np.isclose(record["value"], expected)
+
+    binary = rng.integers(0, 2, size=1000)
+    records = score_predictions([focal], [predictions[0]], binary, n_jobs=1)
+    assert records[0]["model"] == "0"
+    assert np.isclose(records[0]["value"], focal()(predictions[0], ArrayDataset(binary))[1])
@@ -0,0 +1,33 @@
+import importlib.util
+import pathlib
+
+
+spec = importlib.util.spec_from_file_location(
+    "run_benchmarks", pathlib.Path(__file__).parents[1] / "benchmarks" / "run_benchmarks.py"
+)
+run_benchmarks = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(run_benchmarks)
+
+
+def test_benchmarks_run():
+    """
+    Assert that every case runs and is recorded for each dtype and backend.
+    """
+    results = run_benchmarks.run_benchmarks(sizes=[1000], backends=["numpy"], min_time=0.)
+    assert len(results) == 2 * len(run_benchmarks.CASES)
+    for record in results:
+        assert record["seconds"] > 0
+        assert record["rows_per_second"] == 1000 / record["seconds"]
+
+
+def test_compare_flags_regressions():
+    baseline = run_benchmarks.run_benchmarks(sizes=[1000], dtypes=["float64"], backends=["numpy"],
+                                             cases=["SPELoss"], min_time=0.)
+    assert run_benchmarks.compare(baseline, baseline) == []
+
+    slower = [{**baseline[0], "seconds": baseline[0]["seconds"] * 2}]
+    assert len(run_benchmarks.compare(slower, baseline, threshold=0.5)) == 1
+    assert run_benchmarks.compare(slower, baseline, threshold=1.5) == []
+
+    larger = [{**baseline[0], "peak_bytes": baseline[0]["peak_bytes"] * 2 + 2 ** 20}]
+    assert len(run_benchmarks.compare(larger, baseline)) == 1
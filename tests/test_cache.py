@@ -0,0 +1,107 @@
+import gc
+import weakref
+import numpy as np
+import pytest
+from bokbokbok.eval_metrics.regression import LogCoshMetric
+from bokbokbok.loss_functions.classification import WeightedFocalLoss, WeightedCrossEntropyLoss
+from bokbokbok.loss_functions.regression import LogCoshLoss, SPELoss
+from bokbokbok.utils.cache import DatasetCache
+
+
+class CountingDataset:
+    """Minimal stand-in for a XGBoost / LightGBM dataset counting label fetches."""
+
+    def __init__(self, label):
+        self.label = label
+        self.calls = 0
+
+    def get_label(self):
+        self.calls += 1
+        return self.label
+
+
+@pytest.mark.parametrize("factory", [
+    lambda cache: WeightedCrossEntropyLoss(alpha=3.0, cache=cache),
+    lambda cache: WeightedFocalLoss(alpha=0.5, gamma=2.0, cache=cache),
+    lambda cache: LogCoshLoss(cache=cache),
+    lambda cache: SPELoss(cache=cache),
+])
+def test_cached_loss_matches_uncached(factory):
+    """
+    Assert that caching does not change the gradient and hessian, fetches the labels once
+    and reuses the output buffers.
+    """
+    rng = np.random.default_rng(41114)
+    y = rng.integers(1, 3, size=1000).astype(float)
+    dtrain = CountingDataset(y)
+    cached_loss = factory(True)
+    loss = factory(False)
+
+    for _ in range(3):
+        yhat = rng.normal(size=1000)
+        grad, hess = cached_loss(yhat, dtrain)
+        expected_grad, expected_hess = loss(yhat, CountingDataset(y))
+        assert np.allclose(grad, expected_grad)
+        assert np.allclose(hess, expected_hess)
+
+    assert dtrain.calls == 1
+    assert cached_loss(yhat, dtrain)[0] is grad
+
+
+def test_cache_evicts_collected_datasets():
+    """
+    Assert that entries disappear with their dataset.
+    """
+    cache = DatasetCache()
+    dtrain = CountingDataset(np.ones(10))
+    cache.get(dtrain)
+    assert len(cache) == 1
+
+    del dtrain
+    gc.collect()
+    assert len(cache) == 0
+
+
+def test_dropped_loss_releases_entries():
+    """
+    Assert that a discarded cached loss frees its label terms and buffers while the dataset lives on.
+    """
+    dtrain = CountingDataset(np.ones(1000))
+    grad, hess = WeightedFocalLoss(cache=True)(np.zeros(1000), dtrain)
+    buffers = [weakref.ref(grad), weakref.ref(hess)]
+
+    del grad, hess
+    gc.collect()
+    assert all(buffer() is None for buffer in buffers)
+
+
+def test_cache_does_not_keep_label_arrays():
+    """
+    Assert that label arrays passed as the dataset are not kept alive by the cache.
+    """
+    cache = DatasetCache()
+    for dtype in [float, int]:
+        labels = np.ones(10, dtype=dtype)
+        label_ref = weakref.ref(labels)
+        cache.get(labels)
+
+        del labels
+        gc.collect()
+        assert label_ref() is None
+        assert len(cache) == 0
+
+
+def test_metric_cache_is_opt_in():
+    """
+    Assert that metrics fetch the labels on every call unless built with cache=True.
+    """
+    dtrain = CountingDataset(np.ones(1000))
+    metric, cached_metric = LogCoshMetric(), LogCoshMetric(cache=True)
+    for _ in range(3):
+        metric(np.zeros(1000), dtrain)
+    assert dtrain.calls == 3
+
+    before = cached_metric(np.zeros(1000), dtrain)[1]
+    dtrain.label = np.zeros(1000)
+    assert metric(np.zeros(1000), dtrain)[1] == 0
+    assert cached_metric(np.zeros(1000), dtrain)[1] == before
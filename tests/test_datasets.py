@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import lightgbm as lgb
+from bokbokbok.eval_metrics.classification import QuadraticWeightedKappaMetric, WeightedFocalMetric
+from bokbokbok.loss_functions.classification import MulticlassWeightedCrossEntropyLoss, WeightedFocalLoss
+from bokbokbok.utils import ArrayDataset
+from bokbokbok.utils.datasets import dataset_arrays, eval_result, num_rows
+
+
+rng = np.random.default_rng(41114)
+y = rng.integers(0, 2, size=500)
+yhat = rng.normal(size=500)
+weight = rng.uniform(size=500)
+
+
+def test_dataset_arrays():
+    """
+    Assert that labels and weights come out as contiguous float arrays, whatever holds them.
+    """
+    for dataset in [ArrayDataset(y, weight),
+                    ArrayDataset(y[::-1][::-1].tolist(), weight),
+                    lgb.Dataset(np.zeros((500, 1)), label=y, weight=weight).construct()]:
+        label, w = dataset_arrays(dataset)
+        assert label.flags.c_contiguous and np.issubdtype(label.dtype, np.floating)
+        np.testing.assert_array_equal(label, y)
+        np.testing.assert_allclose(w, weight, rtol=1e-6)
+        assert num_rows(dataset) == 500
+
+    label, w = dataset_arrays(y)
+    assert label.dtype == np.float64 and w is None
+    assert num_rows(y) == 500
+
+
+def test_memmap_labels(tmp_path):
+    """
+    Assert that memmapped labels are used in place.
+    """
+    labels = np.memmap(tmp_path / "labels.dat", dtype=np.float32, mode="w+", shape=(500,))
+    labels[:] = y
+    dataset = ArrayDataset(labels)
+    assert np.shares_memory(dataset.get_label(), labels)
+
+    expected = WeightedFocalMetric()(yhat, ArrayDataset(y.astype(np.float32)))
+    assert WeightedFocalMetric()(yhat, dataset) == expected
+
+
+def test_losses_and_metrics_take_arrays():
+    """
+    Assert that the closures run on ArrayDatasets and plain label arrays as on framework datasets.
+    """
+    lgb_dataset = lgb.Dataset(np.zeros((500, 1)), label=y, weight=weight).construct()
+    np.testing.assert_allclose(WeightedFocalLoss()(yhat, ArrayDataset(y, weight)),
+                               WeightedFocalLoss()(yhat, lgb_dataset))
+    np.testing.assert_allclose(WeightedFocalLoss()(yhat, y), WeightedFocalLoss()(yhat, ArrayDataset(y)))
+
+    multiclass_y = rng.integers(0, 3, size=500)
+    margins = rng.normal(size=(3, 500))
+    assert (QuadraticWeightedKappaMetric()(margins.ravel(), multiclass_y) ==
+            QuadraticWeightedKappaMetric(XGBoost=True)(margins.T, multiclass_y) + (True,))
+    grad, _ = MulticlassWeightedCrossEntropyLoss()(margins.ravel(), ArrayDataset(multiclass_y))
+    assert grad.shape == (1500,)
+
+
+def test_weight_length_is_checked():
+    with pytest.raises(ValueError):
+        ArrayDataset(y, weight[:10])
+
+
+def test_eval_result():
+    assert eval_result("F1", 0.5, True, XGBoost=False) == ("F1", 0.5, True)
+    assert eval_result("F1", 0.5, True, XGBoost=True) == ("F1", 0.5)
@@ -0,0 +1,46 @@
+import multiprocessing
+import numpy as np
+import pytest
+from bokbokbok.eval_metrics.distributed import evaluate_partitions, partition_statistics, reduce_statistics
+from bokbokbok.eval_metrics.streaming import F1Accumulator
+
+# Uneven partitions, including an empty one
+bounds = [0, 100, 100, 450, 1000]
+
+
+def _partitions(y, yhat, w=None):
+    return [(y[start:end], yhat[start:end]) + (() if w is None else (w[start:end],))
+            for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def test_partitions_match_whole_data(metric_case, problems):
+    """
+    Assert that partition statistics computed in worker processes reduce to the statistics of all
+    rows at once, with and without sample weights.
+    """
+    accumulator, params, _, y, yhat = metric_case
+    weight = problems.weight
+    empty = accumulator(**params)
+    with multiprocessing.Pool(2) as pool:
+        score = evaluate_partitions(empty, _partitions(y, yhat), map_func=pool.map)
+        weighted_score = evaluate_partitions(empty, _partitions(y, yhat, weight), map_func=pool.map)
+
+    assert np.isclose(score, accumulator(**params).update(y, yhat).result())
+    assert np.isclose(weighted_score, accumulator(**params).update(y, yhat, weight).result())
+    # The accumulator passed in stays empty
+    assert evaluate_partitions(empty, _partitions(y, yhat)) == score
+
+
+def test_reduce_statistics(problems):
+    """
+    Assert that reducing leaves the partition statistics untouched and needs at least one partition.
+    """
+    statistics = [partition_statistics(F1Accumulator(), y, yhat) for y, yhat in _partitions(*problems.probabilities)]
+    counts = [s.counts.copy() for s in statistics]
+
+    total = reduce_statistics(statistics)
+    assert np.array_equal(total.counts, np.sum(counts, axis=0))
+    assert all(np.array_equal(s.counts, c) for s, c in zip(statistics, counts))
+
+    with pytest.raises(ValueError):
+        reduce_statistics([])
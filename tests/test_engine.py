@@ -0,0 +1,113 @@
+import tracemalloc
+import numpy as np
+import pytest
+from bokbokbok.eval_metrics.classification import WeightedCrossEntropyMetric, WeightedFocalMetric
+from bokbokbok.eval_metrics.regression import LogCoshMetric, RMSPEMetric
+from bokbokbok.loss_functions.classification import WeightedCrossEntropyLoss, WeightedFocalLoss
+from bokbokbok.loss_functions.regression import LogCoshLoss, SPELoss
+from bokbokbok.utils import ArrayDataset, config_context
+from bokbokbok.utils.engine import blocks
+
+
+losses = [
+    (WeightedCrossEntropyLoss(alpha=3.0), "binary"),
+    (WeightedCrossEntropyLoss(alpha=3.0, cache=True), "binary"),
+    (WeightedFocalLoss(alpha=0.5, gamma=2.0), "binary"),
+    (LogCoshLoss(), "regression"),
+    (SPELoss(cache=True), "regression"),
+]
+
+metrics = [
+    (WeightedCrossEntropyMetric(alpha=3.0), "binary"),
+    (WeightedFocalMetric(alpha=0.5, gamma=2.0), "binary"),
+    (LogCoshMetric(), "regression"),
+    (RMSPEMetric(), "regression"),
+]
+
+
+def test_blocks():
+    assert blocks(10, None) == [slice(None)]
+    assert blocks(10, 10) == [slice(None)]
+    assert blocks(10, 4) == [slice(0, 4), slice(4, 8), slice(8, 12)]
+
+
+@pytest.mark.parametrize("loss, data", losses, indirect=["data"])
+def test_chunked_losses(loss, data):
+    """
+    Assert that processing the rows in chunks gives the same gradient and hessian.
+    """
+    yhat, dtrain = data
+    grad, hess = (a.copy() for a in loss(yhat, dtrain))
+    with config_context(chunk_size=1000):
+        chunked_grad, chunked_hess = loss(yhat, dtrain)
+
+    assert np.array_equal(grad, chunked_grad)
+    assert np.array_equal(hess, chunked_hess)
+
+
+@pytest.mark.parametrize("metric, data", metrics, indirect=["data"])
+def test_chunked_metrics(metric, data):
+    """
+    Assert that processing the rows in chunks gives the same metric.
+    """
+    yhat, dtrain = data
+    _, score, _ = metric(yhat, dtrain)
+    with config_context(chunk_size=1000):
+        _, chunked_score, _ = metric(yhat, dtrain)
+
+    assert np.isclose(score, chunked_score, rtol=1e-12)
+
+
+def test_chunked_peak_memory():
+    """
+    Assert that chunking bounds the temporaries of the NumPy focal loss.
+    """
+    loss = WeightedFocalLoss(alpha=0.5, gamma=2.0, cache=True)
+    rng = np.random.default_rng(41114)
+    yhat = rng.normal(size=1_000_000)
+    dtrain = ArrayDataset(rng.integers(0, 2, size=1_000_000).astype(float))
+    loss(yhat, dtrain)
+
+    def peak():
+        tracemalloc.start()
+        loss(yhat, dtrain)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    with config_context(backend="numpy"):
+        full = peak()
+        with config_context(chunk_size=10_000):
+            chunked = peak()
+
+    assert chunked < full / 10
+
+
+@pytest.mark.parametrize("loss, data", losses, indirect=["data"])
+@pytest.mark.parametrize("chunk_size", [None, 1000])
+def test_threaded_losses(loss, data, chunk_size, monkeypatch):
+    """
+    Assert that splitting the rows over threads gives the same gradient and hessian.
+    """
+    monkeypatch.setattr("bokbokbok.utils.engine.MIN_ROWS_PER_JOB", 100)
+    yhat, dtrain = data
+    grad, hess = (a.copy() for a in loss(yhat, dtrain))
+    with config_context(n_jobs=4, chunk_size=chunk_size or 0):
+        threaded_grad, threaded_hess = loss(yhat, dtrain)
+
+    assert np.array_equal(grad, threaded_grad)
+    assert np.array_equal(hess, threaded_hess)
+
+
+@pytest.mark.parametrize("metric, data", metrics, indirect=["data"])
+def test_threaded_metrics(metric, data, monkeypatch):
+    """
+    Assert that splitting the rows over threads gives the same metric.
+    """
+    monkeypatch.setattr("bokbokbok.utils.engine.MIN_ROWS_PER_JOB", 100)
+    yhat, dtrain = data
+    _, score, _ = metric(yhat, dtrain)
+    with config_context(n_jobs=-1):
+        _, threaded_score, _ = metric(yhat, dtrain)
+
+    assert np.isclose(score, threaded_score, rtol=1e-12)
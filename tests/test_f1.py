@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from sklearn.metrics import f1_score
+from bokbokbok.eval_metrics.classification import F1_Score_Binary
+from bokbokbok.utils import ArrayDataset
+
+
+rng = np.random.default_rng(41114)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"average": "binary", "pos_label": 0},
+    {"average": "micro"},
+    {"average": "macro"},
+    {"average": "weighted"},
+    {"average": None},
+])
+@pytest.mark.parametrize("y, yhat", [
+    (rng.integers(0, 2, size=1000), rng.uniform(size=1000)),
+    (np.ones(100), rng.uniform(size=100)),
+    (np.zeros(100), np.zeros(100)),
+    (np.array([0., 1., 1., 0.]), np.array([0.5, 0.51, 0.49, 0.])),
+])
+def test_native_f1_matches_sklearn(kwargs, y, yhat):
+    """
+    Assert that the native F1 path gives the same score as scikit-learn.
+    """
+    kwargs = {"zero_division": 0.0, **kwargs}
+    _, score, higher_is_better = F1_Score_Binary(**kwargs)(yhat, ArrayDataset(y.astype(np.float32)))
+    expected = f1_score(y, np.round(yhat), **kwargs)
+
+    assert higher_is_better
+    assert np.allclose(score, expected)
+
+
+def test_f1_falls_back_to_sklearn():
+    """
+    Assert that unsupported arguments and non-binary labels go through scikit-learn.
+    """
+    y = rng.integers(0, 3, size=100).astype(float)
+    yhat = rng.uniform(0, 2, size=100)
+    _, score = F1_Score_Binary(XGBoost=True, average="macro")(yhat, ArrayDataset(y))
+    assert np.isclose(score, f1_score(y, np.round(yhat), average="macro"))
+
+    y = rng.integers(0, 2, size=100).astype(float)
+    weights = rng.uniform(size=100)
+    metric = F1_Score_Binary(sample_weight=weights)
+    _, score, _ = metric(yhat.clip(0, 1), ArrayDataset(y))
+    assert np.isclose(score, f1_score(y, np.round(yhat.clip(0, 1)), sample_weight=weights))
@@ -5,6 +5,7 @@ from sklearn.metrics import mean_absolute_error
 from bokbokbok.loss_functions.classification import WeightedFocalLoss, WeightedCrossEntropyLoss
 from bokbokbok.eval_metrics.classification import WeightedFocalMetric, WeightedCrossEntropyMetric
 from bokbokbok.utils import clip_sigmoid
+from bokbokbok.utils.kernels import focal_elements, focal_grad_hess, focal_terms
 import lightgbm as lgb
 
 
@@ -120,3 +121,65 @@ def test_focal_wce_comparison():
     wfl_preds = clip_sigmoid(wfl_clf.predict(X_valid))
     wce_preds = clip_sigmoid(wce_clf.predict(X_valid))
     assert np.isclose(mean_absolute_error(wfl_preds, wce_preds), 0.0)
+
+
+def _reference_focal_grad_hess(yhat, y, alpha, gamma):
+    """The original, unfused Weighted Focal Loss formulas."""
+    yhat = clip_sigmoid(yhat)
+    grad = (
+            alpha * y * np.power(1 - yhat, gamma) * (gamma * yhat * np.log(yhat) + yhat - 1) +
+            (1 - y) * np.power(yhat, gamma) * (yhat - gamma * np.log(1 - yhat) * (1 - yhat))
+            )
+    hess = (
+            alpha * y * yhat * np.power(1 - y,
+                                        gamma) * (gamma * (1 - yhat) * np.log(yhat) + 2 * gamma * (1 - yhat) -
+                                                  np.power(gamma, 2) * yhat * np.log(yhat) + 1 - yhat) +
+            (1 - y) * np.power(yhat, gamma + 1) * (1 - yhat) * (2 * gamma + gamma * (np.log(1 - yhat)) + 1)
+            )
+    return grad, hess
+
+
+def test_focal_fused_kernel():
+    """
+    Assert that the fused gradient and hessian match the original formulas
+    and are written into the given output buffers.
+    """
+    rng = np.random.default_rng(41114)
+    yhat = rng.normal(scale=5, size=10_000)
+    y = rng.integers(0, 2, size=10_000).astype(float)
+
+    for alpha, gamma in [(1.0, 0.0), (3.0, 0.0), (0.25, 2.0), (2.0, 0.5)]:
+        expected_grad, expected_hess = _reference_focal_grad_hess(yhat, y, alpha, gamma)
+
+        grad = np.empty_like(yhat)
+        hess = np.empty_like(yhat)
+        terms = focal_terms(y, alpha=alpha, gamma=gamma)
+        out_grad, out_hess = focal_grad_hess(yhat, terms, gamma=gamma, grad=grad, hess=hess)
+
+        assert out_grad is grad
+        assert out_hess is hess
+        assert np.allclose(grad, expected_grad, rtol=1e-10, atol=1e-12)
+        assert np.allclose(hess, expected_hess, rtol=1e-10, atol=1e-12)
+
+
+def test_focal_log_space():
+    """
+    Assert that the gradient is the derivative of the metric, and that both stay finite and
+    unsaturated for large margins, where the probabilities used to be clipped.
+    """
+    rng = np.random.default_rng(41114)
+    yhat = np.concatenate([rng.normal(scale=5, size=1000), [-800., -60., 60., 800.]])
+    y = np.concatenate([rng.integers(0, 2, size=1000), [1., 1., 0., 0.]]).astype(float)
+
+    for alpha, gamma in [(1.0, 0.0), (0.25, 2.0), (2.0, 0.5)]:
+        grad, hess = focal_grad_hess(yhat, focal_terms(y, alpha=alpha, gamma=gamma), gamma=gamma)
+        elements = focal_elements(yhat, y, alpha=alpha, gamma=gamma)
+        assert np.all(np.isfinite(grad)) and np.all(np.isfinite(hess)) and np.all(np.isfinite(elements))
+
+        h = 1e-6
+        numerical = (focal_elements(yhat + h, y, alpha=alpha, gamma=gamma) -
+                     focal_elements(yhat - h, y, alpha=alpha, gamma=gamma)) / (2 * h)
+        assert np.allclose(grad, numerical, rtol=1e-6, atol=1e-8)
+
+    # Cross entropy of a margin of -60 for a positive label, instead of the clipped - log(1e-15)
+    assert np.isclose(focal_elements(np.array([-60.]), np.array([1.]), alpha=1.0, gamma=0.0)[0], 60.)
@@ -0,0 +1,33 @@
+import importlib.util
+import pathlib
+import pytest
+import bokbokbok.eval_metrics.classification as classification_metrics
+
+
+spec = importlib.util.spec_from_file_location(
+    "import_time", pathlib.Path(__file__).parents[1] / "benchmarks" / "import_time.py"
+)
+import_time = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(import_time)
+
+
+def test_imports_are_light():
+    """
+    Assert that importing losses and metrics does not import scikit-learn, scipy or numba.
+    """
+    for statement in import_time.IMPORTS:
+        result = import_time.measure_import(statement, repeat=1)
+        assert result["heavy_modules"] == [], statement
+        assert result["seconds"] > 0
+
+
+def test_lazy_attributes():
+    """
+    Assert that the lazily imported metrics behave like regular attributes.
+    """
+    from bokbokbok.eval_metrics.classification.binary_eval_metrics import WeightedFocalMetric
+
+    assert classification_metrics.WeightedFocalMetric is WeightedFocalMetric
+    assert set(classification_metrics.__all__) <= set(dir(classification_metrics))
+    with pytest.raises(AttributeError):
+        classification_metrics.WeightedFocalLoss
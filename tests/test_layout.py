@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from bokbokbok.utils.layout import argmax_classes, as_matrix, is_class_major, restore_layout
+
+
+rng = np.random.default_rng(41114)
+
+
+@pytest.mark.parametrize("num_class", [1, 2, 5])
+def test_argmax_classes(num_class):
+    """
+    Assert that the most likely class is found in both layouts, ties going to the first class.
+    """
+    yhat = rng.integers(0, 3, size=(500, num_class)).astype(float)
+    expected = yhat.argmax(axis=1)
+
+    np.testing.assert_array_equal(argmax_classes(yhat), expected)
+    np.testing.assert_array_equal(argmax_classes(np.asfortranarray(yhat)), expected)
+
+
+def test_as_matrix_is_a_view():
+    """
+    Assert that flat predictions are viewed in the layout of their framework, and restored.
+    """
+    yhat = rng.normal(size=(50, 3))
+
+    class_major = as_matrix(yhat.T.ravel(), 50, class_major=True)
+    assert is_class_major(class_major)
+    np.testing.assert_array_equal(class_major, yhat)
+    assert np.shares_memory(restore_layout(class_major, yhat.T.ravel(), class_major=True), class_major)
+
+    flat = yhat.ravel()
+    row_major = as_matrix(flat, 50, class_major=False)
+    assert not is_class_major(row_major)
+    np.testing.assert_array_equal(row_major, yhat)
+    np.testing.assert_array_equal(restore_layout(row_major, flat, class_major=False), flat)
+
+    assert as_matrix(yhat, 50, class_major=True) is yhat
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from bokbokbok.eval_metrics.regression import LogCoshMetric
+from bokbokbok.loss_functions.regression import LogCoshLoss
+from bokbokbok.utils import ArrayDataset
+from bokbokbok.utils.backends import available_backends, get_kernel
+from bokbokbok.utils.kernels import log_cosh_elements, log_cosh_grad_hess, log_cosh_terms
+
+
+rng = np.random.default_rng(41114)
+y = rng.uniform(1, 10, size=1000)
+yhat = y + rng.normal(scale=3, size=1000)
+weight = rng.uniform(0.5, 2, size=1000)
+outliers = np.array([-1e5, -1e3, -800., 0., 800., 1e3, 1e5])
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("sample_weight", [None, weight])
+def test_log_cosh_grad_hess(backend, sample_weight):
+    """
+    Assert that the gradient and the hessian derived from it match -tanh and 1 / cosh^2.
+    """
+    w = 1. if sample_weight is None else sample_weight
+    kernel = get_kernel(log_cosh_grad_hess, backend)
+    grad, hess = kernel(yhat, log_cosh_terms(y, weight=sample_weight))
+
+    assert np.allclose(grad, -w * np.tanh(y - yhat))
+    assert np.allclose(hess, w / np.cosh(y - yhat) ** 2)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_log_cosh_overflow(backend):
+    """
+    Assert that residuals far beyond the range of cosh give finite gradients, hessians and metric values.
+    """
+    zeros = np.zeros_like(outliers)
+    grad, hess = get_kernel(log_cosh_grad_hess, backend)(outliers, log_cosh_terms(zeros))
+    elements = get_kernel(log_cosh_elements, backend)(outliers, zeros)
+
+    assert np.array_equal(grad, np.sign(outliers))
+    assert np.all(np.isfinite(hess)) and np.all(hess >= 0)
+    assert np.allclose(np.delete(elements, 3), np.abs(np.delete(outliers, 3)) - np.log(2.))
+    assert elements[3] == 0
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_log_cosh_elements(backend):
+    """
+    Assert that the overflow-safe metric values match log(cosh) where it does not overflow.
+    """
+    elements = get_kernel(log_cosh_elements, backend)(yhat, y)
+    assert np.allclose(elements, np.log(np.cosh(yhat - y)), rtol=1e-12, atol=1e-15)
+
+
+def test_log_cosh_outliers():
+    """
+    Assert that the loss and metric stay finite on data with outliers.
+    """
+    labels = np.append(y, [1e4, -1e4])
+    dataset = ArrayDataset(labels)
+    predictions = np.append(yhat, [0., 0.])
+
+    grad, hess = LogCoshLoss()(predictions, dataset)
+    value = LogCoshMetric()(predictions, dataset)[1]
+
+    assert np.all(np.isfinite(grad)) and np.all(np.isfinite(hess))
+    assert np.isfinite(value)
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from bokbokbok.loss_functions.classification import (
+    MulticlassWeightedCrossEntropyLoss,
+    MulticlassWeightedFocalLoss,
+)
+from bokbokbok.utils import ArrayDataset, config_context
+import lightgbm as lgb
+
+
+rng = np.random.default_rng(41114)
+n, num_class = 200, 4
+margins = rng.normal(scale=2, size=(n, num_class))
+labels = rng.integers(0, num_class, size=n).astype(float)
+alpha = (0.5, 1.0, 2.0, 3.0)
+
+
+def reference_loss(z, gamma):
+    p = np.exp(z - z.max(axis=1, keepdims=True))
+    p /= p.sum(axis=1, keepdims=True)
+    p_y = p[np.arange(n), labels.astype(int)]
+    return - np.asarray(alpha)[labels.astype(int)] * (1 - p_y) ** gamma * np.log(p_y)
+
+
+@pytest.mark.parametrize("gamma", [0., 0.5, 2.0, 3.0])
+def test_multiclass_focal_derivatives(gamma):
+    """
+    Assert that the gradient and diagonal hessian match finite differences of the loss.
+    """
+    grad, hess = MulticlassWeightedFocalLoss(alpha=alpha, gamma=gamma)(margins, ArrayDataset(labels))
+
+    step = 1e-4
+    for j in range(num_class):
+        shift = np.zeros_like(margins)
+        shift[:, j] = step
+        up, mid, down = (reference_loss(margins + shift, gamma),
+                         reference_loss(margins, gamma),
+                         reference_loss(margins - shift, gamma))
+        np.testing.assert_allclose(grad[:, j], (up - down) / (2 * step), atol=1e-6)
+        np.testing.assert_allclose(hess[:, j], (up - 2 * mid + down) / step ** 2, atol=1e-5)
+
+
+def test_multiclass_wce_is_focal_with_gamma_zero():
+    dataset = ArrayDataset(labels)
+    wce = MulticlassWeightedCrossEntropyLoss(alpha=alpha)(margins, dataset)
+    focal = MulticlassWeightedFocalLoss(alpha=alpha, gamma=0.)(margins, dataset)
+    np.testing.assert_allclose(wce, focal, atol=1e-12)
+
+
+@pytest.mark.parametrize("loss", [MulticlassWeightedCrossEntropyLoss(alpha=alpha),
+                                  MulticlassWeightedFocalLoss(alpha=alpha, cache=True)])
+def test_multiclass_layouts(loss):
+    """
+    Assert that the LightGBM (class-major) and XGBoost (row-major) layouts, as matrices or flat,
+    give the same gradient and hessian, handed back in the layout they came in.
+    """
+    dataset = ArrayDataset(labels)
+    expected_grad, expected_hess = (a.copy() for a in loss(margins, dataset, XGBoost=True))
+
+    class_major = np.asfortranarray(margins)
+    grad, hess = loss(class_major, dataset)
+    assert grad.flags.f_contiguous and hess.flags.f_contiguous
+    np.testing.assert_allclose(grad, expected_grad)
+    np.testing.assert_allclose(hess, expected_hess)
+
+    grad, hess = loss(margins.T.ravel(), dataset)
+    np.testing.assert_allclose(grad, expected_grad.T.ravel())
+    np.testing.assert_allclose(hess, expected_hess.T.ravel())
+
+    grad, hess = loss(margins.ravel(), dataset, XGBoost=True)
+    np.testing.assert_allclose(grad, expected_grad.ravel())
+    np.testing.assert_allclose(hess, expected_hess.ravel())
+
+    with config_context(chunk_size=33):
+        grad, hess = loss(class_major, dataset)
+    np.testing.assert_allclose(grad, expected_grad)
+    np.testing.assert_allclose(hess, expected_hess)
+
+
+def test_multiclass_focal_lgb_implementation():
+    """
+    Assert that LightGBM trains with the multiclass focal loss about as well as with its own
+    multiclass objective.
+    """
+    X, y = make_classification(n_samples=1500,
+                               n_features=10,
+                               n_informative=6,
+                               n_classes=num_class,
+                               random_state=41114)
+
+    X_train, X_valid, y_train, y_valid = train_test_split(X,
+                                                          y,
+                                                          test_size=0.25,
+                                                          random_state=41114)
+
+    params = {
+        "n_estimators": 100,
+        "num_class": num_class,
+        "seed": 41114,
+        "verbose": -1,
+    }
+
+    focal_clf = lgb.train(params={**params, "objective": MulticlassWeightedFocalLoss(gamma=1.0)},
+                          train_set=lgb.Dataset(X_train, y_train))
+    clf = lgb.train(params={**params, "objective": "multiclass"},
+                    train_set=lgb.Dataset(X_train, y_train))
+
+    focal_accuracy = accuracy_score(y_valid, focal_clf.predict(X_valid).argmax(axis=1))
+    accuracy = accuracy_score(y_valid, clf.predict(X_valid).argmax(axis=1))
+    assert focal_accuracy > accuracy - 0.05
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from bokbokbok.eval_metrics.classification import WeightedCrossEntropyMetric, WeightedFocalMetric
+from bokbokbok.eval_metrics.regression import LogCoshMetric, RMSPEMetric
+from bokbokbok.loss_functions.classification import WeightedCrossEntropyLoss, WeightedFocalLoss
+from bokbokbok.loss_functions.regression import LogCoshLoss, SPELoss
+from bokbokbok.utils import config_context, get_config
+
+
+@pytest.mark.parametrize("loss, data", [
+    (WeightedCrossEntropyLoss(alpha=3.0), "binary"),
+    (WeightedFocalLoss(alpha=0.5, gamma=2.0), "binary"),
+    (LogCoshLoss(), "regression"),
+    (SPELoss(), "regression"),
+], indirect=["data"])
+def test_float32_losses(loss, data):
+    """
+    Assert that float32 gradients and hessians stay close to the float64 reference.
+    """
+    yhat, dtrain = data
+    dtrain.label = dtrain.label.astype(np.float32)
+    grad64, hess64 = loss(yhat, dtrain)
+    with config_context(dtype=np.float32):
+        grad32, hess32 = loss(yhat, dtrain)
+
+    assert grad32.dtype == np.float32 and hess32.dtype == np.float32
+    assert np.allclose(grad32, grad64, rtol=1e-4, atol=1e-5)
+    assert np.allclose(hess32, hess64, rtol=1e-4, atol=1e-5)
+
+
+@pytest.mark.parametrize("metric, data", [
+    (WeightedCrossEntropyMetric(alpha=3.0), "binary"),
+    (WeightedFocalMetric(alpha=0.5, gamma=2.0), "binary"),
+    (LogCoshMetric(), "regression"),
+    (RMSPEMetric(), "regression"),
+], indirect=["data"])
+def test_float32_metrics(metric, data):
+    """
+    Assert that float32 metrics stay close to the float64 reference.
+    """
+    yhat, dtrain = data
+    dtrain.label = dtrain.label.astype(np.float32)
+    name64, score64, _ = metric(yhat, dtrain)
+    with config_context(dtype=np.float32):
+        name32, score32, _ = metric(yhat, dtrain)
+
+    assert name32 == name64
+    assert np.isclose(score32, score64, rtol=1e-5)
+
+
+def test_config_context_restores():
+    with config_context(dtype="float32"):
+        assert get_config()["dtype"] is np.float32
+    assert get_config()["dtype"] is np.float64
+
+    with pytest.raises(ValueError):
+        with config_context(dtype=np.int32):
+            pass
@@ -0,0 +1,84 @@
+import inspect
+import numpy as np
+import lightgbm as lgb
+from bokbokbok.eval_metrics.classification import WeightedFocalMetric
+from bokbokbok.loss_functions.classification import WeightedFocalLoss
+from bokbokbok.utils import ArrayDataset, disable_profiling, enable_profiling, get_profile, profile
+
+
+rng = np.random.default_rng(41114)
+y = rng.integers(0, 2, size=1000)
+yhat = rng.normal(size=1000)
+
+
+def test_profile():
+    """
+    Assert that calls, rows and latencies are recorded per factory while profiling.
+    """
+    loss, metric = WeightedFocalLoss(), WeightedFocalMetric()
+    dataset = ArrayDataset(y)
+    with profile() as stats:
+        for _ in range(3):
+            loss(yhat, dataset)
+        metric(yhat, dataset)
+
+    assert set(stats) == {"WeightedFocalLoss", "WeightedFocalMetric"}
+    assert stats["WeightedFocalLoss"]["calls"] == 3
+    assert stats["WeightedFocalLoss"]["rows"] == 3000
+    assert stats["WeightedFocalMetric"]["calls"] == 1
+    assert 0 < stats["WeightedFocalLoss"]["max_seconds"] <= stats["WeightedFocalLoss"]["total_seconds"]
+    assert stats["WeightedFocalLoss"]["peak_bytes"] == 0
+    assert get_profile() == stats
+
+    loss(yhat, dataset)
+    assert get_profile()["WeightedFocalLoss"]["calls"] == 3
+
+
+def test_profile_callback_and_memory():
+    """
+    Assert that every call is handed to the callback, with the peak memory when traced.
+    """
+    records = []
+    enable_profiling(callback=lambda name, record: records.append((name, record)), trace_memory=True)
+    try:
+        grad, hess = WeightedFocalLoss()(yhat, ArrayDataset(y))
+        WeightedFocalLoss()(yhat[:10], ArrayDataset(y[:10]))
+    finally:
+        disable_profiling()
+
+    assert [name for name, _ in records] == ["WeightedFocalLoss"] * 2
+    assert records[0][1]["rows"] == 1000
+    assert records[0][1]["peak_bytes"] >= grad.nbytes + hess.nbytes
+    # Peaks are not summed over calls
+    assert get_profile()["WeightedFocalLoss"]["peak_bytes"] == max(record["peak_bytes"] for _, record in records)
+
+
+def test_profiled_closures():
+    """
+    Assert that profiled closures keep their results, names and signatures, as the frameworks use them.
+    """
+    metric = WeightedFocalMetric()
+    assert metric.__name__ == "focal_metric"
+    assert list(inspect.signature(metric).parameters)[:2] == ["yhat", "dtrain"]
+    assert WeightedFocalLoss.__doc__.strip().startswith("Calculates the")
+
+    dataset = ArrayDataset(y)
+    with profile():
+        profiled = metric(yhat, dataset)
+    assert profiled == metric(yhat, dataset)
+
+
+def test_profile_lightgbm():
+    """
+    Assert that profiling counts every boosting iteration.
+    """
+    train = lgb.Dataset(rng.normal(size=(1000, 3)), label=y)
+    with profile() as stats:
+        lgb.train(params={"objective": WeightedFocalLoss(), "verbose": -1},
+                  train_set=train,
+                  num_boost_round=5,
+                  valid_sets=[train],
+                  feval=WeightedFocalMetric())
+
+    assert stats["WeightedFocalLoss"]["calls"] == 5
+    assert stats["WeightedFocalMetric"]["calls"] == 5
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from sklearn.metrics import cohen_kappa_score
+from bokbokbok.eval_metrics.classification import QuadraticWeightedKappaMetric
+from bokbokbok.utils import ArrayDataset
+
+
+rng = np.random.default_rng(41114)
+
+
+@pytest.mark.parametrize("num_class", [2, 3, 7])
+def test_native_qwk_matches_sklearn(num_class):
+    """
+    Assert that the native QWK gives the same score as scikit-learn.
+    """
+    y = rng.integers(0, num_class, size=1000)
+    # Predictions correlated with the labels
+    yhat = rng.normal(size=(1000, num_class))
+    yhat[np.arange(1000), y] += 1.
+    expected = cohen_kappa_score(y, yhat.argmax(axis=1), weights="quadratic")
+
+    dtrain = ArrayDataset(y.astype(np.float32))
+    _, qwk = QuadraticWeightedKappaMetric(XGBoost=True)(yhat, dtrain)
+    assert np.isclose(qwk, expected)
+
+    # LightGBM passes the class-major layout, flat in older versions
+    _, qwk, higher_is_better = QuadraticWeightedKappaMetric()(yhat.T.ravel(), dtrain)
+    assert higher_is_better
+    assert np.isclose(qwk, expected)
+    _, qwk, _ = QuadraticWeightedKappaMetric()(np.asfortranarray(yhat), dtrain)
+    assert np.isclose(qwk, expected)
+
+
+def test_qwk_falls_back_to_sklearn():
+    """
+    Assert that labels other than 0, ..., num_class - 1 go through scikit-learn.
+    """
+    y = rng.choice([1., 3., 4.], size=100)
+    yhat = rng.normal(size=(100, 5))
+    _, qwk = QuadraticWeightedKappaMetric(XGBoost=True)(yhat, ArrayDataset(y))
+    assert np.isclose(qwk, cohen_kappa_score(y, yhat.argmax(axis=1), weights="quadratic"))
@@ -0,0 +1,104 @@
+import gc
+import weakref
+import numpy as np
+import pytest
+import lightgbm as lgb
+from sklearn.datasets import make_classification
+from bokbokbok.eval_metrics.classification import WeightedFocalMetric
+from bokbokbok.loss_functions.classification import WeightedFocalLoss
+from bokbokbok.utils import ArrayDataset, sklearn_api
+from bokbokbok.utils.datasets import _RECENT_DATASETS
+
+
+rng = np.random.default_rng(41114)
+y = rng.integers(0, 2, size=500).astype(float)
+yhat = rng.normal(size=500)
+weight = rng.uniform(size=500)
+
+
+def test_sklearn_api_matches_train_api():
+    """
+    Assert that the (y_true, y_pred) calling mode gives what the closures give.
+    """
+    loss = WeightedFocalLoss(alpha=2.0)
+    np.testing.assert_allclose(sklearn_api(loss)(y, yhat), loss(yhat, ArrayDataset(y)))
+    np.testing.assert_allclose(sklearn_api(loss)(y, yhat, weight), loss(yhat, ArrayDataset(y, weight)))
+
+    metric = WeightedFocalMetric(alpha=2.0)
+    assert sklearn_api(metric)(y, yhat) == metric(yhat, ArrayDataset(y))
+    xgb_metric = WeightedFocalMetric(alpha=2.0, XGBoost=True)
+    assert sklearn_api(xgb_metric, XGBoost=True)(y, yhat) == xgb_metric(yhat, ArrayDataset(y))[1]
+
+
+def test_sklearn_api_reuses_labels():
+    """
+    Assert that the same label array is only wrapped once, so that cached terms and buffers are reused.
+    """
+    loss = sklearn_api(WeightedFocalLoss(cache=True))
+    grad, _ = loss(y, yhat)
+    assert loss(y, yhat)[0] is grad
+    assert loss(y.copy(), yhat)[0] is not grad
+
+
+def test_sklearn_api_releases_labels():
+    """
+    Assert that only the last few label arrays are kept alive, however many fits the wrapper sees.
+    """
+    loss = sklearn_api(WeightedFocalLoss(cache=True))
+    label_refs = []
+    for _ in range(10):
+        labels = y.copy()
+        label_refs.append(weakref.ref(labels))
+        loss(labels, yhat)
+        loss(labels, yhat)
+    del labels
+    gc.collect()
+
+    assert sum(ref() is not None for ref in label_refs) <= _RECENT_DATASETS
+    assert label_refs[0]() is None
+
+
+def test_sklearn_api_reuses_xgboost_labels():
+    """
+    Assert that the fresh label copies XGBoost hands over at every iteration are matched by value.
+    """
+    loss = sklearn_api(WeightedFocalLoss(cache=True), XGBoost=True)
+    grad, _ = loss(y.astype(np.float32), yhat)
+    assert loss(y.astype(np.float32), yhat)[0] is grad
+    assert loss(1 - y.astype(np.float32), yhat)[0] is not grad
+
+    metric = sklearn_api(WeightedFocalMetric(XGBoost=True), XGBoost=True)
+    assert metric(y.copy(), yhat, weight.copy()) == metric(y.copy(), yhat, weight.copy())
+
+
+def test_lgbm_classifier():
+    """
+    Assert that the wrapped loss and metric run in LGBMClassifier.
+    """
+    X, labels = make_classification(n_samples=500, n_features=10, random_state=41114)
+
+    clf = lgb.LGBMClassifier(objective=sklearn_api(WeightedFocalLoss(gamma=0., cache=True)),
+                             n_estimators=20,
+                             verbose=-1)
+    clf.fit(X, labels, eval_set=[(X, labels)], eval_metric=sklearn_api(WeightedFocalMetric(gamma=0.)))
+
+    scores = clf.evals_result_["training"]["Focal_alpha1.0_gamma0.0"]
+    assert len(scores) == 20
+    assert scores[-1] < scores[0]
+
+
+def test_xgb_classifier():
+    """
+    Assert that the wrapped loss and metric run in XGBClassifier.
+    """
+    xgb = pytest.importorskip("xgboost")
+    X, labels = make_classification(n_samples=500, n_features=10, random_state=41114)
+
+    loss = sklearn_api(WeightedFocalLoss(gamma=0., cache=True), XGBoost=True)
+    metric = sklearn_api(WeightedFocalMetric(gamma=0., XGBoost=True), XGBoost=True)
+    clf = xgb.XGBClassifier(objective=loss, eval_metric=metric, n_estimators=20)
+    clf.fit(X, labels, eval_set=[(X, labels)], verbose=False)
+
+    scores = clf.evals_result()["validation_0"]["focal_metric"]
+    assert len(scores) == 20
+    assert scores[-1] < scores[0]
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import lightgbm as lgb
+from bokbokbok.eval_metrics.regression import RMSPEMetric
+from bokbokbok.eval_metrics.streaming import RMSPEAccumulator
+from bokbokbok.loss_functions.regression import SPELoss
+from bokbokbok.utils import ArrayDataset, config_context
+
+
+rng = np.random.default_rng(41114)
+y = rng.uniform(1, 10, size=1000)
+yhat = y + rng.normal(size=1000)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 300])
+def test_spe_constant_hessian(chunk_size):
+    """
+    Assert that the hessian is computed once per dataset and handed out read-only.
+    """
+    dataset = ArrayDataset(y)
+    loss = SPELoss(cache=True)
+    with config_context(chunk_size=chunk_size):
+        hess = loss(yhat + 1, dataset)[1]
+        grad, cached_hess = loss(yhat, dataset)
+        assert cached_hess is hess
+
+    assert not hess.flags.writeable
+    assert np.allclose(hess, 2 / y ** 2)
+    assert np.allclose(grad, -2 * (y - yhat) / y ** 2)
+
+
+def test_spe_lightgbm():
+    """
+    Assert that LightGBM accepts the read-only hessian.
+    """
+    X = rng.normal(size=(1000, 3))
+    train = lgb.Dataset(X, label=y)
+    booster = lgb.train(params={"objective": SPELoss(cache=True), "verbose": -1},
+                        train_set=train,
+                        num_boost_round=5)
+    assert np.all(np.isfinite(booster.predict(X)))
+
+
+def test_spe_zero_labels():
+    """
+    Assert that zero and near-zero labels raise unless the denominators are bounded by epsilon.
+    """
+    labels = y.copy()
+    labels[:3] = [0., 1e-200, -1e-200]
+    dataset = ArrayDataset(labels)
+
+    with pytest.raises(ValueError, match="3 labels"):
+        SPELoss()(yhat, dataset)
+    with pytest.raises(ValueError, match="3 labels"):
+        RMSPEMetric()(yhat, dataset)
+    with pytest.raises(ValueError):
+        RMSPEAccumulator().update(labels, yhat)
+
+    denominators = np.maximum(np.abs(labels), 0.5)
+    grad, hess = SPELoss(epsilon=0.5)(yhat, dataset)
+    assert np.allclose(grad, -2 * (labels - yhat) / denominators ** 2)
+    assert np.allclose(hess, 2 / denominators ** 2)
+
+    expected = np.sqrt(np.mean(((labels - yhat) / denominators) ** 2))
+    assert np.isclose(RMSPEMetric(epsilon=0.5)(yhat, dataset)[1], expected)
+    assert np.isclose(RMSPEAccumulator(epsilon=0.5).update(labels, yhat).result(), expected)
@@ -0,0 +1,53 @@
+import pickle
+import numpy as np
+import pytest
+from bokbokbok.eval_metrics.streaming import (
+    LogCoshAccumulator,
+    MetricAccumulator,
+    RMSPEAccumulator,
+    WeightedFocalAccumulator,
+)
+from bokbokbok.utils import ArrayDataset
+
+
+def test_streaming_matches_metric(metric_case):
+    """
+    Assert that streaming chunks into two accumulators and merging them gives the eval metric.
+    """
+    accumulator, params, metric, y, yhat = metric_case
+    name, expected = metric(yhat, ArrayDataset(y))[:2]
+
+    first, second = accumulator(**params), accumulator(**params)
+    for start in range(0, 600, 150):
+        first.update(y[start:start + 150], yhat[start:start + 150])
+    second.update(y[600:], yhat[600:])
+    # The state travels between processes
+    merged = first.merge(pickle.loads(pickle.dumps(second)))
+
+    assert merged.name == name
+    assert np.isclose(merged.result(), expected)
+
+
+def test_merge_rejects_other_metrics():
+    with pytest.raises(ValueError):
+        WeightedFocalAccumulator(gamma=1.0).merge(WeightedFocalAccumulator(gamma=2.0))
+    with pytest.raises(ValueError):
+        LogCoshAccumulator().merge(RMSPEAccumulator())
+    with pytest.raises(ValueError):
+        RMSPEAccumulator(epsilon=1.).merge(RMSPEAccumulator())
+
+
+def test_streaming_empty_chunks(metric_case):
+    """
+    Assert that empty chunks, as at the end of a file read in chunks, leave the result unchanged.
+    """
+    accumulator, params, _, y, yhat = metric_case
+    acc = accumulator(**params).update(y[:0], yhat[:0])
+    acc.update(y, yhat).update(y[:0], yhat[:0], np.ones(0))
+
+    assert np.isclose(acc.result(), accumulator(**params).update(y, yhat).result())
+
+
+def test_accumulator_is_abstract():
+    with pytest.raises(TypeError):
+        MetricAccumulator()
@@ -0,0 +1,41 @@
+import numpy as np
+from bokbokbok.eval_metrics.classification import (
+    WeightedCrossEntropyMetric,
+    WeightedFocalMetric,
+    weighted_cross_entropy_sweep,
+    weighted_focal_sweep,
+)
+from bokbokbok.utils import ArrayDataset, config_context
+
+
+rng = np.random.default_rng(1212)
+y = rng.integers(0, 2, size=5000).astype(float)
+yhat = rng.normal(scale=3, size=5000)
+alphas = [0.25, 0.5, 1.0, 3.0]
+gammas = [0.0, 0.5, 2.0]
+
+
+def test_focal_sweep():
+    """
+    Assert that every entry of the sweep is the Weighted Focal Metric with that alpha and gamma.
+    """
+    scores = weighted_focal_sweep(yhat, y, alphas, gammas)
+    assert scores.shape == (len(alphas), len(gammas))
+    for i, alpha in enumerate(alphas):
+        for j, gamma in enumerate(gammas):
+            expected = WeightedFocalMetric(alpha=alpha, gamma=gamma)(yhat, ArrayDataset(y))[1]
+            assert np.isclose(scores[i, j], expected)
+
+
+def test_wce_sweep():
+    """
+    Assert that every entry of the sweep is the Weighted Cross Entropy Metric with that alpha.
+    """
+    expected = [WeightedCrossEntropyMetric(alpha=alpha)(yhat, ArrayDataset(y))[1] for alpha in alphas]
+    np.testing.assert_allclose(weighted_cross_entropy_sweep(yhat, y, alphas), expected)
+
+
+def test_sweep_chunked():
+    scores = weighted_focal_sweep(yhat, y, alphas, gammas)
+    with config_context(chunk_size=999):
+        np.testing.assert_allclose(weighted_focal_sweep(yhat, y, alphas, gammas), scores)
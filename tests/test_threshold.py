@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from sklearn.metrics import precision_recall_curve
+from bokbokbok.eval_metrics.classification import (
+    BestF1ScoreMetric,
+    PrecisionAtKMetric,
+    RecallAtPrecisionMetric,
+)
+from bokbokbok.utils import ArrayDataset
+
+
+rng = np.random.default_rng(41114)
+y = rng.integers(0, 2, size=2000)
+dtrain = ArrayDataset(y.astype(np.float32))
+# Scores with plenty of ties, and with only 10 distinct values
+scores = [np.round(rng.normal(size=2000) + y, 2), rng.integers(0, 10, size=2000) + y]
+
+
+@pytest.mark.parametrize("yhat", scores)
+def test_best_f1(yhat):
+    """
+    Assert that the best F1 over all thresholds matches scikit-learn's precision-recall curve.
+    """
+    precision, recall, _ = precision_recall_curve(y, yhat)
+    f1 = 2 * precision * recall / np.maximum(precision + recall, 1e-300)
+
+    _, score, higher_is_better = BestF1ScoreMetric()(yhat, dtrain)
+    assert higher_is_better
+    assert np.isclose(score, f1.max())
+
+
+@pytest.mark.parametrize("yhat", scores)
+def test_recall_at_precision(yhat):
+    """
+    Assert that the recall at a fixed precision matches scikit-learn's precision-recall curve.
+    """
+    precision, recall, _ = precision_recall_curve(y, yhat)
+    _, score = RecallAtPrecisionMetric(0.7, XGBoost=True)(yhat, dtrain)
+    assert np.isclose(score, recall[precision >= 0.7].max())
+
+
+def test_precision_at_k():
+    """
+    Assert that the precision at k is the share of positives among the k highest scores.
+    """
+    yhat = rng.normal(size=2000) + y
+    top = np.argsort(yhat)[::-1][:100]
+    name, score, _ = PrecisionAtKMetric(100)(yhat, dtrain)
+    assert name == "Precision@100"
+    assert np.isclose(score, y[top].mean())
+
+
+def test_binned_thresholds():
+    """
+    Assert that bucketing the scores gives the same result when every bin holds one distinct score.
+    """
+    yhat = scores[1]
+    for metric in [BestF1ScoreMetric, lambda **kwargs: RecallAtPrecisionMetric(0.6, **kwargs),
+                   lambda **kwargs: PrecisionAtKMetric(500, **kwargs)]:
+        _, exact, _ = metric()(yhat, dtrain)
+        _, binned, _ = metric(bins=11)(yhat, dtrain)
+        assert np.isclose(exact, binned)
@@ -1,7 +1,60 @@
-
+import warnings
 import numpy as np
 from bokbokbok.utils import clip_sigmoid
+from bokbokbok.utils.functions import log_sigmoid_pair
 
 def test_clip_sigmoid():
     assert np.allclose(a=clip_sigmoid(np.array([100, 0, -100])),
-                       b=[1 - 1e-15, 0.5, 1e-15])
\ No newline at end of file
+                       b=[1 - 1e-15, 0.5, 1e-15])
+
+
+def test_clip_sigmoid_out():
+    """
+    Assert that the sigmoid is written into the given buffer, including the input itself.
+    """
+    yhat = np.array([-3., 0., 3.])
+    expected = 1. / (1. + np.exp(-yhat))
+
+    out = np.empty_like(yhat)
+    assert clip_sigmoid(yhat, out=out) is out
+    assert np.allclose(out, expected)
+
+    assert clip_sigmoid(yhat, out=yhat) is yhat
+    assert np.allclose(yhat, expected)
+
+
+def test_clip_sigmoid_large_margins():
+    """
+    Assert that margins overflowing the exponential neither warn nor leave the clipping range.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        p = clip_sigmoid(np.array([-1e5, -800., 800., 1e5]))
+        p32 = clip_sigmoid(np.array([-1e5, -100., 100., 1e5]), dtype=np.float32)
+
+    assert np.array_equal(p, [1e-15, 1e-15, 1 - 1e-15, 1 - 1e-15])
+    assert p32.dtype == np.float32
+    assert np.all(p32 > 0) and np.all(p32 < 1)
+
+
+def test_log_sigmoid_pair():
+    """
+    Assert that the log-space sigmoid matches the direct formulas and stays finite and accurate
+    for margins at which clipping used to kick in, without warnings.
+    """
+    yhat = np.concatenate([np.linspace(-30, 30, 1001), [-1e5, -800., -60., 60., 800., 1e5]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        p, q, log_p, log_q = log_sigmoid_pair(yhat)
+
+    assert np.allclose(log_p, -np.logaddexp(0., -yhat), rtol=1e-14, atol=0)
+    assert np.allclose(log_q, -np.logaddexp(0., yhat), rtol=1e-14, atol=0)
+    with np.errstate(over="ignore"):
+        assert np.allclose(p, 1. / (1. + np.exp(-yhat)), rtol=1e-14, atol=0)
+        assert np.allclose(q, 1. / (1. + np.exp(yhat)), rtol=1e-14, atol=0)
+    # Where 1 - p rounds to 0, q and log(q) keep their precision
+    assert np.isclose(q[-3], np.exp(-60.), rtol=1e-14) and log_q[-3] == -60.
+
+    p32, _, log_p32, _ = log_sigmoid_pair(yhat.astype(np.float32))
+    assert p32.dtype == log_p32.dtype == np.float32
+    assert np.all(np.isfinite(log_p32))
@@ -4,7 +4,7 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
 from bokbokbok.loss_functions.classification import WeightedCrossEntropyLoss
 from bokbokbok.eval_metrics.classification import WeightedCrossEntropyMetric
-from bokbokbok.utils import clip_sigmoid
+from bokbokbok.utils import ArrayDataset, clip_sigmoid
 import lightgbm as lgb
 
 
@@ -58,4 +58,20 @@ def test_wce_lgb_implementation():
                     valid_names=["train", "valid"])
     wce_preds = clip_sigmoid(wce_clf.predict(X_valid))
     preds = clf.predict(X_valid)
-    assert np.isclose(mean_absolute_error(wce_preds, preds), 0.0)
\ No newline at end of file
+    assert np.isclose(mean_absolute_error(wce_preds, preds), 0.0)
+
+
+def test_wce_large_margins():
+    """
+    Assert that the loss and metric are not clipped for large margins: the hessian keeps shrinking
+    and the metric keeps growing with the margin.
+    """
+    yhat = np.array([-800., -60., 40., 800.])
+    y = np.array([1., 1., 0., 0.])
+
+    grad, hess = WeightedCrossEntropyLoss(alpha=2.0)(yhat, ArrayDataset(y))
+    assert np.allclose(grad, [-2., -2., 1., 1.])
+    assert np.allclose(hess, [0., 2 * np.exp(-60.), np.exp(-40.), 0.], rtol=1e-12, atol=0)
+
+    _, score, _ = WeightedCrossEntropyMetric(alpha=2.0)(yhat, ArrayDataset(y))
+    assert np.isclose(score, (2 * 800 + 2 * 60 + 40 + 800) / 4)
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from sklearn.metrics import cohen_kappa_score, f1_score
+from bokbokbok.eval_metrics.classification import (
+    BestF1ScoreMetric,
+    F1_Score_Binary,
+    PrecisionAtKMetric,
+    QuadraticWeightedKappaMetric,
+    WeightedCrossEntropyMetric,
+    WeightedFocalMetric,
+    weighted_focal_sweep,
+)
+from bokbokbok.eval_metrics.regression import LogCoshMetric, RMSPEMetric
+from bokbokbok.eval_metrics.streaming import F1Accumulator, RMSPEAccumulator
+from bokbokbok.loss_functions.classification import (
+    MulticlassWeightedFocalLoss,
+    WeightedCrossEntropyLoss,
+    WeightedFocalLoss,
+)
+from bokbokbok.loss_functions.regression import LogCoshLoss, SPELoss
+from bokbokbok.utils import ArrayDataset, config_context
+from bokbokbok.utils.backends import available_backends
+
+
+losses = [
+    (WeightedCrossEntropyLoss, {"alpha": 3.0}, "binary"),
+    (WeightedFocalLoss, {"alpha": 0.5, "gamma": 2.0}, "binary"),
+    (LogCoshLoss, {}, "regression"),
+    (SPELoss, {}, "regression"),
+    (MulticlassWeightedFocalLoss, {"XGBoost": True}, "multiclass"),
+]
+
+
+@pytest.mark.parametrize("backend", available_backends())
+@pytest.mark.parametrize("cache", [False, True])
+@pytest.mark.parametrize("loss, params, problem", losses)
+def test_weighted_losses(problems, loss, params, problem, cache, backend):
+    """
+    Assert that sample weights scale the gradient and hessian of every row.
+    """
+    y, yhat = getattr(problems, problem)
+    weight = problems.weight
+    with config_context(backend=backend):
+        grad, hess = (a.copy() for a in loss(**params)(yhat, ArrayDataset(y)))
+        scale = weight if yhat.ndim == 1 else weight[:, None]
+
+        weighted_grad, weighted_hess = loss(**params, cache=cache)(yhat, ArrayDataset(y, weight))
+        np.testing.assert_allclose(weighted_grad, grad * scale)
+        np.testing.assert_allclose(weighted_hess, hess * scale)
+
+        with config_context(chunk_size=99):
+            weighted_grad, weighted_hess = loss(**params, cache=cache)(yhat, ArrayDataset(y, weight))
+        np.testing.assert_allclose(weighted_grad, grad * scale)
+        np.testing.assert_allclose(weighted_hess, hess * scale)
+
+
+def test_empty_weights_are_ignored(problems):
+    """
+    Assert that the empty weight array XGBoost returns for unweighted datasets is ignored.
+    """
+    y, yhat = problems.binary
+    unweighted = ArrayDataset(y)
+    unweighted.weight = np.array([])
+    loss = WeightedFocalLoss()
+    np.testing.assert_allclose(loss(yhat, unweighted), loss(yhat, ArrayDataset(y)))
+
+
+@pytest.mark.parametrize("metric, problem", [
+    (WeightedCrossEntropyMetric(alpha=2.0), "binary"),
+    (WeightedFocalMetric(alpha=0.5, gamma=1.0), "binary"),
+    (LogCoshMetric(), "regression"),
+    (F1_Score_Binary(average="macro"), "probabilities"),
+    (QuadraticWeightedKappaMetric(XGBoost=True), "multiclass"),
+    (BestF1ScoreMetric(), "binary"),
+    (PrecisionAtKMetric(k=300), "binary"),
+])
+def test_weighted_metrics_repeat_rows(problems, metric, problem):
+    """
+    Assert that integer sample weights give the same score as repeating every row that many times.
+    """
+    y, yhat = getattr(problems, problem)
+    repeats = problems.weight.astype(int)
+    expected = metric(np.repeat(yhat, repeats, axis=0), ArrayDataset(np.repeat(y, repeats)))[1]
+    assert np.isclose(metric(yhat, ArrayDataset(y, problems.weight))[1], expected)
+
+
+def test_weighted_metrics_match_sklearn(problems):
+    weight = problems.weight
+    y, probabilities = problems.probabilities
+    score = F1_Score_Binary()(probabilities, ArrayDataset(y, weight))[1]
+    assert np.isclose(score, f1_score(y, np.round(probabilities), sample_weight=weight))
+
+    y, yhat = problems.multiclass
+    score = QuadraticWeightedKappaMetric(XGBoost=True)(yhat, ArrayDataset(y, weight))[1]
+    expected = cohen_kappa_score(y, yhat.argmax(axis=1), weights="quadratic", sample_weight=weight)
+    assert np.isclose(score, expected)
+
+
+def test_weighted_streaming_and_sweep(problems):
+    weight = problems.weight
+    y, yhat = problems.regression
+    rmspe = RMSPEMetric()(yhat, ArrayDataset(y, weight))[1]
+    accumulator = RMSPEAccumulator()
+    for start in range(0, problems.n, 300):
+        chunk = slice(start, start + 300)
+        accumulator.update(y[chunk], yhat[chunk], weight[chunk])
+    assert np.isclose(accumulator.result(), rmspe)
+
+    y, probabilities = problems.probabilities
+    f1 = F1_Score_Binary()(probabilities, ArrayDataset(y, weight))[1]
+    assert np.isclose(F1Accumulator().update(y, probabilities, weight).result(), f1)
+
+    y, yhat = problems.binary
+    focal = WeightedFocalMetric(alpha=2.0, gamma=1.0)(yhat, ArrayDataset(y, weight))[1]
+    assert np.isclose(weighted_focal_sweep(yhat, y, [2.0], [1.0], weight)[0, 0], focal)